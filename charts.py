@@ -0,0 +1,118 @@
+"""
+Chart payload builder.
+
+Keeps what /chat sends to Chart.js bounded, however many labels a grouped
+result has:
+  - categorical series (engineers, pincodes, sites, ...) keep the TOP_N
+    largest labels and fold the rest into one "Other" bar,
+  - time series (labels like 2025, 2025-03, 2025-03-14, with a year in
+    MIN_YEAR..MAX_YEAR) are put in time order and downsampled to MAX_POINTS
+    with Largest-Triangle-Three-Buckets, which keeps the peaks and dips a
+    plain stride would drop. Projected forecast points are never dropped.
+    Other 4-digit labels (site ids, branch codes) are categories.
+The full result stays in resultstore under the response's result_id.
+"""
+import re
+from decimal import Decimal
+
+import numpy as np
+
+TOP_N = 20
+MAX_POINTS = 200
+OTHER_LABEL = "Other"
+MIN_YEAR, MAX_YEAR = 1900, 2100
+
+_PERIOD_RE = re.compile(r"^\s*(\d{4})(?:[-/](\d{1,2})(?:[-/](\d{1,2}))?)?(?:\s+(.*))?$")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def chart_from_result(columns, rows):
+    """[{"label", "value"}] for a two-column (label, number) result, else None."""
+    if len(columns) != 2 or not rows:
+        return None
+    for label_idx, value_idx in ((0, 1), (1, 0)):
+        if all(row[value_idx] is None or _is_number(row[value_idx]) for row in rows):
+            return [{"label": str(row[label_idx]), "value": float(row[value_idx] or 0)} for row in rows]
+    return None
+
+
+def period_key(label):
+    """Sort key for a period label (2025, 2025-03, 2025/03/14 10:00), or None if it is not one."""
+    match = _PERIOD_RE.match(str(label))
+    if not match:
+        return None
+    year, month, day, rest = match.groups()
+    month, day = int(month or 0), int(day or 0)
+    if not MIN_YEAR <= int(year) <= MAX_YEAR or month > 12 or day > 31 or (match.group(2) and not month):
+        return None
+    return int(year), month, day, rest or ""
+
+
+def is_time_series(chart):
+    return all(period_key(item["label"]) is not None for item in chart)
+
+
+def top_n(chart, n=TOP_N):
+    """Largest n - 1 labels plus one "Other" bar holding the rest."""
+    if len(chart) <= n:
+        return chart
+    ranked = sorted(chart, key=lambda item: item["value"], reverse=True)
+    kept, rest = ranked[:n - 1], ranked[n - 1:]
+    other = {"label": f"{OTHER_LABEL} ({len(rest)})", "value": sum(item["value"] for item in rest)}
+    return kept + [other]
+
+
+def lttb_indices(values, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps."""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(values, dtype=float)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    keep = [0]
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        a = keep[-1]
+        areas = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        keep.append(start + int(np.argmax(areas)))
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+def downsample(chart, max_points=MAX_POINTS):
+    """LTTB over the history in time order (SQL often returns it by count); projected points kept."""
+    history = sorted((item for item in chart if not item.get("projected")),
+                     key=lambda item: period_key(item["label"]))
+    projected = [item for item in chart if item.get("projected")]
+    budget = max(3, max_points - len(projected))
+    if len(history) <= budget:
+        return chart
+    keep = lttb_indices([item["value"] for item in history], budget)
+    return [history[i] for i in keep] + projected
+
+
+def bound(chart):
+    """
+    Return (chart, meta) with the series reduced for display. meta records
+    how many points the full series had and how it was reduced.
+    """
+    meta = {"total_points": len(chart), "shown_points": len(chart), "reduced": None}
+    if is_time_series(chart):
+        reduced = downsample(chart)
+        if len(reduced) < len(chart):
+            meta["reduced"] = "lttb"
+    else:
+        reduced = top_n(chart)
+        if len(reduced) < len(chart):
+            meta["reduced"] = "top_n"
+    meta["shown_points"] = len(reduced)
+    return reduced, meta
@@ -0,0 +1,155 @@
+"""
+Lazy SQL Server access for [BIdata].
+
+Nothing connects at import. Queries borrow a pyodbc connection from a
+small pool (connections are never used by two threads at once) and open
+one on demand. A failed connect is retried on later calls with
+exponential backoff (DB_RETRY_MAX_SECONDS cap), so a worker that starts
+while the database is briefly down keeps serving document questions and
+picks the database up again once it is back.
+"""
+import os
+import time
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))
+DB_RETRY_MAX_SECONDS = 60
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+
+# pyodbc SQLSTATEs that mean the connection itself is gone
+_CONNECTION_LOST_STATES = ("08S01", "08001", "08003", "08004", "08007", "HYT00", "HYT01")
+
+_pool = queue.LifoQueue()      # idle connections, most recently used first
+_pool_pid = os.getpid()         # process that owns the pooled connections
+_pool_lock = threading.Lock()
+_state = {"failures": 0, "next_attempt": 0.0, "last_error": None, "connected_at": None}
+_state_lock = threading.Lock()
+
+
+class DatabaseUnavailable(Exception):
+    """The database could not be reached (or is in its retry backoff)."""
+
+
+def connection_string():
+    return (
+        f"DRIVER={{{os.environ.get('SQL_DRIVER', 'SQL Server')}}};"
+        f"SERVER={os.environ.get('SQL_SERVER', 'x.x.x.x')};"
+        f"DATABASE={os.environ.get('SQL_DATABASE', '1234567')};"
+        f"UID={os.environ.get('SQL_UID', 'user')};"
+        f"PWD={os.environ.get('SQL_PWD', '123')};"
+    )
+
+
+def _connect():
+    with _state_lock:
+        wait = _state["next_attempt"] - time.time()
+        if wait > 0:
+            raise DatabaseUnavailable(f"Database unavailable, retrying in {wait:.0f}s: {_state['last_error']}")
+
+    try:
+        import pyodbc
+        conn = pyodbc.connect(connection_string(), timeout=DB_CONNECT_TIMEOUT)
+    except Exception as e:
+        with _state_lock:
+            _state["failures"] += 1
+            _state["last_error"] = str(e)
+            _state["next_attempt"] = time.time() + min(DB_RETRY_MAX_SECONDS, 2 ** _state["failures"])
+        logger.error(f"Failed to connect to database (attempt {_state['failures']}): {e}")
+        raise DatabaseUnavailable(str(e)) from e
+
+    with _state_lock:
+        if _state["failures"]:
+            logger.info(f"Database connection restored after {_state['failures']} failed attempt(s)")
+        _state.update(failures=0, next_attempt=0.0, last_error=None, connected_at=time.time())
+    logger.info("Database connection established successfully")
+    return conn
+
+
+def _own_pool():
+    """
+    The connection pool of this process. A forked worker (gunicorn --preload
+    after warm_up()) inherits the parent's idle connections, whose sockets it
+    shares with the parent and its siblings; those are dropped unused (closing
+    them would end the parent's sessions too) and the worker starts empty.
+    """
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = queue.LifoQueue()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def _release(conn, broken=False):
+    pool = _own_pool()
+    if broken or pool.qsize() >= DB_POOL_SIZE:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    else:
+        pool.put(conn)
+
+
+def _connection_lost(error):
+    state = error.args[0] if getattr(error, "args", None) else ""
+    return isinstance(state, str) and state in _CONNECTION_LOST_STATES
+
+
+def query(sql):
+    """
+    Run a SELECT and return (columns, rows). Reconnects once if the pooled
+    connection turned out to be dead. Raises DatabaseUnavailable if the
+    database cannot be reached.
+    """
+    for attempt in (1, 2):
+        try:
+            conn = _own_pool().get_nowait()
+        except queue.Empty:
+            conn = _connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql)
+                result = [col[0] for col in cursor.description], cursor.fetchall()
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        except Exception as e:
+            lost = _connection_lost(e)
+            _release(conn, broken=lost)
+            if attempt == 2 or not lost:
+                raise
+            logger.warning(f"Database connection lost ({e}); reconnecting")
+            continue
+        _release(conn)
+        return result
+
+
+def ping():
+    """True if a trivial query succeeds."""
+    try:
+        query("SELECT 1")
+        return True
+    except Exception as e:
+        with _state_lock:
+            _state["last_error"] = str(e)
+        return False
+
+
+def status():
+    with _state_lock:
+        return {
+            "failures": _state["failures"],
+            "last_error": _state["last_error"],
+            "retry_in": max(0.0, round(_state["next_attempt"] - time.time(), 1)),
+            "connected_at": _state["connected_at"],
+            "idle_connections": _own_pool().qsize(),
+        }
@@ -1,67 +1,128 @@
 import io
 import os
-import pandas as pd
-from flask import send_file
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-
-EXPORT_DIR = os.path.join("uploads", "exports")
-os.makedirs(EXPORT_DIR, exist_ok=True)
-
-def export_csv(content, save_as=None):
+import csv
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from flask import Response, send_file
+from fileread import MERGE_DIR
+
+# reportlab and openpyxl are imported in the exporters that need them.
+# Exports live under the download folder so /download-file/exports/... serves them.
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(MERGE_DIR, "exports"))
+
+CSV_CHUNK_ROWS = 500            # rows per streamed CSV chunk
+PDF_WIDTH_SAMPLE_ROWS = 200     # rows measured to size PDF columns
+PDF_FONT = "Helvetica"
+PDF_FONT_SIZE = 9
+PDF_MARGIN = 40
+PDF_ROW_HEIGHT = 14
+PDF_CELL_PADDING = 6
+
+
+def _export_rows(content):
+    """
+    Return (columns, rows) for an export payload, or None if it has nothing
+    exportable. Rows are the posted dicts themselves; nothing is copied.
+    """
     if not content:
-        return "No data provided", 400
-
+        return None
     if 'table_data' in content:
-        df = pd.DataFrame(content['table_data'])
+        rows = content['table_data']
     elif 'chart_data' in content:
-        df = pd.DataFrame(content['chart_data'])
+        rows = content['chart_data']
     elif 'summary' in content:
-        df = pd.DataFrame([{"Summary": content['summary']}])
+        rows = [{"Summary": content['summary']}]
     else:
-        return "No valid data to export", 400
+        return None
+    return _columns(rows), rows
+
+
+def _columns(rows):
+    """Ordered union of row keys (same column order a DataFrame would use)."""
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def _values(row, columns):
+    return [row.get(col) for col in columns]
+
+
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(_values(row, columns))
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
 
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
+
+def export_csv(content, save_as=None, columns=None, rows=None):
+    if rows is None:
+        if not content:
+            return "No data provided", 400
+        table = _export_rows(content)
+        if table is None:
+            return "No valid data to export", 400
+        columns, rows = table
 
     if save_as:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
         file_path = os.path.join(EXPORT_DIR, save_as)
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(output.getvalue())
+        with open(file_path, "wb") as f:
+            for chunk in _csv_chunks(columns, rows):
+                f.write(chunk)
         return file_path
 
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+    return Response(
+        _csv_chunks(columns, rows),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name='export.csv'
+        headers={'Content-Disposition': 'attachment; filename=export.csv'}
     )
 
-def export_excel(content, save_as=None):
-    if not content:
-        return "No data provided", 400
 
-    if 'table_data' in content:
-        df = pd.DataFrame(content['table_data'])
-    elif 'chart_data' in content:
-        df = pd.DataFrame(content['chart_data'])
-    elif 'summary' in content:
-        df = pd.DataFrame([{"Summary": content['summary']}])
-    else:
-        return "No valid data to export", 400
+def _excel_value(value):
+    if value is None or isinstance(value, (str, int, float, bool, Decimal, date, datetime)):
+        return value
+    return str(value)
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Export')
-    output.seek(0)
+
+def export_excel(content, save_as=None, columns=None, rows=None):
+    from openpyxl import Workbook
+
+    if rows is None:
+        if not content:
+            return "No data provided", 400
+        table = _export_rows(content)
+        if table is None:
+            return "No valid data to export", 400
+        columns, rows = table
+
+    # Write-only mode streams rows to a temp file instead of building a cell tree
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Export')
+    ws.append(columns)
+    for row in rows:
+        ws.append([_excel_value(v) for v in _values(row, columns)])
 
     if save_as:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
         file_path = os.path.join(EXPORT_DIR, save_as)
-        with open(file_path, "wb") as f:
-            f.write(output.getvalue())
+        wb.save(file_path)
         return file_path
 
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+
     return send_file(
         output,
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
@@ -69,64 +130,112 @@ def export_excel(content, save_as=None):
         download_name='export.xlsx'
     )
 
-def export_pdf(content, save_as=None):
-    if not content:
+
+def _fit(text, width):
+    """Truncate text with an ellipsis so it fits in width points."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    full = stringWidth(text, PDF_FONT, PDF_FONT_SIZE)
+    if full <= width:
+        return text
+    text = text[:max(1, int(len(text) * width / full))]
+    while text and stringWidth(text + "…", PDF_FONT, PDF_FONT_SIZE) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _column_widths(columns, sample, usable_width):
+    """Size columns by their widest sampled value, then scale to the page."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    natural = []
+    for idx, col in enumerate(columns):
+        widest = stringWidth(str(col), PDF_FONT + "-Bold", PDF_FONT_SIZE)
+        for row in sample:
+            value = row[idx]
+            if value is not None:
+                widest = max(widest, stringWidth(str(value), PDF_FONT, PDF_FONT_SIZE))
+        natural.append(min(widest, usable_width / 2) + PDF_CELL_PADDING)
+
+    total = sum(natural)
+    if total <= usable_width:
+        return natural
+    scale = usable_width / total
+    return [w * scale for w in natural]
+
+
+def export_pdf(content, save_as=None, columns=None, rows=None):
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib.utils import simpleSplit
+
+    if not content and rows is None:
         return "No data provided", 400
 
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
+    if rows is None and ('table_data' in content or 'chart_data' in content):
+        columns, rows = _export_rows(content)
+
+    pagesize = landscape(letter) if columns and len(columns) > 6 else letter
+    width, height = pagesize
+    usable_width = width - 2 * PDF_MARGIN
+
+    if save_as:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+    output = open(os.path.join(EXPORT_DIR, save_as), "w+b") if save_as else tempfile.TemporaryFile()
+    p = canvas.Canvas(output, pagesize=pagesize, pageCompression=1)
 
-    y = height - 50
+    y = height - PDF_MARGIN
     p.setFont("Helvetica-Bold", 14)
-    p.drawString(50, y, "Exported Data")
+    p.drawString(PDF_MARGIN, y, "Exported Data")
     y -= 30
-    p.setFont("Helvetica", 12)
-
-    if 'summary' in content:
-        lines = content['summary'].split('\n')
-        for line in lines:
-            p.drawString(50, y, line)
-            y -= 15
-            if y < 50:
-                p.showPage()
-                y = height - 50
-
-    def draw_table(data, y_start):
-        col_width = 150
-        row_height = 20
-        y_pos = y_start
-        keys = data[0].keys()
-
-        for idx, col in enumerate(keys):
-            p.drawString(50 + idx * col_width, y_pos, col)
-        y_pos -= row_height
-
-        for row in data:
-            for idx, val in enumerate(row.values()):
-                p.drawString(50 + idx * col_width, y_pos, str(val))
-            y_pos -= row_height
-            if y_pos < 50:
-                p.showPage()
-                y_pos = height - 50
-        return y_pos
 
-    if 'table_data' in content:
-        y = draw_table(content['table_data'], y)
-    elif 'chart_data' in content:
-        y = draw_table(content['chart_data'], y)
+    if content and 'summary' in content:
+        p.setFont("Helvetica", 12)
+        for paragraph in content['summary'].split('\n'):
+            for line in simpleSplit(paragraph, "Helvetica", 12, usable_width) or [""]:
+                if y < PDF_MARGIN:
+                    p.showPage()
+                    p.setFont("Helvetica", 12)
+                    y = height - PDF_MARGIN
+                p.drawString(PDF_MARGIN, y, line)
+                y -= 15
+
+    if rows is not None and columns:
+        values = ([None if v is None else str(v) for v in _values(row, columns)] for row in rows)
+        sample = list(islice(values, PDF_WIDTH_SAMPLE_ROWS))
+        widths = _column_widths(columns, sample, usable_width)
+        x_positions = [PDF_MARGIN + sum(widths[:i]) for i in range(len(widths))]
+
+        def draw_header(y_pos):
+            p.setFont(PDF_FONT + "-Bold", PDF_FONT_SIZE)
+            for x, w, col in zip(x_positions, widths, columns):
+                p.drawString(x, y_pos, _fit(str(col), w - PDF_CELL_PADDING))
+            p.line(PDF_MARGIN, y_pos - 4, PDF_MARGIN + sum(widths), y_pos - 4)
+            p.setFont(PDF_FONT, PDF_FONT_SIZE)
+            return y_pos - PDF_ROW_HEIGHT
+
+        # Each page is finished (showPage) before the next is laid out. The
+        # header and at least one row must fit below the summary.
+        if y - 2 * PDF_ROW_HEIGHT < PDF_MARGIN:
+            p.showPage()
+            y = height - PDF_MARGIN
+        y = draw_header(y)
+        for row in chain(sample, values):
+            if y < PDF_MARGIN:
+                p.showPage()
+                y = draw_header(height - PDF_MARGIN)
+            for x, w, value in zip(x_positions, widths, row):
+                if value:
+                    p.drawString(x, y, _fit(value, w - PDF_CELL_PADDING))
+            y -= PDF_ROW_HEIGHT
 
     p.save()
-    buffer.seek(0)
 
     if save_as:
-        file_path = os.path.join(EXPORT_DIR, save_as)
-        with open(file_path, "wb") as f:
-            f.write(buffer.getvalue())
-        return file_path
+        output.close()
+        return os.path.join(EXPORT_DIR, save_as)
 
+    output.seek(0)
     return send_file(
-        buffer,
+        output,
         mimetype='application/pdf',
         as_attachment=True,
         download_name='export.pdf'
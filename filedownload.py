@@ -1,17 +1,84 @@
 import os
-from flask import send_file, abort
+import gzip
+import shutil
+import threading
+import mimetypes
+from flask import send_file, abort, request
+from werkzeug.security import safe_join
 
-UPLOAD_FOLDER = r"D:\Python\Deep Learning\uploads"
+from fileread import MERGE_DIR
+from export import EXPORT_DIR
+
+UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", MERGE_DIR)
+
+# Only files directly in the upload folder or the export folder are served.
+# The app's own bookkeeping lives there too (merge segments and manifests,
+# compaction backups, caches, logs, the result store) and is never served.
+INTERNAL_NAMES = {"last_used.txt", "intent_log.jsonl"}
+INTERNAL_SUFFIXES = (".manifest.json", ".bak", ".tmp", ".gz", ".sqlite3", ".sqlite3-wal", ".sqlite3-shm")
+
+# Text downloads are also kept as a .gz next to the original and served to
+# clients that accept gzip. The variant is rebuilt when the original changes.
+GZIP_EXTENSIONS = (".txt", ".csv", ".json")
+GZIP_MIN_BYTES = 1024
+
+
+def _gzip_variant(path):
+    gz_path = path + ".gz"
+    if not os.path.exists(gz_path) or os.path.getmtime(gz_path) < os.path.getmtime(path):
+        tmp_path = f"{gz_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, gz_path)
+    return gz_path
 
-def download_uploaded_file(filename):
-    # Sanitize filename to avoid directory traversal
-    safe_path = os.path.join(UPLOAD_FOLDER, os.path.basename(filename))
 
-    if not os.path.isfile(safe_path):
+def _downloadable(path):
+    # realpath so a symlink cannot point the check somewhere else
+    real_path = os.path.realpath(path)
+    folders = {os.path.realpath(UPLOAD_FOLDER), os.path.realpath(EXPORT_DIR)}
+    name = os.path.basename(real_path).lower()
+    return (
+        os.path.dirname(real_path) in folders
+        and name not in INTERNAL_NAMES
+        and not name.endswith(INTERNAL_SUFFIXES)
+        and os.path.isfile(real_path)
+    )
+
+
+def download_uploaded_file(filename):
+    # safe_join rejects absolute paths and ".." segments (directory traversal)
+    safe_path = safe_join(UPLOAD_FOLDER, filename)
+    if safe_path is None or not _downloadable(safe_path):
         return abort(404, description="File not found.")
 
-    return send_file(
-        safe_path,
+    download_name = os.path.basename(safe_path)
+    mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    serve_path = safe_path
+    encoding = None
+
+    if (
+        download_name.lower().endswith(GZIP_EXTENSIONS)
+        and request.accept_encodings["gzip"]
+        and os.path.getsize(safe_path) >= GZIP_MIN_BYTES
+    ):
+        serve_path = _gzip_variant(safe_path)
+        encoding = "gzip"
+
+    # conditional=True answers If-None-Match/If-Modified-Since with 304 and
+    # Range with 206; a file path lets the server use wsgi.file_wrapper
+    # (sendfile) or X-Sendfile when USE_X_SENDFILE is enabled.
+    response = send_file(
+        serve_path,
+        mimetype=mimetype,
         as_attachment=True,
-        download_name=filename
+        download_name=download_name,
+        conditional=True,
+        etag=True,
+        max_age=0
     )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
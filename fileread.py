@@ -3,14 +3,125 @@ import hashlib
 from werkzeug.utils import secure_filename
 from flask import session
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 file_cache = {}
-
-# Store active merge file name per session
-MERGE_DIR = r"D:\Python\Deep Learning\uploads"
-os.makedirs(MERGE_DIR, exist_ok=True)
+page_cache = OrderedDict()      # page hash -> OCR text, least recently used first
+page_cache_lock = threading.Lock()
+page_cache_chars = 0
+
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+# Per-page PDF extraction settings
+PDF_MIN_TEXT_CHARS = 25          # below this a page is treated as scanned
+PDF_OCR_TARGET_PX = 2500         # long edge in pixels after rasterization
+PDF_OCR_MIN_DPI = 120
+PDF_OCR_MAX_DPI = 300
+PDF_OCR_WORKERS = min(4, os.cpu_count() or 1)
+PAGE_CACHE_MAX_CHARS = 50_000_000  # OCR text kept in page_cache (oldest pages evicted)
+
+# Store active merge file name per session (created on first write)
+MERGE_DIR = os.environ.get("MERGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads"))
 last_file_path = os.path.join(MERGE_DIR, "last_used.txt")
 
 
+def _cached_page(page_hash):
+    with page_cache_lock:
+        text = page_cache.get(page_hash)
+        if text is not None:
+            page_cache.move_to_end(page_hash)
+        return text
+
+
+def _cache_page(page_hash, text):
+    global page_cache_chars
+    with page_cache_lock:
+        old = page_cache.pop(page_hash, None)
+        page_cache_chars += len(text) - (len(old) if old is not None else 0)
+        page_cache[page_hash] = text
+        while page_cache_chars > PAGE_CACHE_MAX_CHARS and len(page_cache) > 1:
+            _, evicted = page_cache.popitem(last=False)
+            page_cache_chars -= len(evicted)
+
+
+def _pdf_page_hash(doc, page):
+    """Hash a page by its content stream, embedded images and geometry."""
+    h = hashlib.md5(page.read_contents())
+    for img in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    h.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+    return h.hexdigest()
+
+
+def _ocr_dpi(page):
+    # Scale DPI so the long edge lands near PDF_OCR_TARGET_PX (page.rect is in 1/72 inch)
+    long_edge = max(page.rect.width, page.rect.height)
+    if not long_edge:
+        return PDF_OCR_MIN_DPI
+    dpi = int(PDF_OCR_TARGET_PX * 72 / long_edge)
+    return max(PDF_OCR_MIN_DPI, min(PDF_OCR_MAX_DPI, dpi))
+
+
+def _ocr_pdf_pages(file_bytes, jobs):
+    """Rasterize and OCR a group of (page_index, dpi) pairs with one document handle."""
+    import fitz
+    import pytesseract
+    from PIL import Image
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+    results = {}
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        for index, dpi in jobs:
+            pix = doc[index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+            img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+            results[index] = pytesseract.image_to_string(img, config="--psm 6")
+    return results
+
+
+def extract_text_from_pdf(file_bytes):
+    """
+    Extract text page by page: pages with a text layer are read directly,
+    pages without one are OCR'd in parallel and cached by page hash.
+    """
+    import fitz
+
+    page_texts = []
+    pending = []  # (page_index, dpi, page_hash) for pages that need OCR
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        for page in doc:
+            page_text = page.get_text("text")
+            page_texts.append(page_text)
+            if len(page_text.strip()) >= PDF_MIN_TEXT_CHARS or not page.read_contents():
+                continue
+
+            page_hash = _pdf_page_hash(doc, page)
+            cached_text = _cached_page(page_hash)
+            if cached_text is not None:
+                page_texts[page.number] = cached_text
+            else:
+                pending.append((page.number, _ocr_dpi(page), page_hash))
+
+    if pending:
+        # Tesseract runs out of process, so threads overlap OCR across pages
+        workers = min(PDF_OCR_WORKERS, len(pending))
+        groups = [pending[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_ocr_pdf_pages, file_bytes, [(index, dpi) for index, dpi, _ in group])
+                for group in groups
+            ]
+            for group, future in zip(groups, futures):
+                results = future.result()
+                for index, _, page_hash in group:
+                    _cache_page(page_hash, results[index])
+                    page_texts[index] = results[index]
+
+        print(f"🖨️ OCR'd {len(pending)} of {len(page_texts)} PDF pages")
+
+    return "".join(page_texts)
+
+
 def extract_text_from_file(file_storage, file_bytes=None, file_hash=None):
     try:
         filename = file_storage.filename.lower()
@@ -25,23 +136,7 @@ def extract_text_from_file(file_storage, file_bytes=None, file_hash=None):
 
         text = ""
         if filename.endswith(".pdf"):
-            import fitz
-            import pytesseract
-            from PIL import Image
-            pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            for page in doc:
-                page_text = page.get_text("text")
-                if page_text:
-                    text += page_text
-
-            if not text.strip():
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                for page in doc:
-                    pix = page.get_pixmap(dpi=150)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples).convert("L")
-                    text += pytesseract.image_to_string(img, config="--psm 6")
+            text = extract_text_from_pdf(file_bytes)
 
         elif filename.endswith(".docx"):
             import docx
@@ -50,22 +145,19 @@ def extract_text_from_file(file_storage, file_bytes=None, file_hash=None):
             text = "\n".join(p.text for p in doc.paragraphs)
 
         elif filename.endswith(".xlsx"):
-            import pandas as pd
+            from tabular import excel_to_text
             file_storage.stream.seek(0)
-            df = pd.read_excel(file_storage, engine='openpyxl')
-            text = df.to_json(orient="records", force_ascii=False, indent=2)
+            text = excel_to_text(file_storage, engine='openpyxl')
 
         elif filename.endswith(".xls"):
-            import pandas as pd
+            from tabular import excel_to_text
             file_storage.stream.seek(0)
-            df = pd.read_excel(file_storage, engine='xlrd')
-            text = df.to_json(orient="records", force_ascii=False, indent=2)
+            text = excel_to_text(file_storage, engine='xlrd')
 
         elif filename.endswith(".csv"):
-            import pandas as pd
+            from tabular import csv_to_text
             file_storage.stream.seek(0)
-            df = pd.read_csv(file_storage)
-            text = df.to_json(orient="records", force_ascii=False, indent=2)
+            text = csv_to_text(file_storage)
 
         elif filename.endswith(".txt"):
             text = file_bytes.decode("utf-8", errors="ignore")
@@ -110,24 +202,24 @@ def extract_and_merge_files(uploaded_files, command_text=None):
                 session["active_merge_file"] = active_file_name
 
     # Step 2: Extract and build merged content
+    import mergestore
     merged_text = ""
+    documents = []
     for file_storage in uploaded_files:
         file_bytes = file_storage.read()
         file_storage.stream.seek(0)  # Reset for re-use
         file_hash = hashlib.md5(file_bytes).hexdigest()
         extracted_text = extract_text_from_file(file_storage, file_bytes, file_hash)
 
-        merged_text += f"\n\n### Start of Document: {file_storage.filename} ###\n"
-        merged_text += extracted_text.strip()
-        merged_text += f"\n### End of Document: {file_storage.filename} ###\n"
+        documents.append((file_storage.filename, extracted_text))
+        merged_text += mergestore.format_document(file_storage.filename, extracted_text.strip())
 
-    # Step 3: Write merged text to disk
-    file_path = os.path.join(MERGE_DIR, active_file_name)
-    print(f"📁 Writing to: {file_path}")
-    with open(file_path, "a", encoding="utf-8") as f:
-        f.write(merged_text + "\n")
+    # Step 3: Store one segment per new document (duplicates are skipped)
+    added = mergestore.add_documents(active_file_name, documents)
+    print(f"📁 Merge '{active_file_name}': {added} of {len(documents)} document(s) added")
 
     # Step 4: Track last used
+    os.makedirs(MERGE_DIR, exist_ok=True)
     with open(os.path.join(MERGE_DIR, "last_used.txt"), "w", encoding="utf-8") as tracker:
         tracker.write(active_file_name)
 
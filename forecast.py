@@ -0,0 +1,324 @@
+"""
+Local forecasting for grouped [BIdata] results.
+
+The SQL prompt asks for raw monthly/yearly counts when a question is about
+forecasting; this module turns that result into a chart series with
+projected points instead of sending it through another LLM call.
+
+Candidate models (all NumPy):
+  - seasonal naive (repeat the last season; naive last value for yearly data),
+  - Holt-Winters additive (Holt's linear method without a full season of
+    history), with smoothing parameters picked by a grid search that is
+    vectorized across the whole grid,
+  - linear trend with prediction-interval bands.
+The model with the lowest error on a held-out tail is refitted on the full
+series. Bands are approximate 95% intervals.
+
+Fit-time benchmark for 12 to 600 points:
+    python forecast.py
+"""
+import re
+import sys
+import time
+import calendar
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+
+Z_95 = 1.96
+SEASON_LENGTH = {"month": 12, "year": None}
+DEFAULT_HORIZON = {"month": 6, "year": 3}
+MAX_HORIZON = {"month": 36, "year": 10}
+MIN_POINTS = 3
+
+FORECAST_KEYWORDS = ["forecast", "predict", "prediction", "projection", "project ", "projected",
+                     "expected", "estimate", "next month", "next year", "upcoming", "future"]
+
+_GRID = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+_HORIZON_RE = re.compile(r"next\s+(\d+)\s+(month|year)s?", re.IGNORECASE)
+_YEAR_MONTH_RE = re.compile(r"^\s*(\d{4})[-/](\d{1,2})")
+_MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTH_NAMES.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+
+
+def is_forecast_request(question):
+    lower = question.lower()
+    return any(k in lower for k in FORECAST_KEYWORDS)
+
+
+def horizon_from_question(question, freq):
+    match = _HORIZON_RE.search(question)
+    if match and match.group(2).lower() == freq:
+        return max(1, min(int(match.group(1)), MAX_HORIZON[freq]))
+    return DEFAULT_HORIZON[freq]
+
+
+# ---------------------------------------------------------------------------
+# Models. Each fit returns (forecast, lower, upper) for h steps ahead.
+# ---------------------------------------------------------------------------
+
+def seasonal_naive(y, h, season=None):
+    n = len(y)
+    steps = np.arange(1, h + 1)
+    if season and n >= season + 1:
+        forecast = y[n - season + (steps - 1) % season]
+        errors = y[season:] - y[:-season]
+        spread = np.sqrt((steps - 1) // season + 1)
+    else:
+        forecast = np.full(h, y[-1], dtype=float)
+        errors = np.diff(y)
+        spread = np.sqrt(steps)
+    rmse = np.sqrt(np.mean(errors ** 2)) if len(errors) else 0.0
+    return forecast, forecast - Z_95 * rmse * spread, forecast + Z_95 * rmse * spread
+
+
+def linear_trend(y, h, season=None):
+    n = len(y)
+    x = np.arange(n, dtype=float)
+    slope, intercept = np.polyfit(x, y, 1)
+    residuals = y - (intercept + slope * x)
+    se = np.sqrt(residuals @ residuals / max(n - 2, 1))
+    future = np.arange(n, n + h, dtype=float)
+    forecast = intercept + slope * future
+    sxx = ((x - x.mean()) ** 2).sum()
+    spread = se * np.sqrt(1 + 1 / n + (future - x.mean()) ** 2 / sxx)
+    return forecast, forecast - Z_95 * spread, forecast + Z_95 * spread
+
+
+def _holt_winters_grid(y, season):
+    """
+    Run additive Holt-Winters for every (alpha, beta, gamma) in the grid at
+    once. Returns the alphas, final states and one-step MSE per grid point.
+    """
+    if season:
+        alphas, betas, gammas = (g.ravel() for g in np.meshgrid(_GRID, _GRID, _GRID, indexing="ij"))
+        first = y[:season].mean()
+        level = np.full(len(alphas), first)
+        trend = np.full(len(alphas), (y[season:2 * season].mean() - first) / season)
+        seasonal = np.tile(y[:season] - first, (len(alphas), 1))
+        start = season
+    else:
+        alphas, betas = (g.ravel() for g in np.meshgrid(_GRID, _GRID, indexing="ij"))
+        gammas = np.zeros_like(alphas)
+        level = np.full(len(alphas), y[0], dtype=float)
+        trend = np.full(len(alphas), y[1] - y[0], dtype=float)
+        seasonal = np.zeros((len(alphas), 1))
+        season = 1
+        start = 2
+
+    sse = np.zeros(len(alphas))
+    for t in range(len(y)):
+        s = seasonal[:, t % season]
+        error = y[t] - (level + trend + s)
+        if t >= start:
+            sse += error ** 2
+        new_level = alphas * (y[t] - s) + (1 - alphas) * (level + trend)
+        trend = betas * (new_level - level) + (1 - betas) * trend
+        seasonal[:, t % season] = gammas * (y[t] - new_level) + (1 - gammas) * s
+        level = new_level
+    return alphas, level, trend, seasonal, sse / max(len(y) - start, 1)
+
+
+def holt_winters(y, h, season=None):
+    n = len(y)
+    if season and n < 2 * season:
+        season = None
+    alphas, level, trend, seasonal, mse = _holt_winters_grid(y, season)
+    best = int(np.argmin(mse))
+    steps = np.arange(1, h + 1)
+    seasonal_index = (n - 1 + steps) % seasonal.shape[1]
+    forecast = level[best] + steps * trend[best] + seasonal[best, seasonal_index]
+    # Error variance grows with the horizon; this is the level-only approximation
+    spread = Z_95 * np.sqrt(mse[best]) * np.sqrt(1 + (steps - 1) * alphas[best] ** 2)
+    return forecast, forecast - spread, forecast + spread
+
+
+MODELS = {
+    "seasonal_naive": seasonal_naive,
+    "holt_winters": holt_winters,
+    "linear_trend": linear_trend,
+}
+
+
+def forecast(values, horizon, season=None):
+    """
+    Pick the model with the lowest MAE on a held-out tail and refit it on
+    the full series. Returns a dict with the model name, holdout MAE and
+    forecast/lower/upper arrays.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    holdout = max(1, min(season or 3, n // 4))
+    candidates = ["linear_trend", "seasonal_naive"]
+    if n - holdout >= 4:
+        candidates.append("holt_winters")
+
+    scores = {}
+    for name in candidates:
+        predicted, _, _ = MODELS[name](y[:-holdout], holdout, season)
+        scores[name] = float(np.mean(np.abs(predicted - y[-holdout:])))
+    model = min(scores, key=scores.get)
+
+    point, lower, upper = MODELS[model](y, horizon, season)
+    if (y >= 0).all():
+        point, lower, upper = (np.maximum(a, 0) for a in (point, lower, upper))
+    return {"model": model, "holdout_mae": round(scores[model], 3),
+            "forecast": point, "lower": lower, "upper": upper}
+
+
+# ---------------------------------------------------------------------------
+# SQL result -> series -> chart
+# ---------------------------------------------------------------------------
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _period_of(value, column):
+    """(year, month) or (year, None) for a single period-like value, else None."""
+    if isinstance(value, (datetime, date)):
+        return value.year, value.month
+    if isinstance(value, str):
+        match = _YEAR_MONTH_RE.match(value)
+        if match and 1 <= int(match.group(2)) <= 12:
+            return int(match.group(1)), int(match.group(2))
+        if value.strip().isdigit() and 1900 <= int(value) <= 2100:
+            return int(value), None
+        return None
+    if isinstance(value, int) and 1900 <= value <= 2100 and "month" not in column.lower():
+        return value, None
+    return None
+
+
+def _month_of(value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            value = int(value)
+        else:
+            return _MONTH_NAMES.get(value.lower())
+    if isinstance(value, int) and 1 <= value <= 12:
+        return value
+    return None
+
+
+def series_from_result(columns, rows):
+    """
+    Find the period column(s) and the value column of a grouped result.
+    Returns (labels, values, freq) with gaps filled with 0, or None when the
+    result is not a time series.
+    """
+    if len(rows) < MIN_POINTS or len(columns) < 2:
+        return None
+
+    period_col = month_col = value_col = None
+    for idx, column in enumerate(columns):
+        sample = [row[idx] for row in rows if row[idx] is not None]
+        if not sample:
+            continue
+        if period_col is None and all(_period_of(v, column) for v in sample):
+            period_col = idx
+        elif month_col is None and "month" in column.lower() and all(_month_of(v) for v in sample):
+            month_col = idx
+        elif all(_is_number(v) for v in sample):
+            value_col = idx
+    if period_col is None or value_col is None:
+        return None
+
+    totals = {}
+    for row in rows:
+        if row[period_col] is None:
+            continue
+        year, month = _period_of(row[period_col], columns[period_col])
+        if month is None and month_col is not None:
+            month = _month_of(row[month_col])
+        key = (year, month)
+        totals[key] = totals.get(key, 0.0) + float(row[value_col] or 0)
+
+    keys = sorted(totals)
+    if any(month is None for _, month in keys):
+        if any(month is not None for _, month in keys):
+            return None
+        years = [year for year, _ in keys]
+        step = min(np.diff(years)) if len(years) > 1 else 1
+        periods = list(range(years[0], years[-1] + 1, step))
+        values = [totals.get((year, None), 0.0) for year in periods]
+        return [str(year) for year in periods], values, "year"
+
+    first = keys[0][0] * 12 + keys[0][1] - 1
+    last = keys[-1][0] * 12 + keys[-1][1] - 1
+    months = [divmod(i, 12) for i in range(first, last + 1)]
+    values = [totals.get((year, m + 1), 0.0) for year, m in months]
+    return [f"{year}-{m + 1:02d}" for year, m in months], values, "month"
+
+
+def _future_labels(last_label, freq, horizon, step=1):
+    if freq == "year":
+        return [str(int(last_label) + step * k) for k in range(1, horizon + 1)]
+    year, month = map(int, last_label.split("-"))
+    index = year * 12 + month - 1
+    return [f"{(index + k) // 12}-{(index + k) % 12 + 1:02d}" for k in range(1, horizon + 1)]
+
+
+def forecast_result(columns, rows, question=""):
+    """
+    Chart series with history and projected points for a grouped SQL
+    result, or None if the result is not a usable time series:
+        {"chart": [{"label", "value"[, "lower", "upper", "projected"]}], "forecast": {...}}
+    """
+    series = series_from_result(columns, rows)
+    if series is None:
+        return None
+    labels, values, freq = series
+    if len(values) < MIN_POINTS:
+        return None
+
+    horizon = horizon_from_question(question, freq)
+    result = forecast(values, horizon, SEASON_LENGTH[freq])
+    step = int(labels[1]) - int(labels[0]) if freq == "year" and len(labels) > 1 else 1
+
+    chart = [{"label": label, "value": round(value, 2)} for label, value in zip(labels, values)]
+    for label, point, low, high in zip(_future_labels(labels[-1], freq, horizon, step),
+                                       result["forecast"], result["lower"], result["upper"]):
+        chart.append({"label": label, "value": round(float(point), 2), "lower": round(float(low), 2),
+                      "upper": round(float(high), 2), "projected": True})
+
+    unit = "year" if freq == "year" else "month"
+    return {
+        "chart": chart,
+        "forecast": {
+            "model": result["model"],
+            "horizon": horizon,
+            "freq": freq,
+            "holdout_mae": result["holdout_mae"],
+            "message": f"📈 Projected the next {horizon} {unit}{'s' if horizon > 1 else ''} "
+                       f"using {result['model'].replace('_', ' ')} (shaded band ≈ 95% range).",
+        },
+    }
+
+
+def _benchmark(sizes=(12, 24, 60, 120, 240, 600), repeats=5):
+    rng = np.random.default_rng(0)
+    print(f"{'points':>6}  " + "  ".join(f"{name:>15}" for name in MODELS) + f"  {'select+fit':>12}")
+    for n in sizes:
+        t = np.arange(n)
+        y = 200 + 0.8 * t + 40 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 10, n)
+        timings = []
+        for fit in MODELS.values():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                fit(y, 12, 12)
+            timings.append((time.perf_counter() - start) / repeats * 1000)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            forecast(y, 12, 12)
+        total = (time.perf_counter() - start) / repeats * 1000
+        print(f"{n:>6}  " + "  ".join(f"{ms:>12.2f} ms" for ms in timings) + f"  {total:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        _benchmark(tuple(int(n) for n in sys.argv[1:]))
+    else:
+        _benchmark()
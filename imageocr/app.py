@@ -16,6 +16,9 @@ from typing import Optional
 
 import log as Log
 import upload
+import jobs
+from ocr_pool import pool as ocr_pool, PoolBusy
+from openai_client import llm_gateway
 from config import config
 from dotenv import load_dotenv
 
@@ -37,9 +40,17 @@ async def lifespan(app: FastAPI):
     if not config.validate():
         Log.log.warning("Configuration validation failed - some features may not work")
 
+    # Start OCR workers (models load once per worker, before traffic arrives)
+    ocr_pool.start(warm=config.OCR_WARM_START)
+
+    # Background workers for /api/jobs
+    await jobs.runner.start()
+
     yield
 
     Log.log.info("ImageOCR application shutting down...")
+    await jobs.runner.shutdown()
+    ocr_pool.shutdown()
 
 
 app = FastAPI(
@@ -60,6 +71,26 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+# Shed load instead of queueing when the LLM gateway is saturated
+@app.exception_handler(llm_gateway.GatewayOverloaded)
+async def overloaded_exception_handler(request: Request, exc: llm_gateway.GatewayOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "The assistant is busy right now. Please try again in a moment."},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
+# Back-pressure: the OCR queue is full
+@app.exception_handler(PoolBusy)
+async def pool_busy_exception_handler(request: Request, exc: PoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "The OCR service is busy right now. Please try again in a moment."},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -90,6 +121,7 @@ async def middleware(request: Request, call_next):
 
 # Register routers
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 
 if __name__ == "__main__":
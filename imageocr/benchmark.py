@@ -0,0 +1,268 @@
+"""
+Throughput benchmarks for the OCR pipeline, run on the images in Input/.
+
+Usage:
+    python benchmark.py paddle [--batch-sizes 8,16,32,64] [--repeat 3]
+    python benchmark.py tesseract [--lines 60] [--repeat 3]
+    python benchmark.py superres
+    python benchmark.py preprocess
+    python benchmark.py deskew
+    python benchmark.py video [--seconds 120]
+
+paddle: images per second for one PaddleOCR.ocr() call per image (the
+previous pipeline) versus ocr_prepared_batch() over all images, for
+several recognizer batch sizes. Preprocessing is done once up front and
+is not part of either measurement.
+
+tesseract: refinement time for a dense page of low-confidence lines, one
+pytesseract call per crop (the previous pipeline) versus
+tesseract_read_crops().
+
+superres: the super-resolution decision, latency and peak buffer size for
+each sample image.
+
+preprocess: validate() + preprocess_image() (the previous pipeline) versus
+PreprocessPipeline for each sample image, with the path it took.
+
+deskew: angle found and time spent on a synthetic A4 scan (300 dpi, with
+speckle noise) rotated by known angles.
+
+video: a synthetic slide deck video, seeking to and OCR'ing one frame per
+VIDEO_FRAME_INTERVAL_SEC (the previous pipeline) versus extract_video_text().
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from config import config
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif", ".webp"}
+
+
+def load_samples() -> List[np.ndarray]:
+    """Read every image in Input/."""
+    images = []
+    for path in sorted(config.INPUT_DIR.iterdir()):
+        if path.suffix.lower() in IMAGE_EXTS:
+            img = cv2.imread(str(path))
+            if img is not None:
+                images.append(img)
+    return images
+
+
+def _timed(fn, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _texts(results):
+    return [[line["text"] for line in r["lines"]] for r in results]
+
+
+def _ocr_texts(result):
+    return [line[1][0].strip() for line in (result[0] or [])] if result else []
+
+
+def bench_paddle(batch_sizes: List[int], repeat: int):
+    import image
+
+    engine = image.get_ocr()  # model loading is not part of the measurement
+    samples = load_samples()
+    images = [image.prepare_for_ocr(img, use_superres=False, check_quality=False)[2] for img in samples]
+    print(f"{len(images)} sample images from {config.INPUT_DIR}")
+
+    seconds, sequential = _timed(lambda: [engine.ocr(img, cls=True) for img in images], repeat)
+    print(f"{'ocr() per image':<28} {len(images) / seconds:6.2f} images/s  ({seconds:.2f}s)")
+    expected = [_ocr_texts(result) for result in sequential]
+
+    for batch_size in batch_sizes:
+        seconds, batched = _timed(
+            lambda: image.ocr_prepared_batch(images, batch_size=batch_size), repeat)
+        same = _texts(batched) == expected
+        print(f"{f'batched, batch_size={batch_size}':<28} {len(images) / seconds:6.2f} images/s  "
+              f"({seconds:.2f}s, same lines: {same})")
+
+
+def make_line_crops(count: int) -> List[np.ndarray]:
+    """Binary text line crops like the ones PaddleOCR hands to Tesseract."""
+    crops = []
+    for i in range(count):
+        text = f"Item {i:03d} Widget assembly x{i % 7 + 1} $ {i * 13.5:,.2f}"
+        crop = np.full((40, 12 * len(text) + 20), 255, dtype=np.uint8)
+        cv2.putText(crop, text, (10, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 0, 2, cv2.LINE_AA)
+        crops.append(crop)
+    return crops
+
+
+def bench_tesseract(lines: int, repeat: int):
+    import pytesseract
+    import image
+
+    crops = make_line_crops(lines)
+    engine = "tesserocr (in-process)" if image.tesserocr is not None else "stitched batches"
+    print(f"{lines} line crops, {config.TESSERACT_THREADS} threads, {engine}")
+
+    seconds, expected = _timed(
+        lambda: [pytesseract.image_to_string(c, lang="eng", config=image.TESSERACT_CONFIG).strip()
+                 for c in crops], repeat)
+    print(f"{'one tesseract run per crop':<28} {seconds * 1000:8.1f} ms")
+
+    seconds, texts = _timed(lambda: image.tesseract_read_crops(crops), repeat)
+    same = sum(a == b for a, b in zip(texts, expected))
+    print(f"{'tesseract_read_crops':<28} {seconds * 1000:8.1f} ms  ({same}/{lines} lines identical)")
+
+
+def bench_superres():
+    import superres
+
+    print(f"{'image':<40} {'text px':>8} {'scale':>6} {'tiles':>6} {'peak MB':>8} {'ms':>8}")
+    for path in sorted(config.INPUT_DIR.iterdir()):
+        if path.suffix.lower() not in IMAGE_EXTS:
+            continue
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        _, report = superres.engine.run(img)
+        text_height = f"{report['text_height']:.1f}" if report["text_height"] else "-"
+        print(f"{path.name[:40]:<40} {text_height:>8} {report['scale']:>6} {report['tiles']:>6} "
+              f"{report['peak_mb']:>8} {report['latency_ms']:>8}")
+
+
+def bench_preprocess():
+    import image
+    from preprocess import PreprocessPipeline
+
+    print(f"{'image':<40} {'before ms':>10} {'after ms':>9} {'path':>5}  skipped")
+    for path in sorted(config.INPUT_DIR.iterdir()):
+        if path.suffix.lower() not in IMAGE_EXTS:
+            continue
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        before, _ = _timed(lambda: (image.validate(img), image.preprocess_image(img)), 1)
+        after, result = _timed(lambda: PreprocessPipeline(check_quality=False).run(img), 1)
+        report = result["report"]
+        print(f"{path.name[:40]:<40} {before * 1000:>10.1f} {after * 1000:>9.1f} {report['path']:>5}  "
+              f"{', '.join(report['skipped'])}")
+
+
+def make_page(height: int = 3508, width: int = 2480) -> np.ndarray:
+    """A dense synthetic text page."""
+    page = np.full((height, width), 255, dtype=np.uint8)
+    for i, y in enumerate(range(150, height - 150, 60)):
+        cv2.putText(page, f"Line {i} of a sample invoice, item {i * 7} total amount due {i * 13.5:.2f}",
+                    (150, y), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+    return page
+
+
+def bench_deskew():
+    import image
+
+    page = make_page()
+    rng = np.random.default_rng(0)
+    h, w = page.shape
+    print(f"{'applied':>8} {'found':>8} {'ms':>8}")
+    for applied in (-12.0, -4.0, -1.5, 0.0, 0.2, 2.3, 7.0):
+        rotation = cv2.getRotationMatrix2D((w // 2, h // 2), applied, 1.0)
+        scan = cv2.warpAffine(page, rotation, (w, h), borderValue=255)
+        scan[rng.random(scan.shape) < 0.02] = 0
+        seconds, angle = _timed(lambda: image.estimate_skew(scan), 3)
+        # estimate_skew returns the correction, i.e. minus the applied rotation
+        print(f"{applied:>8.1f} {0.0 - angle:>8.1f} {seconds * 1000:>8.1f}")
+
+
+def make_slide_video(path: str, seconds: int, fps: int = 25):
+    """A 720p slide deck: a new slide every 20 s, a new bullet every 5 s."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (1280, 720))
+    for second in range(seconds):
+        slide = second // 20
+        frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+        cv2.putText(frame, f"Slide {slide}: quarterly results", (60, 110), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+        for bullet in range((second % 20) // 5 + 1):
+            cv2.putText(frame, f"Point {slide}.{bullet} revenue up {slide * 4 + bullet}%", (90, 230 + bullet * 80),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 0, 0), 2)
+        for _ in range(fps):
+            writer.write(frame)
+    writer.release()
+
+
+def bench_video(seconds: int):
+    import image
+    import video
+
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        make_slide_video(path, seconds)
+
+        def seek_every_interval():
+            cap = cv2.VideoCapture(path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            duration = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / fps
+            current, texts = 0.0, []
+            while current < duration:
+                cap.set(cv2.CAP_PROP_POS_MSEC, current * 1000)
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                texts.append(image.tesseract_read_image(video.preprocess_frame(frame)))
+                current += config.VIDEO_FRAME_INTERVAL_SEC
+            cap.release()
+            return texts
+
+        before, texts = _timed(seek_every_interval, 1)
+        print(f"{'seek + OCR every sample':<28} {before:8.2f} s  ({len(texts)} frames OCR'd)")
+        with open(path, "rb") as f:
+            content = f.read()
+        after, result = _timed(lambda: video.extract_video_text(content, "mp4"), 1)
+        print(f"{'extract_video_text':<28} {after:8.2f} s  ({result['message']}, "
+              f"{len(result['segments'])} timestamped segments)")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    paddle = sub.add_parser("paddle", help="Sequential vs batched PaddleOCR")
+    paddle.add_argument("--batch-sizes", default="8,16,32,64")
+    paddle.add_argument("--repeat", type=int, default=3)
+
+    tesseract = sub.add_parser("tesseract", help="Per-crop vs batched Tesseract refinement")
+    tesseract.add_argument("--lines", type=int, default=60)
+    tesseract.add_argument("--repeat", type=int, default=3)
+
+    sub.add_parser("superres", help="Super-resolution decisions on Input/")
+
+    sub.add_parser("preprocess", help="Old vs fused preprocessing on Input/")
+
+    sub.add_parser("deskew", help="Skew estimation on rotated synthetic scans")
+
+    video = sub.add_parser("video", help="Per-interval vs keyframe video OCR")
+    video.add_argument("--seconds", type=int, default=120)
+
+    args = parser.parse_args()
+    if args.command == "paddle":
+        bench_paddle([int(b) for b in args.batch_sizes.split(",")], args.repeat)
+    elif args.command == "tesseract":
+        bench_tesseract(args.lines, args.repeat)
+    elif args.command == "superres":
+        bench_superres()
+    elif args.command == "preprocess":
+        bench_preprocess()
+    elif args.command == "deskew":
+        bench_deskew()
+    elif args.command == "video":
+        bench_video(args.seconds)
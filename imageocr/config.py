@@ -27,12 +27,6 @@ class Config:
         r"C:\Program Files\Tesseract-OCR\tesseract.exe"
     )
 
-    # Poppler Configuration (for PDF processing)
-    POPPLER_PATH: str = os.getenv(
-        "POPPLER_PATH",
-        r"C:\Program Files\poppler-25.07.0\Library\bin"
-    )
-
     # Google Vision API
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = os.getenv(
         "GOOGLE_APPLICATION_CREDENTIALS"
@@ -60,17 +54,43 @@ class Config:
 
     # Super Resolution Model
     SUPER_RES_MODEL: str = os.getenv("SUPER_RES_MODEL", "FSRCNN_x4.pb")
+    SUPER_RES_MODEL_X2: str = os.getenv("SUPER_RES_MODEL_X2", "FSRCNN_x2.pb")
+    SR_TARGET_TEXT_HEIGHT: float = float(os.getenv("SR_TARGET_TEXT_HEIGHT", "20"))  # pixels
+    SR_TILE_SIZE: int = int(os.getenv("SR_TILE_SIZE", "256"))
+    SR_MAX_OUTPUT_PIXELS: int = int(os.getenv("SR_MAX_OUTPUT_PIXELS", "40000000"))
 
     # OCR Settings
     CONFIDENCE_THRESHOLD: float = float(os.getenv("CONFIDENCE_THRESHOLD", "0.75"))
     USE_SUPER_RESOLUTION: bool = os.getenv("USE_SUPER_RESOLUTION", "True").lower() == "true"
     USE_DESKEW: bool = os.getenv("USE_DESKEW", "True").lower() == "true"
+    DESKEW_MAX_ANGLE: float = float(os.getenv("DESKEW_MAX_ANGLE", "15"))  # degrees searched each way
+    DESKEW_MIN_ANGLE: float = float(os.getenv("DESKEW_MIN_ANGLE", "0.3"))  # smaller skews are not rotated
+    DESKEW_MAX_SIDE: int = int(os.getenv("DESKEW_MAX_SIDE", "1000"))  # skew is measured at this size
+    OCR_REC_BATCH_SIZE: int = int(os.getenv("OCR_REC_BATCH_SIZE", "32"))  # line crops per recognizer call
+    OCR_IMAGE_BATCH_SIZE: int = int(os.getenv("OCR_IMAGE_BATCH_SIZE", "8"))  # images per worker job
+    TESSERACT_THREADS: int = int(os.getenv("TESSERACT_THREADS", "2"))  # per OCR worker process
+    TESSERACT_BATCH_SIZE: int = int(os.getenv("TESSERACT_BATCH_SIZE", "32"))  # crops per tesseract run
+
+    # OCR Worker Pool
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    OCR_MAX_QUEUE: int = int(os.getenv("OCR_MAX_QUEUE", str(4 * max(1, (os.cpu_count() or 2) // 2))))
+    OCR_RETRY_AFTER_SEC: int = int(os.getenv("OCR_RETRY_AFTER_SEC", "10"))
+    OCR_WARM_START: bool = os.getenv("OCR_WARM_START", "True").lower() == "true"
+    # Bump when OCR output changes; page/range checkpoints of older versions are ignored
+    OCR_PIPELINE_VERSION: str = os.getenv("OCR_PIPELINE_VERSION", "1")
+
+    # Background Jobs (POST /api/jobs)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # jobs processed at a time
+    JOB_MAX_QUEUE: int = int(os.getenv("JOB_MAX_QUEUE", "100"))  # waiting jobs before 503
+    JOB_TTL_SEC: int = int(os.getenv("JOB_TTL_SEC", "86400"))  # finished jobs are kept this long
 
     # Cache Settings
     ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE", "True").lower() == "true"
     CACHE_TYPE: str = os.getenv("CACHE_TYPE", "file")  # file, redis, memory
     CACHE_DIR: Path = BASE_DIR / "cache"
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "86400"))  # 24 hours in seconds
+    JOB_DB: Path = CACHE_DIR / "jobs.sqlite3"
+    JOB_SPOOL_DIR: Path = CACHE_DIR / "job_uploads"  # uploads of queued/running jobs
 
     # Redis Configuration (if using Redis cache)
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -85,10 +105,15 @@ class Config:
     LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
 
     # Video Processing
-    VIDEO_FRAME_INTERVAL_SEC: int = int(os.getenv("VIDEO_FRAME_INTERVAL_SEC", "1"))
+    VIDEO_FRAME_INTERVAL_SEC: float = float(os.getenv("VIDEO_FRAME_INTERVAL_SEC", "1"))
+    VIDEO_HASH_THRESHOLD: int = int(os.getenv("VIDEO_HASH_THRESHOLD", "12"))  # dHash bits (of 256)
+    VIDEO_CHANGE_FRACTION: float = float(os.getenv("VIDEO_CHANGE_FRACTION", "0.0001"))  # changed pixels
+    VIDEO_CHUNK_SEC: float = float(os.getenv("VIDEO_CHUNK_SEC", "60"))  # per worker job and checkpoint
 
     # PDF Processing
-    PDF_BATCH_SIZE: int = int(os.getenv("PDF_BATCH_SIZE", "5"))
+    PDF_BATCH_SIZE: int = int(os.getenv("PDF_BATCH_SIZE", "5"))  # pages per OCR worker job
+    PDF_RENDER_DPI: int = int(os.getenv("PDF_RENDER_DPI", "200"))
+    PDF_MIN_TEXT_CHARS: int = int(os.getenv("PDF_MIN_TEXT_CHARS", "20"))  # shorter text layers are OCR'd
 
     # Excel Processing
     EXCEL_CHUNK_SIZE: int = int(os.getenv("EXCEL_CHUNK_SIZE", "1000"))
@@ -101,6 +126,11 @@ class Config:
     MIN_RESOLUTION_HEIGHT: int = int(os.getenv("MIN_RESOLUTION_HEIGHT", "500"))
     LOW_CONTRAST_THRESHOLD: float = float(os.getenv("LOW_CONTRAST_THRESHOLD", "15.0"))
 
+    # Preprocessing (stages run only when these metrics call for them)
+    DENOISE_NOISE_SIGMA: float = float(os.getenv("DENOISE_NOISE_SIGMA", "4.0"))
+    UNEVEN_LIGHT_STD: float = float(os.getenv("UNEVEN_LIGHT_STD", "12.0"))
+    SCREENSHOT_FLAT_SHARE: float = float(os.getenv("SCREENSHOT_FLAT_SHARE", "0.6"))
+
     # CORS Settings
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
 
@@ -7,27 +7,57 @@ advanced image enhancement techniques.
 import cv2
 import numpy as np
 import pytesseract
-from paddleocr import PaddleOCR
 from typing import Dict, List, Tuple, Any, Optional
 import os
+import csv
+import time
+import shlex
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import log as Log
+import superres
 from config import config
+from preprocess import PreprocessPipeline, format_report
 from Levenshtein import ratio as lev_ratio
 
-# === Initialize PaddleOCR ===
-try:
-    ocr = PaddleOCR(
-        use_angle_cls=True,
-        lang="en",
-        det_model_dir=config.PADDLE_DET_MODEL,
-        rec_model_dir=config.PADDLE_REC_MODEL,
-        cls_model_dir=config.PADDLE_CLS_MODEL
-    )
-    Log.log.info("Loaded PP-OCRv4 custom models successfully")
-except Exception as e:
-    Log.log.warning(f"Custom PP-OCR models not found, using default: {e}")
-    ocr = PaddleOCR(use_angle_cls=True, lang='en')
+# === PaddleOCR engine ===
+# Loaded on first use so that only the OCR worker processes (see ocr_pool.py)
+# pay for the models; the API process never loads them.
+ocr = None
+
+
+def get_ocr():
+    """
+    Return the process-wide PaddleOCR engine, loading it on first call.
+
+    Returns:
+        PaddleOCR instance
+    """
+    global ocr
+    if ocr is None:
+        from paddleocr import PaddleOCR
+        try:
+            ocr = PaddleOCR(
+                use_angle_cls=True,
+                lang="en",
+                det_model_dir=config.PADDLE_DET_MODEL,
+                rec_model_dir=config.PADDLE_REC_MODEL,
+                cls_model_dir=config.PADDLE_CLS_MODEL,
+                rec_batch_num=config.OCR_REC_BATCH_SIZE,
+                cls_batch_num=config.OCR_REC_BATCH_SIZE
+            )
+            Log.log.info("Loaded PP-OCRv4 custom models successfully")
+        except Exception as e:
+            Log.log.warning(f"Custom PP-OCR models not found, using default: {e}")
+            ocr = PaddleOCR(
+                use_angle_cls=True,
+                lang='en',
+                rec_batch_num=config.OCR_REC_BATCH_SIZE,
+                cls_batch_num=config.OCR_REC_BATCH_SIZE
+            )
+    return ocr
 
 # === Configure Tesseract ===
 if os.path.exists(config.TESSERACT_PATH):
@@ -35,32 +65,57 @@ if os.path.exists(config.TESSERACT_PATH):
 else:
     Log.log.warning(f"Tesseract not found at {config.TESSERACT_PATH}")
 
+# Refinement runs several tesseract processes in parallel; stop each one from
+# also spreading over every core with OpenMP. The limit is passed only in the
+# environment of those processes, so the OCR worker itself (PaddleOCR)
+# is not affected.
+TESSERACT_ENV = {**os.environ, "OMP_THREAD_LIMIT": os.environ.get("OMP_THREAD_LIMIT", "1")}
+
+# tesserocr (optional) keeps Tesseract loaded in-process; without it, crops
+# are stitched into one image per batch and read with a single tesseract run.
+# In-process Tesseract shares the worker's OpenMP runtime with PaddleOCR, so no
+# limit is set for it here: an OMP_THREAD_LIMIT in the server's environment
+# applies to both libraries.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 CONFIDENCE_THRESHOLD = config.CONFIDENCE_THRESHOLD
+TESSERACT_CONFIG = r"--oem 3 --psm 6"
+STITCH_GAP = 24  # white pixels between stitched crops
+DESKEW_MAX_POINTS = 100000  # text pixels sampled for the skew search
+# Results with these messages are empty pages, not OCR failures
+NO_TEXT_DETECTED = "No text detected in image"
+NO_VALID_TEXT = "No valid text found"
+
+_tesseract_local = threading.local()
+_tesseract_executor: Optional[ThreadPoolExecutor] = None
 
 
 def super_resolve(img: np.ndarray, debug: bool = False) -> np.ndarray:
     """
-    Apply super-resolution to enhance image quality.
+    Apply super-resolution when the text is too small for reliable OCR.
+    See superres.py for how the scale is chosen.
 
     Args:
         img: Input image as numpy array
         debug: If True, save intermediate results
 
     Returns:
-        Super-resolved image
+        Super-resolved image (or the input, if no upscaling was needed)
     """
     try:
-        sr = cv2.dnn_superres.DnnSuperResImpl_create()
-        model_path = config.SUPER_RES_MODEL
-        if os.path.exists(model_path):
-            sr.readModel(model_path)
-            sr.setModel("fsrcnn", 4)
-            img = sr.upsample(img)
+        img, report = superres.engine.run(img)
+        if report["scale"] > 1:
+            Log.log.info(
+                f"Super-resolution {report['scale']}x ({report['reason']}): "
+                f"{report['tiles']} tiles, peak {report['peak_mb']} MB, {report['latency_ms']} ms"
+            )
             if debug:
                 cv2.imwrite("1_superres.png", img)
-            Log.log.info("Super-resolution applied successfully")
         else:
-            Log.log.warning(f"Super-resolution model not found at {model_path}")
+            Log.log.info(f"Super-resolution skipped: {report['reason']} ({report['latency_ms']} ms)")
     except Exception as e:
         Log.log.info(f"Super-resolution skipped: {e}")
     return img
@@ -89,45 +144,96 @@ def safe_to_gray(img: np.ndarray) -> np.ndarray:
         raise ValueError(f"Unsupported image shape: {img.shape}")
 
 
-def deskew_image(image: np.ndarray) -> np.ndarray:
+def estimate_skew(image: np.ndarray) -> float:
     """
-    Automatically deskew (straighten) a rotated image.
+    Estimate the skew of text lines with a projection profile search.
+
+    The image is binarized on a copy at most DESKEW_MAX_SIDE pixels wide.
+    For each candidate angle the text pixels are rotated (as coordinates,
+    not as an image) and projected onto the vertical axis; straight text
+    gives the sharpest profile. Angles are searched in 1 degree steps over
+    +/- DESKEW_MAX_ANGLE, then in 0.1 degree steps around the best one.
+
+    Args:
+        image: Input image (text darker than background)
+
+    Returns:
+        Angle in degrees to pass to cv2.getRotationMatrix2D to straighten
+        the image (0.0 if there is no text to measure)
+    """
+    gray = safe_to_gray(image)
+    h, w = gray.shape
+    factor = min(1.0, config.DESKEW_MAX_SIDE / max(h, w))
+    if factor < 1:
+        gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    ys, xs = np.nonzero(binary)
+    if len(xs) < 50:
+        return 0.0
+    if len(xs) > DESKEW_MAX_POINTS:
+        keep = np.random.default_rng(0).choice(len(xs), DESKEW_MAX_POINTS, replace=False)
+        ys, xs = ys[keep], xs[keep]
+    xs = xs.astype(np.float32) - xs.mean()
+    ys = ys.astype(np.float32) - ys.mean()
+
+    def best_angle(angles: np.ndarray) -> float:
+        scores = []
+        for angle in np.radians(angles):
+            # Row of each text pixel after rotating the image by angle
+            rows = -np.sin(angle) * xs + np.cos(angle) * ys
+            profile = np.bincount((rows - rows.min()).astype(np.int32))
+            scores.append(float(np.dot(profile, profile)))
+        return float(angles[int(np.argmax(scores))])
+
+    max_angle = config.DESKEW_MAX_ANGLE
+    coarse = best_angle(np.arange(-max_angle, max_angle + 0.5, 1.0))
+    return round(best_angle(np.arange(coarse - 1.0, coarse + 1.05, 0.1)), 1) + 0.0
+
+
+def deskew_with_angle(image: np.ndarray) -> Tuple[np.ndarray, float, float]:
+    """
+    Straighten an image, skipping the rotation below DESKEW_MIN_ANGLE.
 
     Args:
         image: Input image
 
     Returns:
-        Deskewed image
+        Tuple of (image, angle found in degrees, milliseconds spent)
     """
+    started = time.perf_counter()
     try:
-        gray = safe_to_gray(image)
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-
-        angles = []
-        for cnt in contours:
-            rect = cv2.minAreaRect(cnt)
-            angle = rect[-1]
-            if angle < -45:
-                angle += 90
-            if -45 < angle < 45:
-                angles.append(angle)
-
-        if angles:
-            median_angle = np.median(angles)
-            (h, w) = image.shape[:2]
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, median_angle, 1.0)
-            rotated = cv2.warpAffine(
-                image, M, (w, h),
-                flags=cv2.INTER_LINEAR,
-                borderMode=cv2.BORDER_REPLICATE
-            )
-            Log.log.info(f"Image deskewed by {median_angle:.2f} degrees")
-            return rotated
+        angle = estimate_skew(image)
     except Exception as e:
         Log.log.warning(f"Deskew failed: {e}")
-    return image
+        return image, 0.0, round((time.perf_counter() - started) * 1000, 2)
+
+    if abs(angle) >= config.DESKEW_MIN_ANGLE:
+        (h, w) = image.shape[:2]
+        center = (w // 2, h // 2)
+        M = cv2.getRotationMatrix2D(center, angle, 1.0)
+        image = cv2.warpAffine(
+            image, M, (w, h),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE
+        )
+    elapsed = round((time.perf_counter() - started) * 1000, 2)
+    action = "rotated" if abs(angle) >= config.DESKEW_MIN_ANGLE else "below tolerance, not rotated"
+    Log.log.info(f"Deskew: {angle:.1f} degrees ({action}) in {elapsed} ms")
+    return image, angle, elapsed
+
+
+def deskew_image(image: np.ndarray) -> np.ndarray:
+    """
+    Automatically deskew (straighten) a rotated image.
+
+    Args:
+        image: Input image
+
+    Returns:
+        Deskewed image
+    """
+    return deskew_with_angle(image)[0]
 
 
 def detect_blur(image: np.ndarray, threshold: float = None) -> Tuple[bool, float]:
@@ -374,6 +480,233 @@ def validate(img: np.ndarray) -> Tuple[bool, str]:
     return True, "Image quality validated successfully"
 
 
+def prepare_for_ocr(
+    img: np.ndarray,
+    use_superres: bool = None,
+    use_deskew: bool = None,
+    check_quality: bool = True,
+    debug: bool = False
+) -> Tuple[bool, str, Optional[np.ndarray]]:
+    """
+    Validate and preprocess an image for PaddleOCR.
+
+    Args:
+        img: Input image as numpy array
+        use_superres: Apply super-resolution (uses config default if None)
+        use_deskew: Apply deskewing (uses config default if None)
+        check_quality: Reject blurry, low-contrast or low-resolution images
+        debug: Save intermediate processing steps
+
+    Returns:
+        Tuple of (is_valid: bool, message: str, BGR image ready for OCR or None)
+    """
+    # Use config defaults if not specified
+    if use_superres is None:
+        use_superres = config.USE_SUPER_RESOLUTION
+    if use_deskew is None:
+        use_deskew = config.USE_DESKEW
+
+    # 1. Optional super-resolution
+    started = time.perf_counter()
+    if use_superres:
+        img = super_resolve(img, debug=debug)
+    superres_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    # 2-3. Validate image quality and preprocess (see preprocess.py)
+    result = PreprocessPipeline(check_quality=check_quality, debug=debug).run(img)
+    report = result["report"]
+    if use_superres:
+        report["timings"] = {"superres": superres_ms, **report["timings"]}
+    if not result["valid"]:
+        Log.log.info(format_report(report))
+        return False, result["message"], None
+    img = result["image"]
+
+    # 4. Optional deskewing
+    if use_deskew:
+        img, angle, report["timings"]["deskew"] = deskew_with_angle(img)
+        report["metrics"]["skew_angle"] = angle
+    report["total_ms"] = round(sum(report["timings"].values()), 2)
+    Log.log.info(format_report(report))
+
+    # 5. Ensure BGR format for PaddleOCR
+    return True, "Image ready for OCR", ensure_bgr(img)
+
+
+def detect_text_boxes(img: np.ndarray) -> List[np.ndarray]:
+    """
+    Run PaddleOCR text detection only.
+
+    Args:
+        img: Preprocessed BGR image
+
+    Returns:
+        Text line boxes (4x2 arrays) in reading order
+    """
+    from paddleocr.paddleocr import predict_system
+
+    dt_boxes, _ = get_ocr().text_detector(img)
+    if dt_boxes is None or len(dt_boxes) == 0:
+        return []
+    return predict_system.sorted_boxes(dt_boxes)
+
+
+def recognize_crops(crops: List[np.ndarray], batch_size: int = None) -> List[Tuple[str, float]]:
+    """
+    Run angle classification and recognition over text line crops in batches.
+
+    Args:
+        crops: Line crops, possibly from several images
+        batch_size: Crops per classifier/recognizer call (uses config default if None)
+
+    Returns:
+        (text, confidence) for each crop, in input order
+    """
+    if batch_size is None:
+        batch_size = config.OCR_REC_BATCH_SIZE
+
+    engine = get_ocr()
+    results = []
+    for start in range(0, len(crops), batch_size):
+        batch = crops[start:start + batch_size]
+        if engine.use_angle_cls:
+            batch, _, _ = engine.text_classifier(batch)
+        rec_res, _ = engine.text_recognizer(batch)
+        results.extend(rec_res)
+    return results
+
+
+def ocr_prepared_batch(images: List[Optional[np.ndarray]], batch_size: int = None) -> List[Dict[str, Any]]:
+    """
+    Detect and recognize text on images already passed through prepare_for_ocr().
+
+    Detection runs per image; the line crops of all images are then
+    classified and recognized together in batches of batch_size, which is
+    much cheaper than one ocr() call per image.
+
+    Args:
+        images: Preprocessed BGR images
+        batch_size: Crops per recognizer call (uses config default if None)
+
+    Returns:
+        One dictionary per image, in input order, with keys:
+            - success (bool): Whether OCR succeeded
+            - message (str): Status message
+            - lines (list): Detected text lines in reading order
+    """
+    from paddleocr.paddleocr import predict_system
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+    crops = []
+    owners = []  # (image index, box) for each crop
+
+    for idx, img in enumerate(images):
+        try:
+            boxes = detect_text_boxes(img)
+        except Exception as e:
+            Log.log.error(f"PaddleOCR failed: {e}", exc_info=True)
+            results[idx] = {"success": False, "message": f"OCR failed: {str(e)}", "lines": []}
+            continue
+
+        if not boxes:
+            Log.log.info("PaddleOCR returned no results")
+            results[idx] = {"success": False, "message": NO_TEXT_DETECTED, "lines": []}
+            continue
+        for box in boxes:
+            crops.append(predict_system.get_rotate_crop_image(img, np.array(box, dtype=np.float32)))
+            owners.append((idx, box))
+
+    try:
+        recognized = recognize_crops(crops, batch_size)
+    except Exception as e:
+        Log.log.error(f"PaddleOCR failed: {e}", exc_info=True)
+        failed = {"success": False, "message": f"OCR failed: {str(e)}", "lines": []}
+        return [r if r is not None else dict(failed) for r in results]
+
+    lines: Dict[int, List[Dict[str, Any]]] = {}
+    drop_score = get_ocr().drop_score
+    for (idx, box), (text, conf) in zip(owners, recognized):
+        lines.setdefault(idx, [])
+        if conf < drop_score:
+            continue
+
+        # Extract bounding box coordinates
+        x_min = max(0, int(min(pt[0] for pt in box)))
+        x_max = int(max(pt[0] for pt in box))
+        y_min = max(0, int(min(pt[1] for pt in box)))
+        y_max = int(max(pt[1] for pt in box))
+
+        # Crop text region
+        cropped = images[idx][y_min:y_max, x_min:x_max]
+
+        # Skip invalid crops
+        if cropped.size == 0 or cropped.shape[0] < 5 or cropped.shape[1] < 5:
+            continue
+
+        # Only low-confidence lines are refined with Tesseract; keep no crop for the rest
+        processed_crop = preprocess_crop(cropped) if conf < CONFIDENCE_THRESHOLD else None
+        lines[idx].append({
+            "text": text.strip(),
+            "conf": conf,
+            "crop": processed_crop
+        })
+        Log.log.info(f"PaddleOCR detected: '{text.strip()}' (confidence={conf:.2f})")
+
+    for idx, image_lines in lines.items():
+        if not image_lines:
+            results[idx] = {"success": False, "message": NO_VALID_TEXT, "lines": []}
+        else:
+            Log.log.info(f"PaddleOCR extracted {len(image_lines)} text lines")
+            results[idx] = {"success": True, "message": "Text extracted successfully", "lines": image_lines}
+    return results
+
+
+def run_paddle_ocr_batch(
+    images: List[np.ndarray],
+    use_superres: bool = None,
+    use_deskew: bool = None,
+    check_quality: bool = True,
+    batch_size: int = None,
+    debug: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Run PaddleOCR with preprocessing on several images (or PDF pages) at once.
+
+    Args:
+        images: Input images as numpy arrays
+        use_superres: Apply super-resolution (uses config default if None)
+        use_deskew: Apply deskewing (uses config default if None)
+        check_quality: Reject blurry, low-contrast or low-resolution images
+        batch_size: Crops per recognizer call (uses config default if None)
+        debug: Save intermediate processing steps
+
+    Returns:
+        One dictionary per input image, in input order, with keys:
+            - success (bool): Whether OCR succeeded
+            - message (str): Status message
+            - lines (list): Detected text lines in reading order
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+    prepared, positions = [], []
+
+    for idx, img in enumerate(images):
+        try:
+            valid, msg, ready = prepare_for_ocr(img, use_superres, use_deskew, check_quality, debug)
+        except Exception as e:
+            Log.log.error(f"PaddleOCR failed: {e}", exc_info=True)
+            results[idx] = {"success": False, "message": f"OCR failed: {str(e)}", "lines": []}
+            continue
+        if not valid:
+            results[idx] = {"success": False, "message": msg, "lines": []}
+            continue
+        prepared.append(ready)
+        positions.append(idx)
+
+    for idx, result in zip(positions, ocr_prepared_batch(prepared, batch_size)):
+        results[idx] = result
+    return results
+
+
 def run_paddle_ocr(
     img: np.ndarray,
     use_superres: bool = None,
@@ -395,76 +728,139 @@ def run_paddle_ocr(
             - message (str): Status message
             - lines (list): List of detected text lines with confidence scores
     """
-    try:
-        # Use config defaults if not specified
-        if use_superres is None:
-            use_superres = config.USE_SUPER_RESOLUTION
-        if use_deskew is None:
-            use_deskew = config.USE_DESKEW
-
-        # 1. Optional super-resolution
-        if use_superres:
-            img = super_resolve(img, debug=debug)
-
-        # 2. Validate image quality
-        valid, msg = validate(img)
-        if not valid:
-            Log.log.warning(f"Image validation failed: {msg}")
-            return {"success": False, "message": msg, "lines": []}
+    return run_paddle_ocr_batch([img], use_superres, use_deskew, debug=debug)[0]
 
-        # 3. Preprocess image
-        img = preprocess_image(img, debug=debug)
 
-        # 4. Optional deskewing
-        if use_deskew:
-            img = deskew_image(img)
+def _tesserocr_api():
+    """This thread's tesserocr API (created once, then reused for every crop)."""
+    api = getattr(_tesseract_local, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang="eng", psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+        _tesseract_local.api = api
+    return api
 
-        # 5. Ensure BGR format for PaddleOCR
-        img = ensure_bgr(img)
 
-        # 6. Run PaddleOCR
-        results = ocr.ocr(img, cls=True)
-        if not results or not results[0]:
-            Log.log.info("PaddleOCR returned no results")
-            return {"success": False, "message": "No text detected in image", "lines": []}
-
-        # 7. Process OCR results
-        paddle_lines = []
-        for line in results[0]:
-            box = line[0]
-            text, conf = line[1]
-
-            # Extract bounding box coordinates
-            x_min = int(min(pt[0] for pt in box))
-            x_max = int(max(pt[0] for pt in box))
-            y_min = int(min(pt[1] for pt in box))
-            y_max = int(max(pt[1] for pt in box))
-
-            # Crop text region
-            cropped = img[y_min:y_max, x_min:x_max]
-
-            # Skip invalid crops
-            if cropped.size == 0 or cropped.shape[0] < 5 or cropped.shape[1] < 5:
-                continue
-
-            # Preprocess crop for Tesseract refinement
-            processed_crop = preprocess_crop(cropped)
-            paddle_lines.append({
-                "text": text.strip(),
-                "conf": conf,
-                "crop": processed_crop
-            })
-            Log.log.info(f"PaddleOCR detected: '{text.strip()}' (confidence={conf:.2f})")
-
-        if not paddle_lines:
-            return {"success": False, "message": "No valid text found", "lines": []}
-
-        Log.log.info(f"PaddleOCR extracted {len(paddle_lines)} text lines")
-        return {"success": True, "message": "Text extracted successfully", "lines": paddle_lines}
+def _read_crops_tesserocr(crops: List[np.ndarray]) -> List[str]:
+    from PIL import Image
 
-    except Exception as e:
-        Log.log.error(f"PaddleOCR failed: {e}", exc_info=True)
-        return {"success": False, "message": f"OCR failed: {str(e)}", "lines": []}
+    api = _tesserocr_api()
+    texts = []
+    for crop in crops:
+        api.SetImage(Image.fromarray(crop))
+        texts.append(api.GetUTF8Text().strip())
+    return texts
+
+
+def _run_tesseract(img: np.ndarray, output: str = "txt") -> str:
+    """
+    Run the tesseract CLI on an image (piped as PNG) with TESSERACT_ENV.
+
+    Args:
+        img: Image to read
+        output: Tesseract output config, e.g. "txt" or "tsv"
+
+    Returns:
+        Tesseract's output
+
+    Raises:
+        pytesseract.TesseractError: If tesseract exits with an error
+    """
+    ok, png = cv2.imencode(".png", img)
+    if not ok:
+        raise ValueError("Could not encode image for Tesseract")
+    args = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", "eng",
+            *shlex.split(TESSERACT_CONFIG)]
+    if output != "txt":
+        args.append(output)
+    proc = subprocess.run(args, input=png.tobytes(), capture_output=True, env=TESSERACT_ENV)
+    if proc.returncode:
+        raise pytesseract.TesseractError(proc.returncode, proc.stderr.decode("utf-8", "replace").strip())
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def _read_crops_stitched(crops: List[np.ndarray]) -> List[str]:
+    """
+    Read crops with one tesseract run: stack them on a white canvas and map
+    each recognized word back to the crop its vertical centre falls in.
+    """
+    width = max(crop.shape[1] for crop in crops) + 2 * STITCH_GAP
+    height = sum(crop.shape[0] for crop in crops) + STITCH_GAP * (len(crops) + 1)
+    canvas = np.full((height, width), 255, dtype=np.uint8)
+
+    tops, bottoms = [], []
+    y = STITCH_GAP
+    for crop in crops:
+        h, w = crop.shape[:2]
+        canvas[y:y + h, STITCH_GAP:STITCH_GAP + w] = crop
+        tops.append(y)
+        bottoms.append(y + h)
+        y += h + STITCH_GAP
+
+    words: List[List[Tuple[int, int, str]]] = [[] for _ in crops]
+    tops_arr = np.array(tops)
+    for row in csv.DictReader(_run_tesseract(canvas, "tsv").splitlines(),
+                              delimiter="\t", quoting=csv.QUOTE_NONE):
+        word = (row["text"] or "").strip()
+        if not word:
+            continue
+        top, h, left, line_num = int(row["top"]), int(row["height"]), int(row["left"]), int(row["line_num"])
+        centre = top + h / 2
+        idx = int(np.searchsorted(tops_arr, centre, side="right")) - 1
+        if 0 <= idx < len(crops) and centre <= bottoms[idx]:
+            words[idx].append((line_num, left, word))
+
+    return [" ".join(word for _, _, word in sorted(crop_words)) for crop_words in words]
+
+
+def tesseract_read_image(img: np.ndarray) -> str:
+    """
+    Read a whole binary image (e.g. a video frame) with Tesseract.
+    Thread-safe: uses this thread's in-process API when tesserocr is installed.
+
+    Args:
+        img: Preprocessed (binary) image
+
+    Returns:
+        Recognized text
+    """
+    if tesserocr is not None:
+        return _read_crops_tesserocr([img])[0]
+    return _run_tesseract(img).strip()
+
+
+def tesseract_read_crops(crops: List[np.ndarray], batch_size: int = None) -> List[str]:
+    """
+    Read text line crops with Tesseract, in parallel across cores.
+
+    Uses a persistent in-process tesserocr API per thread when tesserocr is
+    installed; otherwise one tesseract run per batch of stitched crops.
+
+    Args:
+        crops: Preprocessed (binary) line crops
+        batch_size: Crops per batch (uses config default if None)
+
+    Returns:
+        Recognized text per crop, in input order
+    """
+    global _tesseract_executor
+    if not crops:
+        return []
+    if batch_size is None:
+        batch_size = config.TESSERACT_BATCH_SIZE
+    if _tesseract_executor is None:
+        _tesseract_executor = ThreadPoolExecutor(
+            max_workers=config.TESSERACT_THREADS, thread_name_prefix="tesseract"
+        )
+
+    read = _read_crops_tesserocr if tesserocr is not None else _read_crops_stitched
+    # Spread the crops over all threads, but not below a useful batch
+    per_batch = max(1, min(batch_size, -(-len(crops) // config.TESSERACT_THREADS)))
+    batches = [crops[i:i + per_batch] for i in range(0, len(crops), per_batch)]
+
+    texts: List[str] = []
+    for batch_texts in _tesseract_executor.map(read, batches):
+        texts.extend(batch_texts)
+    return texts
 
 
 def run_tesseract_on_low_conf(paddle_lines: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -473,7 +869,8 @@ def run_tesseract_on_low_conf(paddle_lines: List[Dict[str, Any]]) -> Dict[str, A
 
     Args:
         paddle_lines: List of dictionaries containing PaddleOCR results
-                     Each dict has keys: text, conf, crop
+                     Each dict has keys: text, conf, crop (None for
+                     lines at or above CONFIDENCE_THRESHOLD)
 
     Returns:
         Dictionary with keys:
@@ -481,42 +878,41 @@ def run_tesseract_on_low_conf(paddle_lines: List[Dict[str, Any]]) -> Dict[str, A
             - message (str): Status message
             - lines (str): Refined text as multi-line string
     """
-    merged_lines = []
-    tesseract_config = r"--oem 3 --psm 6"
+    low_conf = [
+        i for i, line in enumerate(paddle_lines)
+        if line["conf"] < CONFIDENCE_THRESHOLD and line.get("crop") is not None
+    ]
+
+    # Read all low-confidence crops in one go
+    try:
+        refined = dict(zip(low_conf, tesseract_read_crops([paddle_lines[i]["crop"] for i in low_conf])))
+    except Exception as e:
+        Log.log.warning(f"Tesseract refinement failed for {len(low_conf)} lines: {e}")
+        refined = {}
 
-    for line in paddle_lines:
+    merged_lines = []
+    for i, line in enumerate(paddle_lines):
         text = line["text"]
         conf = line["conf"]
-        crop = line["crop"]
 
-        # If confidence is high, keep PaddleOCR result as-is
-        if conf >= CONFIDENCE_THRESHOLD:
+        # If confidence is high (or Tesseract failed), keep PaddleOCR result as-is
+        if i not in refined:
             merged_lines.append(text)
             continue
 
-        # Try Tesseract for low-confidence results
-        try:
-            t_text = pytesseract.image_to_string(
-                crop,
-                lang="eng",
-                config=tesseract_config
-            ).strip()
-
-            # Calculate similarity between PaddleOCR and Tesseract results
-            similarity = lev_ratio(t_text, text) if t_text else 0
-
-            # Decide which text to keep based on similarity and length
-            if t_text and (similarity >= 0.85 or len(t_text) > len(text) + 3):
-                merged_lines.append(t_text)
-                Log.log.info(f"Tesseract refinement: '{text}' → '{t_text}'")
-            else:
-                # Keep original if Tesseract result is unreliable
-                merged_lines.append(text)
-                Log.log.info(f"Kept PaddleOCR result: '{text}' (conf={conf:.2f})")
+        t_text = refined[i].strip()
 
-        except Exception as e:
-            Log.log.warning(f"Tesseract refinement failed for '{text}': {e}")
+        # Calculate similarity between PaddleOCR and Tesseract results
+        similarity = lev_ratio(t_text, text) if t_text else 0
+
+        # Decide which text to keep based on similarity and length
+        if t_text and (similarity >= 0.85 or len(t_text) > len(text) + 3):
+            merged_lines.append(t_text)
+            Log.log.info(f"Tesseract refinement: '{text}' → '{t_text}'")
+        else:
+            # Keep original if Tesseract result is unreliable
             merged_lines.append(text)
+            Log.log.info(f"Kept PaddleOCR result: '{text}' (conf={conf:.2f})")
 
     # Post-process all lines
     cleaned_text = "\n".join(postprocess_text(merged_lines))
@@ -0,0 +1,358 @@
+"""
+Background OCR + Q&A jobs.
+
+POST /api/jobs spools the upload to JOB_SPOOL_DIR, queues a job and returns
+its id at once. JOB_WORKERS asyncio workers take jobs from the queue and run the
+same pipeline as /api/upload: extract_texts() on the OCR pool, then
+answer_question(). Job state (status, per-file results, answer) is kept in
+a SQLite database in CACHE_DIR. GET /api/jobs/{id} returns it as JSON, or
+as a server-sent event stream when the client asks for text/event-stream.
+
+A job goes queued -> extracting -> answering -> done, or to failed. Jobs
+still queued or running when the server stops are marked failed at the next
+start and their spooled uploads deleted. Finished jobs are deleted
+JOB_TTL_SEC after they end; their uploads as soon as they end.
+"""
+
+import asyncio
+import functools
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import APIRouter, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+
+import log as Log
+from config import config
+from ocr_pool import PoolBusy
+from openai_client import llm_gateway
+from upload import answer_question
+from utils import extract_texts
+
+FINISHED = {"done", "failed"}
+BUSY_RETRIES = 20       # PoolBusy / GatewayOverloaded retries before a job fails
+KEEPALIVE_SEC = 15      # SSE comment interval while nothing happens
+
+router = APIRouter()
+
+
+class JobStore:
+    """Job rows in SQLite, one connection per thread. Blocking: async code calls it off the event loop."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), timeout=10)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, question TEXT NOT NULL,"
+                " files TEXT NOT NULL, answer TEXT, error TEXT,"
+                " created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            db.commit()
+            self._local.db = db
+        return db
+
+    def create(self, job_id: str, question: str, filenames: List[str]):
+        now = time.time()
+        files = [{"filename": name, "status": "pending"} for name in filenames]
+        db = self._db()
+        db.execute("INSERT INTO jobs VALUES (?, 'queued', ?, ?, NULL, NULL, ?, ?)",
+                   (job_id, question, json.dumps(files), now, now))
+        db.commit()
+
+    def update(self, job_id: str, **fields):
+        """Set columns of a job; files is JSON-encoded."""
+        if "files" in fields:
+            fields["files"] = json.dumps(fields["files"])
+        fields["updated"] = time.time()
+        db = self._db()
+        db.execute(f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                   (*fields.values(), job_id))
+        db.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job as a dict, or None if unknown or expired."""
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["status"] in FINISHED and time.time() - job["updated"] > config.JOB_TTL_SEC:
+            return None
+        job["files"] = json.loads(job["files"])
+        return job
+
+    def expire(self) -> int:
+        """Delete finished jobs older than JOB_TTL_SEC."""
+        db = self._db()
+        cursor = db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+                            (time.time() - config.JOB_TTL_SEC,))
+        db.commit()
+        return cursor.rowcount
+
+    def mark_interrupted(self) -> int:
+        """Fail the jobs a previous run left unfinished."""
+        db = self._db()
+        cursor = db.execute("UPDATE jobs SET status = 'failed', error = ?, updated = ? "
+                            "WHERE status NOT IN ('done', 'failed')",
+                            ("Interrupted by a server restart; please submit the job again", time.time()))
+        db.commit()
+        return cursor.rowcount
+
+
+class StoredFile:
+    """An upload spooled to disk, readable like UploadFile by extract_texts()."""
+
+    def __init__(self, filename: str, path: Path):
+        self.filename = filename
+        self.path = path
+
+    async def read(self) -> bytes:
+        return await asyncio.to_thread(self.path.read_bytes)
+
+
+def _spool(directory: Path, files: List[UploadFile]) -> List[StoredFile]:
+    """Copy uploads into directory, one file per upload, without reading them whole."""
+    directory.mkdir(parents=True, exist_ok=True)
+    stored = []
+    for idx, upload in enumerate(files):
+        path = directory / str(idx)
+        upload.file.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(upload.file, out)
+        stored.append(StoredFile(upload.filename, path))
+    return stored
+
+
+class JobRunner:
+    """Bounded job queue, background workers and SSE subscribers."""
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        # Store writes go through one thread: off the event loop, and applied in order
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    async def _write(self, method, *args, **kwargs):
+        """Run a JobStore call on the writer thread."""
+        call = functools.partial(method, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._writer, call)
+
+    async def start(self):
+        """Start the workers (call from the running event loop)."""
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        interrupted = await self._write(self.store.mark_interrupted)
+        expired = await self._write(self.store.expire)
+        await asyncio.to_thread(self._remove_stale_spools)
+        if interrupted or expired:
+            Log.log.info(f"Jobs: {interrupted} interrupted by the last shutdown, {expired} expired")
+        self._queue = asyncio.Queue(maxsize=config.JOB_MAX_QUEUE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(config.JOB_WORKERS)]
+        Log.log.info(f"Started {config.JOB_WORKERS} job workers")
+
+    async def shutdown(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def _remove_stale_spools(self):
+        """Delete spooled uploads of jobs that are no longer queued or running."""
+        if not config.JOB_SPOOL_DIR.exists():
+            return
+        for directory in config.JOB_SPOOL_DIR.iterdir():
+            job = self.store.get(directory.name)
+            if job is None or job["status"] in FINISHED:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    async def submit(self, question: str, files: List[UploadFile]) -> str:
+        """
+        Spool the uploads to disk and queue a job.
+
+        Args:
+            question: User question
+            files: Uploaded files
+
+        Returns:
+            Job id
+
+        Raises:
+            PoolBusy: If JOB_MAX_QUEUE jobs are already waiting
+        """
+        if self._queue is None or self._queue.full():
+            raise PoolBusy("Job queue is full")
+        job_id = uuid.uuid4().hex
+        spool = config.JOB_SPOOL_DIR / job_id
+        stored = await asyncio.to_thread(_spool, spool, files)
+        # Other requests may have filled the queue while the files were written
+        if self._queue.full():
+            shutil.rmtree(spool, ignore_errors=True)
+            raise PoolBusy("Job queue is full")
+        await self._write(self.store.expire)
+        await self._write(self.store.create, job_id, question, [upload.filename for upload in stored])
+        self._queue.put_nowait((job_id, question, stored))
+        Log.log.info(f"Job {job_id} queued with {len(stored)} files")
+        return job_id
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        events: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue):
+        listeners = self._listeners.get(job_id)
+        if listeners:
+            listeners.discard(events)
+            if not listeners:
+                del self._listeners[job_id]
+
+    def _publish(self, job_id: str, event: str, data: Dict[str, Any]):
+        for events in self._listeners.get(job_id, ()):
+            events.put_nowait((event, data))
+
+    async def _set_status(self, job_id: str, status: str, **fields):
+        await self._write(self.store.update, job_id, status=status, **fields)
+        data = await self._write(self.store.get, job_id) if status in FINISHED else {"status": status}
+        self._publish(job_id, status, data)
+
+    async def _worker(self):
+        while True:
+            job_id, question, files = await self._queue.get()
+            try:
+                await self._run(job_id, question, files)
+            except asyncio.CancelledError:
+                await self._set_status(job_id, "failed", error="Server shut down before the job finished")
+                raise
+            except Exception as e:
+                Log.log.error(f"Job {job_id} failed: {e}", exc_info=True)
+                await self._set_status(job_id, "failed", error=str(e))
+            finally:
+                shutil.rmtree(config.JOB_SPOOL_DIR / job_id, ignore_errors=True)
+                self._queue.task_done()
+
+    async def _retry_busy(self, job_id: str, call):
+        """Run call(), waiting out a saturated OCR pool or LLM gateway."""
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return await call()
+            except (PoolBusy, llm_gateway.GatewayOverloaded) as e:
+                if attempt == BUSY_RETRIES - 1:
+                    raise
+                Log.log.info(f"Job {job_id} waiting {e.retry_after}s: {e}")
+                await asyncio.sleep(e.retry_after)
+
+    async def _run(self, job_id: str, question: str, uploads: List[StoredFile]):
+        started = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(uploads)
+        file_states = [{"filename": upload.filename, "status": "pending"} for upload in uploads]
+        await self._set_status(job_id, "extracting")
+
+        def on_result(idx: int, result: Dict[str, Any]):
+            results[idx] = result
+            file_states[idx] = {"filename": uploads[idx].filename, "status": "done",
+                                "success": result["success"], "message": result["message"],
+                                "text": result["text"]}
+            # Called on the event loop by extract_texts(); queued behind earlier writes, not awaited
+            self._writer.submit(self.store.update, job_id, files=list(file_states))
+            self._publish(job_id, "file", {"index": idx, **file_states[idx]})
+
+        async def extract_pending():
+            # After a PoolBusy retry, only the files without a result are extracted again
+            pending = [idx for idx, result in enumerate(results) if result is None]
+            await extract_texts([uploads[idx] for idx in pending],
+                                on_result=lambda i, result: on_result(pending[i], result))
+
+        await self._retry_busy(job_id, extract_pending)
+        await self._set_status(job_id, "answering")
+
+        filenames = [upload.filename for upload in uploads]
+        answer = await self._retry_busy(job_id, lambda: answer_question(filenames, results, question))
+        await self._set_status(job_id, "done", answer=answer)
+        Log.log.info(f"Job {job_id} done in {time.perf_counter() - started:.1f}s")
+
+
+store = JobStore(config.JOB_DB)
+runner = JobRunner(store)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _event_stream(job_id: str):
+    # Subscribe before reading the job so no event is missed in between
+    events = runner.subscribe(job_id)
+    try:
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            return
+        yield _sse("job", job)
+        if job["status"] in FINISHED:
+            return
+        while True:
+            try:
+                event, data = await asyncio.wait_for(events.get(), KEEPALIVE_SEC)
+            except asyncio.TimeoutError:
+                # The job may be run by another process; check the store
+                job = await asyncio.to_thread(store.get, job_id)
+                if job is None or job["status"] in FINISHED:
+                    if job is not None:
+                        yield _sse(job["status"], job)
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event, data)
+            if event in FINISHED:
+                return
+    finally:
+        runner.unsubscribe(job_id, events)
+
+
+@router.post("/jobs")
+async def create_job(files: List[UploadFile] = File(...), question: str = Form(...)):
+    """Queue extraction + answer for the files and return the job id at once."""
+    job_id = await runner.submit(question, files)
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+    })
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, request: Request, stream: bool = False):
+    """
+    Job status and results as JSON, or as server-sent events with
+    stream=true or Accept: text/event-stream. The stream sends the job,
+    then extracting/answering status events, a "file" event per finished
+    file, and a final "done" or "failed" event with the whole job.
+    """
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": "Job not found or expired"})
+    if stream or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _event_stream(job_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return JSONResponse(job)
@@ -0,0 +1,152 @@
+"""
+Process pool for CPU-bound extraction (OCR, video frames, PDF rasterization).
+
+PaddleOCR, Tesseract and OpenCV hold the GIL or saturate a core for seconds
+per file, so running them inside async handlers stalls every other request.
+Extraction jobs are submitted to a pool of OCR_WORKERS processes instead;
+each worker loads the PaddleOCR models once when it starts and reuses them
+for every job it runs.
+
+At most OCR_MAX_QUEUE jobs may be running or waiting at a time. Beyond that
+submit() raises PoolBusy, which the app turns into a 503 with Retry-After,
+instead of letting uploads pile up behind a saturated pool.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import log as Log
+from config import config
+
+
+class PoolBusy(Exception):
+    """The OCR queue is full; the client should retry later."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after if retry_after is not None else config.OCR_RETRY_AFTER_SEC
+
+
+def _init_worker():
+    """Load the OCR models once per worker process."""
+    started = time.perf_counter()
+    import image
+    image.get_ocr()
+    Log.log.info(f"OCR worker {os.getpid()} ready in {time.perf_counter() - started:.1f}s")
+
+
+def _ping(hold: float) -> int:
+    # Holding the worker briefly makes the warm-up pings land on different workers
+    time.sleep(hold)
+    return os.getpid()
+
+
+class OCRPool:
+    """Bounded process pool with warm workers and a queue-depth limit."""
+
+    def __init__(self, workers: int = None, max_queue: int = None):
+        """
+        Args:
+            workers: Number of worker processes (uses config default if None)
+            max_queue: Maximum jobs running or waiting (uses config default if None)
+        """
+        self.workers = workers or config.OCR_WORKERS
+        self.max_queue = max_queue or config.OCR_MAX_QUEUE
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "restarts": 0}
+
+    def _create(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs an event loop and
+        # native thread pools (Paddle, OpenCV) is not safe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def start(self, warm: bool = True):
+        """
+        Create the worker processes.
+
+        Args:
+            warm: Block until every worker has loaded its models
+        """
+        if self._executor is not None:
+            return
+        started = time.perf_counter()
+        self._executor = self._create()
+        if warm:
+            # One job per worker forces all of them to spawn and run the initializer
+            futures = [self._executor.submit(_ping, 0.5) for _ in range(self.workers)]
+            pids = {f.result() for f in futures}
+            Log.log.info(
+                f"OCR pool warmed up: {len(pids)} workers in {time.perf_counter() - started:.1f}s"
+            )
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling queued jobs."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in a worker process.
+
+        Args:
+            fn: Picklable module-level function
+            *args: Picklable arguments
+
+        Returns:
+            The function's return value
+
+        Raises:
+            PoolBusy: If OCR_MAX_QUEUE jobs are already running or waiting
+        """
+        if self._pending >= self.max_queue:
+            self._stats["rejected"] += 1
+            Log.log.warning(f"OCR pool busy ({self._pending} jobs queued), rejecting request")
+            raise PoolBusy(f"OCR queue is full ({self._pending} jobs)")
+        if self._executor is None:
+            self.start(warm=False)
+
+        self._pending += 1
+        self._stats["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            try:
+                result = await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); replace the pool once and retry
+                if self._executor is executor:
+                    Log.log.error("OCR worker crashed, restarting pool")
+                    self._stats["restarts"] += 1
+                    self.shutdown()
+                    self.start(warm=False)
+                result = await loop.run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+        self._stats["completed"] += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, current queue depth and job counters."""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            **self._stats,
+        }
+
+
+pool = OCRPool()
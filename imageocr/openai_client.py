@@ -1,20 +1,32 @@
 import os
-import logging
-from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type, before_sleep_log
-from openai import AsyncOpenAI, APIStatusError, APITimeoutError, RateLimitError
+import sys
+from openai import AsyncOpenAI
+
+# The shared LLM gateway lives at the repository root, next to the chat app.
+# Appended, so imageocr's own modules (config, log, utils) still win on name clashes.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import llm_gateway  # noqa: E402
 import log as Log  # <-- your custom rotating logger
 
-# Configure retry logging (use logger, not method)
-before_sleep_logger = before_sleep_log(Log.log, logging.WARNING)
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=5),
-    retry=retry_if_exception_type((APIStatusError, APITimeoutError, RateLimitError)),
-    before_sleep=before_sleep_logger
-)
 async def call_openai_chat(client: AsyncOpenAI, **kwargs):
-    return await client.chat.completions.create(**kwargs)
+    """
+    Chat completion through the shared gateway.
+
+    Retries (jittered, budgeted), rate limiting, concurrency caps and the
+    per-call deadline are handled by llm_gateway; the client argument is
+    kept for existing callers and is always the gateway's pooled client.
+
+    Raises:
+        llm_gateway.GatewayOverloaded: If the call cannot be admitted or
+            retried within its deadline.
+    """
+    try:
+        return await llm_gateway.achat(**kwargs)
+    except llm_gateway.GatewayOverloaded as e:
+        Log.log.warning(f"OpenAI gateway overloaded: {e}")
+        raise
+
 
 def getOpenai() -> AsyncOpenAI:
-    return AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return llm_gateway.get_async_client()
@@ -0,0 +1,219 @@
+"""
+Single-pass preprocessing pipeline for OCR.
+
+PreprocessPipeline.run() converts the image to grayscale once, measures
+quality (blur, contrast, noise, inversion, uneven lighting, screenshot-like
+flat colours) on a downscaled copy, and then runs only the stages the
+measurements call for:
+
+    white_background -> deblur -> denoise -> normalize_light -> sharpen
+    -> threshold -> invert
+
+Clean digital screenshots take a fast path (global Otsu threshold on the
+grayscale image) instead. Every run returns a report with the metrics, the
+path taken, the stages skipped and the time spent per stage.
+"""
+
+import time
+from typing import Any, Dict
+
+import cv2
+import numpy as np
+
+import log as Log
+from config import config
+
+METRICS_MAX_SIDE = 800  # quality is measured on a copy this size
+
+# Immerkaer's noise estimation kernel
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+_SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+
+
+def _to_bgr(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2 or img.shape[2] == 1:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
+
+def measure_quality(gray: np.ndarray) -> Dict[str, float]:
+    """
+    Quality metrics computed on a downscaled copy of a grayscale image.
+
+    Args:
+        gray: Grayscale image (full resolution)
+
+    Returns:
+        Dictionary with blur, contrast, noise, dark_background,
+        background_unevenness and flat_colour_share
+    """
+    h, w = gray.shape
+    factor = min(1.0, METRICS_MAX_SIDE / max(h, w))
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+
+    sh, sw = small.shape
+    noise = 0.0
+    if sh > 2 and sw > 2:
+        # Immerkaer's estimate, with the median instead of the mean so that
+        # text edges do not count as noise
+        response = cv2.filter2D(small.astype(np.float32), -1, _NOISE_KERNEL)[1:-1, 1:-1]
+        noise = float(np.median(np.abs(response)) / 0.6745 / 6)
+        # Area downscaling averages the noise away; report it at full resolution
+        noise /= factor
+
+    hist = np.bincount(small.ravel(), minlength=256)
+    dark_background = bool(np.median(small) < 110)
+    # Background estimate: a large closing removes (dark) text, the blur removes texture
+    light_background = cv2.bitwise_not(small) if dark_background else small
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    background = cv2.blur(cv2.morphologyEx(light_background, cv2.MORPH_CLOSE, kernel), (31, 31))
+
+    return {
+        "blur": float(cv2.Laplacian(small, cv2.CV_64F).var()),
+        "contrast": float(int(small.max()) - int(small.min())),
+        "noise": round(noise, 2),
+        "dark_background": dark_background,
+        "background_unevenness": round(float(background.std()), 2),
+        # Screenshots are mostly a few exact colours; photos and scans are not
+        "flat_colour_share": round(float(np.sort(hist)[-4:].sum()) / small.size, 3),
+    }
+
+
+class PreprocessPipeline:
+    """Measure once, then preprocess with only the stages that are needed."""
+
+    def __init__(self, check_quality: bool = True, debug: bool = False):
+        """
+        Args:
+            check_quality: Reject blurry, low-contrast or low-resolution images
+            debug: Save the intermediate images
+        """
+        self.check_quality = check_quality
+        self.debug = debug
+
+    def run(self, img: np.ndarray) -> Dict[str, Any]:
+        """
+        Validate and preprocess an image.
+
+        Args:
+            img: Input image (grayscale, BGR or BGRA)
+
+        Returns:
+            Dictionary with keys:
+                - valid (bool): False if the image was rejected
+                - message (str): Validation message
+                - image (np.ndarray or None): Binary image, black text on white
+                - report (dict): path, metrics, skipped stages, timings in ms
+        """
+        timings: Dict[str, float] = {}
+        skipped = []
+        started = time.perf_counter()
+
+        def lap(stage):
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = round((now - started) * 1000, 2)
+            started = now
+
+        bgr = _to_bgr(img)
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        lap("gray")
+
+        metrics = measure_quality(gray)
+        lap("metrics")
+
+        report = {"path": "full", "metrics": metrics, "skipped": skipped, "timings": timings}
+        result: Dict[str, Any] = {"valid": True, "message": "Image quality validated successfully",
+                                  "image": None, "report": report}
+
+        blurry = metrics["blur"] < config.BLUR_THRESHOLD
+        if self.check_quality:
+            message = None
+            if blurry:
+                message = f"Image is too blurry (focus score = {metrics['blur']:.2f})"
+            elif metrics["contrast"] < config.LOW_CONTRAST_THRESHOLD:
+                message = "Image has low contrast - please provide a clearer image"
+            elif gray.shape[0] < config.MIN_RESOLUTION_HEIGHT:
+                message = (f"Image resolution too low (height: {gray.shape[0]}px) - "
+                           f"please upload a higher resolution image")
+            if message:
+                Log.log.warning(f"Image validation failed: {message}")
+                result.update(valid=False, message=message)
+                return result
+
+        _, otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        lap("otsu")
+
+        screenshot = (
+            metrics["flat_colour_share"] >= config.SCREENSHOT_FLAT_SHARE
+            and metrics["noise"] < config.DENOISE_NOISE_SIGMA
+            and metrics["background_unevenness"] < config.UNEVEN_LIGHT_STD
+            and not blurry
+        )
+        if screenshot:
+            # Flat, noise-free digital image: a global threshold is all it needs
+            report["path"] = "fast"
+            binary = otsu
+            skipped.extend(["white_background", "deblur", "denoise", "normalize_light", "sharpen"])
+        else:
+            # White background: everything Otsu calls background becomes pure white
+            gray = np.where(otsu == 255, np.uint8(255), gray)
+            lap("white_background")
+
+            if blurry:
+                gaussian = cv2.GaussianBlur(gray, (9, 9), 10.0)
+                gray = cv2.addWeighted(gray, 1.5, gaussian, -0.5, 0)
+                lap("deblur")
+            else:
+                skipped.append("deblur")
+
+            if metrics["noise"] >= config.DENOISE_NOISE_SIGMA:
+                gray = cv2.fastNlMeansDenoising(gray, h=30)
+                lap("denoise")
+            else:
+                skipped.append("denoise")
+
+            if metrics["background_unevenness"] >= config.UNEVEN_LIGHT_STD:
+                kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+                background = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+                gray = cv2.divide(gray, background, scale=255)
+                lap("normalize_light")
+            else:
+                skipped.append("normalize_light")
+
+            gray = cv2.filter2D(gray, -1, _SHARPEN_KERNEL)
+            lap("sharpen")
+
+            binary = cv2.adaptiveThreshold(
+                gray, 255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY,
+                31, 15
+            )
+            lap("threshold")
+
+        # White text on dark background
+        if np.count_nonzero(binary) < binary.size / 2:
+            binary = cv2.bitwise_not(binary)
+            lap("invert")
+            Log.log.info("Inverted image (white text on dark background detected)")
+        else:
+            skipped.append("invert")
+
+        if self.debug:
+            cv2.imwrite("debug_1_gray.png", gray)
+            cv2.imwrite("debug_4_thresh.png", binary)
+            Log.log.info("Debug images saved")
+
+        report["total_ms"] = round(sum(timings.values()), 2)
+        result["image"] = binary
+        return result
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """One-line summary of a pipeline report for the log."""
+    stages = ", ".join(f"{stage} {ms}ms" for stage, ms in report["timings"].items())
+    skipped = f"; skipped {', '.join(report['skipped'])}" if report["skipped"] else ""
+    return f"Preprocess ({report['path']} path, {report.get('total_ms', 0)}ms): {stages}{skipped}"
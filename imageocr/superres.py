@@ -0,0 +1,174 @@
+"""
+Super-resolution engine for low-resolution images.
+
+The FSRCNN models are loaded once per process and reused. Upscaling is only
+applied when it helps OCR: when the estimated text height is below
+SR_TARGET_TEXT_HEIGHT, or (if no text height can be measured) when the
+image is shorter than MIN_RESOLUTION_HEIGHT. The scale is 2x or 4x,
+whichever gets the text to the target height, and the output may not exceed
+SR_MAX_OUTPUT_PIXELS. The image is processed in SR_TILE_SIZE tiles (with a
+small overlap so there are no seams), so the model never sees more than one
+tile at a time. Every call returns a report with the decision, the latency
+and the peak size of the image buffers.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import log as Log
+from config import config
+
+TILE_OVERLAP = 8            # pixels of context on each side of a tile
+MEASURE_MAX_SIDE = 1000     # text height is measured on a copy this size
+
+
+def estimate_text_height(img: np.ndarray) -> Optional[float]:
+    """
+    Median height in pixels of character-sized connected components.
+
+    Args:
+        img: Grayscale or BGR image
+
+    Returns:
+        Estimated text height, or None if no text-like components were found
+    """
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    factor = min(1.0, MEASURE_MAX_SIDE / max(h, w))
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) > binary.size / 2:  # light text on dark background
+        binary = cv2.bitwise_not(binary)
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    sh, sw = small.shape
+    # Drop specks, lines, boxes and blobs that are not characters
+    glyphs = (heights >= 2) & (heights < sh * 0.2) & (widths < sw * 0.2) & (areas >= 3) & (widths < heights * 4)
+    if np.count_nonzero(glyphs) < 5:
+        return None
+    return float(np.median(heights[glyphs])) / factor
+
+
+class SuperResolver:
+    """Per-process FSRCNN models with gated, tiled upscaling."""
+
+    def __init__(self):
+        self._models: Dict[int, Any] = {}
+
+    def model_path(self, scale: int) -> str:
+        return config.SUPER_RES_MODEL_X2 if scale == 2 else config.SUPER_RES_MODEL
+
+    def _model(self, scale: int):
+        """The loaded model for a scale, or None if its file is missing."""
+        if scale not in self._models:
+            path = self.model_path(scale)
+            if not os.path.exists(path):
+                Log.log.warning(f"Super-resolution model not found at {path}, using bicubic {scale}x")
+                self._models[scale] = None
+            else:
+                sr = cv2.dnn_superres.DnnSuperResImpl_create()
+                sr.readModel(path)
+                sr.setModel("fsrcnn", scale)
+                self._models[scale] = sr
+                Log.log.info(f"Loaded super-resolution model {path}")
+        return self._models[scale]
+
+    def choose_scale(self, img: np.ndarray) -> Tuple[int, str, Optional[float]]:
+        """
+        Decide whether and how much to upscale.
+
+        Args:
+            img: Input image
+
+        Returns:
+            Tuple of (scale: 1, 2 or 4, reason: str, text_height: float or None)
+        """
+        h, w = img.shape[:2]
+        text_height = estimate_text_height(img)
+        if text_height is not None:
+            need = config.SR_TARGET_TEXT_HEIGHT / text_height
+            reason = f"text height {text_height:.1f}px"
+        else:
+            need = config.MIN_RESOLUTION_HEIGHT / h
+            reason = f"image height {h}px"
+
+        if need <= 1.25:
+            return 1, reason + " is large enough", text_height
+        scale = 2 if need <= 2.5 else 4
+        while scale > 1 and h * w * scale * scale > config.SR_MAX_OUTPUT_PIXELS:
+            scale //= 2
+        if scale == 1:
+            return 1, reason + ", but upscaling would exceed SR_MAX_OUTPUT_PIXELS", text_height
+        return scale, reason, text_height
+
+    def upscale(self, img: np.ndarray, scale: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Upscale tile by tile into one preallocated output image.
+
+        Args:
+            img: Input image (grayscale or BGR)
+            scale: 2 or 4
+
+        Returns:
+            Tuple of (upscaled image, stats with tiles and peak_bytes)
+        """
+        model = self._model(scale)
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        h, w = img.shape[:2]
+        out = np.empty((h * scale, w * scale, img.shape[2]), dtype=img.dtype)
+        tile = config.SR_TILE_SIZE
+        tiles = 0
+        largest_tile = 0
+
+        for y0 in range(0, h, tile):
+            for x0 in range(0, w, tile):
+                y1, x1 = min(y0 + tile, h), min(x0 + tile, w)
+                # Upscale the tile with some context around it, then keep the middle
+                ys, xs = max(0, y0 - TILE_OVERLAP), max(0, x0 - TILE_OVERLAP)
+                ye, xe = min(h, y1 + TILE_OVERLAP), min(w, x1 + TILE_OVERLAP)
+                patch = img[ys:ye, xs:xe]
+                if model is not None:
+                    up = model.upsample(patch)
+                else:
+                    up = cv2.resize(patch, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+                top, left = (y0 - ys) * scale, (x0 - xs) * scale
+                out[y0 * scale:y1 * scale, x0 * scale:x1 * scale] = \
+                    up[top:top + (y1 - y0) * scale, left:left + (x1 - x0) * scale]
+                tiles += 1
+                largest_tile = max(largest_tile, patch.nbytes + up.nbytes)
+
+        return out, {"tiles": tiles, "peak_bytes": img.nbytes + out.nbytes + largest_tile}
+
+    def run(self, img: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Upscale img if needed.
+
+        Args:
+            img: Input image
+
+        Returns:
+            Tuple of (image, report) where report has scale, reason,
+            text_height, tiles, peak_mb and latency_ms
+        """
+        started = time.perf_counter()
+        scale, reason, text_height = self.choose_scale(img)
+        report = {"scale": scale, "reason": reason, "text_height": text_height,
+                  "tiles": 0, "peak_mb": round(img.nbytes / 2 ** 20, 1)}
+        if scale > 1:
+            img, stats = self.upscale(img, scale)
+            report["tiles"] = stats["tiles"]
+            report["peak_mb"] = round(stats["peak_bytes"] / 2 ** 20, 1)
+        report["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return img, report
+
+
+engine = SuperResolver()
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from typing import List
+from typing import Any, Dict, List
 
 import log as Log
-from utils import extract_keywords, extract_text
+from utils import extract_keywords, extract_texts, get_progress
 from openai_client import getOpenai, call_openai_chat
 
 router = APIRouter()
@@ -12,33 +12,48 @@ router = APIRouter()
 @router.post("/upload")
 async def upload_and_ask(files: List[UploadFile] = File(...), question: str = Form(...)):
     Log.log.info("Upload endpoint hit")
+
+    # Images are OCR'd in batches; every file gets a dict: success, message, text
+    results = await extract_texts(files)
+
+    answer = await answer_question([file.filename for file in files], results, question)
+    return JSONResponse({"answer": answer})
+
+
+async def answer_question(filenames: List[str], results: List[Dict[str, Any]], question: str) -> str:
+    """
+    Answer a question about extracted documents with the LLM.
+
+    Args:
+        filenames: Name of each file
+        results: extract_texts() result (success, message, text) per file
+        question: User question
+
+    Returns:
+        The answer, or the reasons extraction failed if no file was readable
+
+    Raises:
+        llm_gateway.GatewayOverloaded: If the LLM call cannot be admitted
+    """
     all_text_str = ""
     all_text_list = []
 
     readable_files = []
     failed_files = []
 
-    for file in files:
-        try:
-            result = await extract_text(file)  # returns dict: success, message, text
-        except Exception as e:
-            Log.log.error(f"Failed to extract text from {file.filename}: {e}")
-            failed_files.append({"filename": file.filename, "reason": str(e)})
-            continue
-
+    for filename, result in zip(filenames, results):
         if not result["success"]:
-            failed_files.append({"filename": file.filename, "reason": result["message"]})
-            all_text_list.append({"filename": file.filename, "text": result["message"], "valid": False})
+            failed_files.append({"filename": filename, "reason": result["message"]})
+            all_text_list.append({"filename": filename, "text": result["message"], "valid": False})
             continue
 
         # OCR succeeded
         readable_files.append(result["text"])
-        all_text_list.append({"filename": file.filename, "text": result["text"], "valid": True})
+        all_text_list.append({"filename": filename, "text": result["text"], "valid": True})
 
-    # If all files failed, return JSON immediately
+    # If all files failed, there is nothing to ask about
     if not readable_files:
-        message = "Details: " + ", ".join([f"{f['filename']} ({f['reason']})" for f in failed_files])
-        return JSONResponse({"answer": message})
+        return "Details: " + ", ".join([f"{f['filename']} ({f['reason']})" for f in failed_files])
 
     # Combine readable OCR text for GPT
     all_text_str = "\n\n".join(readable_files)
@@ -138,8 +153,13 @@ The candidate has the following skills: Python and Java.
     clean_answer = "\n".join(lines)
 
     Log.log.info(f"Answer generated: {clean_answer}")
-    return JSONResponse({"answer": clean_answer})
-
-
+    return clean_answer
 
 
+@router.get("/progress/{doc_hash}")
+async def extraction_progress(doc_hash: str):
+    """Pages (PDF) or ranges (video) done so far; doc_hash is the MD5 of the file."""
+    entry = get_progress(doc_hash)
+    if entry is None:
+        return JSONResponse(status_code=404, content={"message": "No extraction found for this document"})
+    return JSONResponse(entry)
@@ -5,7 +5,6 @@ Supports images, videos, PDFs, DOCX, Excel, CSV, and TXT files.
 
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_bytes
 from docx import Document
 import pandas as pd
 import io
@@ -15,22 +14,28 @@ import os
 import json
 import hashlib
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from datetime import datetime, timedelta
 
 from nltk.corpus import stopwords
-from PyPDF2 import PdfReader
-import cv2
 import numpy as np
 import asyncio
+import pymupdf
+import threading
+import time
 
 import log as Log
+import ocr_pool
 from config import config
-from image import run_paddle_ocr, run_tesseract_on_low_conf
+from image import NO_TEXT_DETECTED, NO_VALID_TEXT, run_paddle_ocr_batch, run_tesseract_on_low_conf
+import video
 
-# --- Configure Tesseract and Poppler ---
+IMAGE_EXTS = {"png", "jpg", "jpeg", "tiff", "bmp", "gif", "webp"}
+VIDEO_EXTS = {"mp4", "avi", "mov", "mkv"}
+TEXT_EXTS = {"txt", "csv"}
+
+# --- Configure Tesseract ---
 TESSERACT_PATH = config.TESSERACT_PATH
-POPPLER_PATH = config.POPPLER_PATH
 
 if not os.path.exists(TESSERACT_PATH):
     Log.log.warning(f"Tesseract not found at {TESSERACT_PATH}")
@@ -61,6 +66,8 @@ class FileCache:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.index_file = self.cache_dir / "cache_index.json"
         self._index = self._load_index()
+        # set_many() may run in a thread while the event loop reads the index
+        self._lock = threading.Lock()
 
     def _load_index(self) -> Dict[str, Any]:
         """Load cache index from disk."""
@@ -73,10 +80,12 @@ class FileCache:
         return {}
 
     def _save_index(self):
-        """Save cache index to disk."""
+        """Save cache index to disk (call with the lock held)."""
         try:
-            with open(self.index_file, 'w') as f:
+            tmp_file = self.index_file.with_suffix(".tmp")
+            with open(tmp_file, 'w') as f:
                 json.dump(self._index, f, indent=2)
+            os.replace(tmp_file, self.index_file)
         except Exception as e:
             Log.log.error(f"Failed to save cache index: {e}")
 
@@ -113,6 +122,40 @@ class FileCache:
                 return None
         return None
 
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Retrieve several values, removing expired entries with one index write.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Cache key -> value, for the keys that are cached
+        """
+        found, expired = {}, []
+        with self._lock:
+            entries = {key: self._index[key] for key in keys if key in self._index}
+        for key, entry in entries.items():
+            if self._is_expired(entry['timestamp']):
+                expired.append(key)
+                continue
+            cache_file = self.cache_dir / f"{key}.txt"
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    found[key] = f.read()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                Log.log.error(f"Failed to read cache file: {e}")
+        if expired:
+            for key in expired:
+                (self.cache_dir / f"{key}.txt").unlink(missing_ok=True)
+            with self._lock:
+                for key in expired:
+                    self._index.pop(key, None)
+                self._save_index()
+        return found
+
     def set(self, key: str, value: str):
         """
         Store value in cache.
@@ -121,18 +164,31 @@ class FileCache:
             key: Cache key
             value: Value to cache
         """
-        cache_file = self.cache_dir / f"{key}.txt"
-        try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                f.write(value)
+        self.set_many({key: value})
 
-            self._index[key] = {
-                'timestamp': datetime.now().timestamp(),
-                'file': str(cache_file)
-            }
-            self._save_index()
-        except Exception as e:
-            Log.log.error(f"Failed to write to cache: {e}")
+    def set_many(self, items: Dict[str, str]):
+        """
+        Store several values, writing the index once.
+
+        Args:
+            items: Cache key -> value
+        """
+        entries = {}
+        for key, value in items.items():
+            cache_file = self.cache_dir / f"{key}.txt"
+            try:
+                with open(cache_file, 'w', encoding='utf-8') as f:
+                    f.write(value)
+                entries[key] = {
+                    'timestamp': datetime.now().timestamp(),
+                    'file': str(cache_file)
+                }
+            except Exception as e:
+                Log.log.error(f"Failed to write to cache: {e}")
+        if entries:
+            with self._lock:
+                self._index.update(entries)
+                self._save_index()
 
     def delete(self, key: str):
         """
@@ -149,13 +205,14 @@ class FileCache:
                 except Exception as e:
                     Log.log.error(f"Failed to delete cache file: {e}")
 
-            del self._index[key]
-            self._save_index()
+            with self._lock:
+                self._index.pop(key, None)
+                self._save_index()
 
     def clear_expired(self):
         """Remove all expired cache entries."""
         expired_keys = [
-            key for key, entry in self._index.items()
+            key for key, entry in list(self._index.items())
             if self._is_expired(entry['timestamp'])
         ]
         for key in expired_keys:
@@ -167,6 +224,11 @@ class FileCache:
 ocr_cache = FileCache() if config.ENABLE_CACHE else {}
 
 
+def file_extension(filename: str) -> str:
+    """Lower-case extension of a filename, without the dot."""
+    return filename.split(".")[-1].lower()
+
+
 def get_image_hash(content: bytes) -> str:
     """
     Generate a unique hash for file content.
@@ -180,6 +242,68 @@ def get_image_hash(content: bytes) -> str:
     return hashlib.md5(content).hexdigest()
 
 
+# --- Page checkpoints & progress (PDF pages, video ranges) ---
+PROGRESS_KEEP_SEC = 3600  # finished entries stay queryable this long
+progress: Dict[str, Dict[str, Any]] = {}
+
+
+def checkpoint_key(doc_hash: str, index: int) -> str:
+    """Cache key of one page (PDF) or range (video) of a document."""
+    return f"{doc_hash}_p{index}_v{config.OCR_PIPELINE_VERSION}"
+
+
+def load_checkpoints(doc_hash: str, indices: List[int]) -> Dict[int, str]:
+    """Checkpoints of several pages/ranges at once (blocking; call with asyncio.to_thread)."""
+    if not config.ENABLE_CACHE:
+        return {}
+    keys = {checkpoint_key(doc_hash, index): index for index in indices}
+    return {keys[key]: value for key, value in ocr_cache.get_many(list(keys)).items()}
+
+
+def save_checkpoint(doc_hash: str, index: int, value: str):
+    if config.ENABLE_CACHE:
+        ocr_cache.set(checkpoint_key(doc_hash, index), value)
+
+
+def start_progress(doc_hash: str, kind: str, total: int, done: int = 0):
+    """Begin tracking a document; drops entries that finished long ago."""
+    now = time.time()
+    for key in [k for k, v in progress.items() if v["status"] != "running" and now - v["updated"] > PROGRESS_KEEP_SEC]:
+        del progress[key]
+    progress[doc_hash] = {"doc_hash": doc_hash, "type": kind, "status": "running",
+                          "total": total, "done": done, "resumed": done, "updated": now}
+
+
+def advance_progress(doc_hash: str, count: int = 1):
+    entry = progress.get(doc_hash)
+    if entry:
+        entry["done"] += count
+        entry["updated"] = time.time()
+
+
+def finish_progress(doc_hash: str, status: str = "done"):
+    entry = progress.get(doc_hash)
+    if entry:
+        entry["status"] = status
+        entry["updated"] = time.time()
+
+
+def get_progress(doc_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Progress of a PDF or video extraction in this process.
+
+    Args:
+        doc_hash: MD5 of the file content
+
+    Returns:
+        Dictionary with doc_hash, type, status (running, done or failed),
+        total and done (pages or video ranges), resumed (units restored
+        from checkpoints) and updated (Unix time), or None if unknown
+    """
+    entry = progress.get(doc_hash)
+    return dict(entry) if entry else None
+
+
 def extract_keywords(text: str, top_n: int = None) -> str:
     """
     Extract keywords from text using RAKE algorithm.
@@ -205,221 +329,560 @@ def extract_keywords(text: str, top_n: int = None) -> str:
         return ""
 
 
-def enhance_and_correct_image(image: np.ndarray) -> np.ndarray:
+async def extract_text(file) -> Dict[str, Any]:
     """
-    Enhance image quality for better OCR results.
+    Extract text from various file formats asynchronously.
+
+    The work itself runs in the OCR process pool so the event loop stays
+    free; image results are cached by content hash in this process.
 
     Args:
-        image: Input image as numpy array
+        file: UploadFile object with filename and read() method
 
     Returns:
-        Enhanced image
+        Dictionary with keys:
+            - success (bool): Whether extraction succeeded
+            - message (str): Status/error message
+            - text (str): Extracted text
+
+    Raises:
+        PoolBusy: If the OCR queue is full
     """
-    try:
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+    ext = file_extension(file.filename)
+    content = await file.read()
 
-        # Auto-rotate if needed
-        h, w = gray.shape
-        if w > h:
-            gray = cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE)
+    # Plain text is cheap to decode; no need for a worker
+    if ext in TEXT_EXTS:
+        return extract_from_bytes(content, file.filename)
+
+    # PDF pages and video ranges are spread over the pool and checkpointed
+    if ext == "pdf":
+        return await extract_pdf(content)
+    if ext in VIDEO_EXTS:
+        return await extract_video(content, ext)
+
+    image_hash = None
+    if ext in IMAGE_EXTS and config.ENABLE_CACHE:
+        image_hash = get_image_hash(content)
+        cached_text = (await asyncio.to_thread(ocr_cache.get_many, [image_hash])).get(image_hash)
+        if cached_text:
+            Log.log.info(f"OCR cache hit for image hash {image_hash}")
+            return {
+                "success": True,
+                "message": "Text extracted from cache",
+                "text": cached_text
+            }
 
-        # Resize for better OCR
-        resized = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    result = await ocr_pool.pool.submit(extract_from_bytes, content, file.filename)
 
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(resized, h=30)
+    if image_hash and result["success"]:
+        await asyncio.to_thread(ocr_cache.set_many, {image_hash: result["text"]})
+    return result
 
-        # Sharpen
-        kernel = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
-        sharpened = cv2.filter2D(denoised, -1, kernel)
 
-        # Histogram equalization
-        equalized = cv2.equalizeHist(sharpened)
+def refine_paddle_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a PaddleOCR result into final text: Tesseract refinement of
+    low-confidence lines, then line deduplication.
 
-        # Adaptive thresholding
-        binarized = cv2.adaptiveThreshold(
-            equalized, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            blockSize=11, C=2
-        )
+    Args:
+        result: One result dict from run_paddle_ocr / run_paddle_ocr_batch
 
-        return binarized
-    except Exception as e:
-        Log.log.error(f"Image enhancement failed: {e}")
-        return image
+    Returns:
+        Dictionary with keys success, message, text
+    """
+    if not result["success"]:
+        return {"success": False, "message": result["message"], "text": ""}
 
+    paddle_lines = result["lines"]
 
-async def extract_text(file) -> Dict[str, Any]:
+    # Refine with Tesseract
+    result1 = run_tesseract_on_low_conf(paddle_lines)
+    if not result1["success"]:
+        return {"success": False, "message": result1["message"], "text": ""}
+
+    tesseract_text = result1["lines"]
+
+    # Deduplicate lines
+    seen = set()
+    final_lines = []
+    for line in tesseract_text.splitlines():
+        clean_line = line.strip()
+        if clean_line and clean_line not in seen:
+            final_lines.append(clean_line)
+            seen.add(clean_line)
+
+    final_text = "\n".join(final_lines)
+
+    return {
+        "success": True,
+        "message": "Text extracted successfully",
+        "text": final_text
+    }
+
+
+def extract_images(contents: List[bytes]) -> List[Dict[str, Any]]:
     """
-    Extract text from various file formats asynchronously.
+    OCR several images in one batched PaddleOCR pass. CPU-bound; runs in an
+    OCR worker process when called through extract_texts().
 
     Args:
-        file: UploadFile object with filename and read() method
+        contents: Image files as bytes
+
+    Returns:
+        One dictionary (success, message, text) per image, in input order
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(contents)
+    images, positions = [], []
+
+    # Convert bytes to images
+    for idx, content in enumerate(contents):
+        try:
+            image = Image.open(io.BytesIO(content)).convert("RGB")
+            images.append(np.array(image))
+            positions.append(idx)
+        except Exception as e:
+            Log.log.error(f"Failed to load image: {e}")
+            results[idx] = {
+                "success": False,
+                "message": f"Invalid image file: {str(e)}",
+                "text": ""
+            }
+
+    # Run PaddleOCR on all images together, then refine each with Tesseract
+    for idx, paddle_result in zip(positions, run_paddle_ocr_batch(images, debug=False)):
+        try:
+            results[idx] = refine_paddle_result(paddle_result)
+        except Exception as e:
+            Log.log.error(f"Image OCR failed: {e}", exc_info=True)
+            results[idx] = {"success": False, "message": f"Unexpected error: {str(e)}", "text": ""}
+    return results
+
+
+def pdf_page_hash(doc: pymupdf.Document, page: pymupdf.Page) -> str:
+    """
+    Hash of what a PDF page draws: its content stream, the raw data of the
+    images it uses, its size and rotation, the render DPI and the pipeline
+    version. The same scanned page gets the same hash in any document.
+
+    Args:
+        doc: Open document
+        page: Page of doc
+
+    Returns:
+        MD5 hex digest
+    """
+    digest = hashlib.md5(f"pdf-page:{config.OCR_PIPELINE_VERSION}:{config.PDF_RENDER_DPI}:"
+                         f"{tuple(page.rect)}:{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for xref in sorted({image[0] for image in page.get_images(full=True)}):
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    return digest.hexdigest()
+
+
+def plan_pdf(content: bytes) -> Dict[str, Any]:
+    """
+    Read the text layer of every PDF page and list the pages that need OCR.
+
+    Args:
+        content: PDF file content as bytes
 
     Returns:
         Dictionary with keys:
-            - success (bool): Whether extraction succeeded
-            - message (str): Status/error message
-            - text (str): Extracted text
+            - texts (list): Text layer per page, None for pages to OCR
+            - ocr_pages (list): Indices of pages without a usable text layer
+            - hashes (dict): pdf_page_hash() per page to OCR
     """
-    ext = file.filename.split(".")[-1].lower()
-    content = await file.read()
-    text = ""
+    texts: List[Optional[str]] = []
+    ocr_pages, hashes = [], {}
+    with pymupdf.open(stream=content, filetype="pdf") as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text().strip()
+            if len(text) >= config.PDF_MIN_TEXT_CHARS:
+                texts.append(text)
+            else:
+                texts.append(None)
+                ocr_pages.append(index)
+                hashes[index] = pdf_page_hash(doc, page)
+    return {"texts": texts, "ocr_pages": ocr_pages, "hashes": hashes}
+
+
+def render_pdf_page(page: pymupdf.Page) -> np.ndarray:
+    """Rasterize a page at PDF_RENDER_DPI into an RGB array."""
+    pix = page.get_pixmap(dpi=config.PDF_RENDER_DPI, colorspace=pymupdf.csRGB, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+
+def ocr_pdf_pages(content: bytes, indices: List[int]) -> List[Optional[str]]:
+    """
+    Rasterize and OCR some pages of a PDF. CPU-bound; runs in an OCR worker
+    process when called through extract_pdf().
 
-    image_exts = ["png", "jpg", "jpeg", "tiff", "bmp", "gif", "webp"]
-    video_exts = ["mp4", "avi", "mov", "mkv"]
+    Args:
+        content: PDF file content as bytes
+        indices: Page indices to OCR
 
+    Returns:
+        OCR text per page, in the order of indices: "" for a page without
+        text, None for a page whose OCR failed
+    """
+    with pymupdf.open(stream=content, filetype="pdf") as doc:
+        pages = [render_pdf_page(doc[index]) for index in indices]
+    texts: List[Optional[str]] = []
+    # Recognize the lines of all pages together
+    for index, page_result in zip(indices, run_paddle_ocr_batch(pages, use_superres=False, check_quality=False)):
+        if not page_result["success"] and page_result["message"] in (NO_TEXT_DETECTED, NO_VALID_TEXT):
+            texts.append("")
+            continue
+        page = refine_paddle_result(page_result)
+        if not page["success"]:
+            Log.log.warning(f"OCR failed for PDF page {index + 1}: {page['message']}")
+            texts.append(None)
+            continue
+        texts.append(page["text"])
+    return texts
+
+
+def join_pdf_pages(texts: List[Optional[str]]) -> str:
+    return "\n".join(text for text in texts if text and text.strip())
+
+
+async def extract_pdf(content: bytes) -> Dict[str, Any]:
+    """
+    Extract text from a PDF using the OCR pool.
+
+    Pages with a text layer are read directly. The other pages are OCR'd in
+    batches of PDF_BATCH_SIZE, at most OCR_WORKERS batches at a time, and
+    put back in page order. Each OCR'd page is checkpointed under (document
+    hash, page index, OCR_PIPELINE_VERSION) as soon as its batch finishes,
+    so a retried request resumes where the last one stopped; progress is
+    available from get_progress() meanwhile. Pages are also cached by page
+    hash, so a page seen before (in another document, or repeated in this
+    one) is not OCR'd again.
+
+    Args:
+        content: PDF file content as bytes
+
+    Returns:
+        Dictionary with keys success, message, text
+
+    Raises:
+        PoolBusy: If the OCR queue is full
+    """
+    doc_hash = get_image_hash(content)
     try:
-        # ----- IMAGE OCR -----
-        if ext in image_exts:
-            # Compute hash for caching
-            image_hash = get_image_hash(content)
-
-            # Check cache
-            if config.ENABLE_CACHE:
-                cached_text = ocr_cache.get(image_hash)
-                if cached_text:
-                    Log.log.info(f"OCR cache hit for image hash {image_hash}")
-                    return {
-                        "success": True,
-                        "message": "Text extracted from cache",
-                        "text": cached_text
-                    }
+        plan = await ocr_pool.pool.submit(plan_pdf, content)
+    except ocr_pool.PoolBusy:
+        raise
+    except Exception as e:
+        Log.log.error(f"PDF extraction failed: {e}")
+        return {"success": False, "message": f"PDF processing error: {str(e)}", "text": ""}
+
+    texts = plan["texts"]
+    hashes = plan["hashes"]
+    duplicates: Dict[str, List[int]] = {}  # page hash -> every page index with it
+    pending = []
+    for index in plan["ocr_pages"]:
+        page_hash = hashes[index]
+        if page_hash in duplicates:
+            duplicates[page_hash].append(index)
+        else:
+            duplicates[page_hash] = [index]
+    # Checkpoints and page cache are looked up in one pass, off the event loop
+    unique_pages = [indices[0] for indices in duplicates.values()]
+    checkpoints = await asyncio.to_thread(load_checkpoints, doc_hash, unique_pages)
+    page_cache = {}
+    if config.ENABLE_CACHE:
+        page_cache = await asyncio.to_thread(
+            ocr_cache.get_many, [hashes[index] for index in unique_pages if index not in checkpoints])
+    for index in unique_pages:
+        cached_text = checkpoints.get(index, page_cache.get(hashes[index]))
+        if cached_text is not None:
+            texts[index] = cached_text
+        else:
+            pending.append(index)
+    cached = len(duplicates) - len(pending)
+    failed = 0
+    start_progress(doc_hash, "pdf", total=len(texts), done=len(texts) - len(pending))
+
+    # One document may not fill the whole queue on its own
+    slots = asyncio.Semaphore(config.OCR_WORKERS)
 
-            # Convert bytes to image
+    async def run_pages(indices):
+        nonlocal failed
+        async with slots:
             try:
-                image = Image.open(io.BytesIO(content)).convert("RGB")
-                img_np = np.array(image)
+                page_texts = await ocr_pool.pool.submit(ocr_pdf_pages, content, indices)
+            except ocr_pool.PoolBusy:
+                raise
             except Exception as e:
-                Log.log.error(f"Failed to load image: {e}")
-                return {
-                    "success": False,
-                    "message": f"Invalid image file: {str(e)}",
-                    "text": ""
-                }
+                Log.log.error(f"OCR failed for PDF pages {indices[0] + 1}-{indices[-1] + 1}: {e}")
+                failed += len(indices)
+                return
+        entries = {}
+        done = 0
+        for index, text in zip(indices, page_texts):
+            if text is None:
+                # Not cached or checkpointed, so the next request tries it again
+                failed += 1
+                continue
+            texts[index] = text
+            entries[checkpoint_key(doc_hash, index)] = text
+            entries[hashes[index]] = text
+            done += 1
+        if entries and config.ENABLE_CACHE:
+            # One index write per batch, off the event loop
+            await asyncio.to_thread(ocr_cache.set_many, entries)
+        advance_progress(doc_hash, done)
+
+    batch_size = config.PDF_BATCH_SIZE
+    tasks = [asyncio.ensure_future(run_pages(pending[start:start + batch_size]))
+             for start in range(0, len(pending), batch_size)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # PoolBusy or a cancelled request: checkpoints so far are kept
+        for task in tasks:
+            task.cancel()
+        finish_progress(doc_hash, "failed")
+        raise
+    finish_progress(doc_hash, "failed" if failed else "done")
+
+    for indices in duplicates.values():
+        for index in indices[1:]:
+            texts[index] = texts[indices[0]]
+
+    message = f"Extracted text from {len(texts)} PDF pages ({len(pending) - failed} OCR'd, {cached} from cache)"
+    if failed:
+        message += f", OCR failed on {failed} pages"
+    Log.log.info(message)
+    return {"success": True, "message": message, "text": join_pdf_pages(texts)}
+
+
+async def extract_video(content: bytes, ext: str) -> Dict[str, Any]:
+    """
+    Extract text from a video using the OCR pool.
 
-            # Run PaddleOCR
-            result = run_paddle_ocr(img_np, debug=False)
-            if not result["success"]:
-                return {"success": False, "message": result["message"], "text": ""}
+    The video is split into ranges of VIDEO_CHUNK_SEC that are OCR'd in
+    parallel, at most OCR_WORKERS at a time. Each range's keyframe texts
+    are checkpointed under (document hash, range index,
+    OCR_PIPELINE_VERSION) as soon as it finishes, so a retried request only
+    OCRs the ranges that are missing. Lines are deduplicated across ranges
+    at the end.
 
-            paddle_lines = result["lines"]
+    Args:
+        content: Video file content as bytes
+        ext: File extension
 
-            # Refine with Tesseract
-            result1 = run_tesseract_on_low_conf(paddle_lines)
-            if not result1["success"]:
-                return {"success": False, "message": result1["message"], "text": ""}
+    Returns:
+        Dictionary with keys success, message, text, segments
 
-            tesseract_text = result1["lines"]
+    Raises:
+        PoolBusy: If the OCR queue is full
+    """
+    doc_hash = get_image_hash(content)
+    path = await asyncio.to_thread(video.write_temp_video, content, ext)
+    try:
+        try:
+            probe = await ocr_pool.pool.submit(video.probe_video, path)
+        except ocr_pool.PoolBusy:
+            raise
+        except Exception as e:
+            Log.log.error(f"Video OCR failed: {e}")
+            return {"success": False, "message": f"Video processing error: {str(e)}", "text": "", "segments": []}
+
+        ranges = probe["ranges"]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(ranges)
+        checkpoints = await asyncio.to_thread(load_checkpoints, doc_hash, list(range(len(ranges))))
+        for index, checkpoint in checkpoints.items():
+            checkpoint = json.loads(checkpoint)
+            # Ignore ranges checkpointed with a different VIDEO_CHUNK_SEC
+            if checkpoint.get("range") == ranges[index]:
+                results[index] = checkpoint
+        resumed = sum(result is not None for result in results)
+        start_progress(doc_hash, "video", total=len(ranges), done=resumed)
+
+        slots = asyncio.Semaphore(config.OCR_WORKERS)
+        errors = []
+
+        async def run_range(index):
+            async with slots:
+                try:
+                    result = await ocr_pool.pool.submit(video.ocr_video_range, path, *ranges[index])
+                except ocr_pool.PoolBusy:
+                    raise
+                except Exception as e:
+                    Log.log.error(f"Video OCR failed for range {index}: {e}")
+                    errors.append(str(e))
+                    return
+            result["range"] = ranges[index]
+            results[index] = result
+            await asyncio.to_thread(save_checkpoint, doc_hash, index, json.dumps(result))
+            advance_progress(doc_hash)
+
+        tasks = [asyncio.ensure_future(run_range(index)) for index, result in enumerate(results) if result is None]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # PoolBusy or a cancelled request: checkpoints so far are kept
+            for task in tasks:
+                task.cancel()
+            finish_progress(doc_hash, "failed")
+            raise
+        if errors:
+            # The ranges that finished are checkpointed; a retry only redoes the rest
+            finish_progress(doc_hash, "failed")
+            return {"success": False, "message": f"Video processing error: {errors[0]}", "text": "", "segments": []}
+        finish_progress(doc_hash)
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            Log.log.warning(f"Could not remove temporary video {path}: {e}")
 
-            # Deduplicate lines
-            seen = set()
-            final_lines = []
-            for line in tesseract_text.splitlines():
-                clean_line = line.strip()
-                if clean_line and clean_line not in seen:
-                    final_lines.append(clean_line)
-                    seen.add(clean_line)
+    frames = [frame for result in results for frame in result["frames"]]
+    result = video.build_video_result(frames, sum(r["sampled"] for r in results))
+    Log.log.info(f"Video OCR: {len(ranges)} ranges ({resumed} from checkpoints), {result['message']}")
+    return result
 
-            final_text = "\n".join(final_lines)
+async def extract_texts(files, on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+                        ) -> List[Dict[str, Any]]:
+    """
+    Extract text from all files of an upload.
 
-            # Cache result
-            if config.ENABLE_CACHE:
-                ocr_cache.set(image_hash, final_text)
+    Images that are not cached are OCR'd together, OCR_IMAGE_BATCH_SIZE per
+    worker job, so line recognition is batched across images; the jobs of
+    one upload run in parallel on the pool. Other files go through
+    extract_text().
 
-            return {
-                "success": True,
-                "message": "Text extracted successfully",
-                "text": final_text
-            }
+    Args:
+        files: UploadFile objects
+        on_result: Called with (file index, result) as soon as each file is done
 
-        # ----- VIDEO OCR -----
-        elif ext in video_exts:
-            temp_video_path = f"temp_video_{get_image_hash(content)}.{ext}"
-            try:
-                with open(temp_video_path, "wb") as f:
-                    f.write(content)
-
-                cap = cv2.VideoCapture(temp_video_path)
-                frame_texts = []
-                frame_interval = config.VIDEO_FRAME_INTERVAL_SEC
-                fps = cap.get(cv2.CAP_PROP_FPS) or 30
-                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                duration = frame_count / fps
-                current_time = 0
-
-                while cap.isOpened() and current_time < duration:
-                    cap.set(cv2.CAP_PROP_POS_MSEC, current_time * 1000)
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-
-                    enhanced_frame = enhance_and_correct_image(frame)
-                    frame_text = pytesseract.image_to_string(enhanced_frame, lang="eng")
-                    if frame_text.strip():
-                        frame_texts.append(frame_text)
-                    current_time += frame_interval
-
-                cap.release()
-                text = "\n\n".join(frame_texts)
+    Returns:
+        One dictionary (success, message, text) per file, in input order.
+        A file that failed unexpectedly gets success False and the error as message.
 
-                return {
-                    "success": True,
-                    "message": f"Extracted text from {len(frame_texts)} video frames",
-                    "text": text
-                }
+    Raises:
+        PoolBusy: If the OCR queue is full
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+    pending_images = []  # (index, content, hash)
 
-            except Exception as e:
-                Log.log.error(f"Video OCR failed: {e}")
-                return {
-                    "success": False,
-                    "message": f"Video processing error: {str(e)}",
-                    "text": ""
-                }
-            finally:
-                if os.path.exists(temp_video_path):
-                    os.remove(temp_video_path)
+    def finish(idx, result):
+        results[idx] = result
+        if on_result:
+            on_result(idx, result)
+
+    async def run_other(idx, file):
+        try:
+            result = await extract_text(file)
+        except ocr_pool.PoolBusy:
+            raise
+        except Exception as e:
+            Log.log.error(f"Failed to extract text from {file.filename}: {e}")
+            result = {"success": False, "message": str(e), "text": ""}
+        finish(idx, result)
+
+    async def run_images(batch):
+        try:
+            batch_results = await ocr_pool.pool.submit(extract_images, [content for _, content, _ in batch])
+        except ocr_pool.PoolBusy:
+            raise
+        except Exception as e:
+            Log.log.error(f"Batched image OCR failed: {e}")
+            batch_results = [{"success": False, "message": str(e), "text": ""}] * len(batch)
+        entries = {}
+        for (idx, _, image_hash), result in zip(batch, batch_results):
+            finish(idx, result)
+            if result["success"]:
+                entries[image_hash] = result["text"]
+        if entries and config.ENABLE_CACHE:
+            # One index write per batch, off the event loop
+            await asyncio.to_thread(ocr_cache.set_many, entries)
+
+    jobs = []
+    images = []  # (index, content, hash)
+    for idx, file in enumerate(files):
+        if file_extension(file.filename) not in IMAGE_EXTS:
+            jobs.append(run_other(idx, file))
+            continue
+        content = await file.read()
+        images.append((idx, content, get_image_hash(content)))
+
+    # All image cache lookups in one pass, off the event loop
+    cached = {}
+    if images and config.ENABLE_CACHE:
+        cached = await asyncio.to_thread(ocr_cache.get_many, [image_hash for _, _, image_hash in images])
+    for idx, content, image_hash in images:
+        cached_text = cached.get(image_hash)
+        if cached_text:
+            Log.log.info(f"OCR cache hit for image hash {image_hash}")
+            finish(idx, {"success": True, "message": "Text extracted from cache", "text": cached_text})
+        else:
+            pending_images.append((idx, content, image_hash))
+
+    batch_size = config.OCR_IMAGE_BATCH_SIZE
+    for start in range(0, len(pending_images), batch_size):
+        jobs.append(run_images(pending_images[start:start + batch_size]))
+
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    try:
+        await asyncio.gather(*tasks)
+    except ocr_pool.PoolBusy:
+        for task in tasks:
+            task.cancel()
+        raise
+    return results
+
+
+def extract_from_bytes(content: bytes, filename: str) -> Dict[str, Any]:
+    """
+    Extract text from file content. CPU-bound; runs in an OCR worker process
+    (see ocr_pool.py) when called through extract_text().
+
+    Args:
+        content: File content as bytes
+        filename: Original filename (used for the extension)
+
+    Returns:
+        Dictionary with keys:
+            - success (bool): Whether extraction succeeded
+            - message (str): Status/error message
+            - text (str): Extracted text
+    """
+    ext = file_extension(filename)
+    text = ""
+
+    try:
+        # ----- IMAGE OCR -----
+        if ext in IMAGE_EXTS:
+            return extract_images([content])[0]
+
+        # ----- VIDEO OCR -----
+        elif ext in VIDEO_EXTS:
+            return video.extract_video_text(content, ext)
 
         # ----- PDF -----
         elif ext == "pdf":
             try:
-                pdf_reader = PdfReader(io.BytesIO(content))
-                text = "\n".join([
-                    page.extract_text() or ""
-                    for page in pdf_reader.pages
-                ]).strip()
-
-                # If no text, use OCR on PDF images
-                if not text:
-                    batch_size = config.PDF_BATCH_SIZE
-                    total_pages = len(pdf_reader.pages)
-                    ocr_texts = []
-
-                    for i in range(0, total_pages, batch_size):
-                        images = convert_from_bytes(
-                            content,
-                            poppler_path=POPPLER_PATH,
-                            first_page=i + 1,
-                            last_page=min(i + batch_size, total_pages)
-                        )
-                        for img in images:
-                            img_np = np.array(img.convert("RGB"))
-                            processed = enhance_and_correct_image(img_np)
-                            page_text = pytesseract.image_to_string(processed, lang='eng')
-                            if page_text.strip():
-                                ocr_texts.append(page_text)
-
-                    text = "\n".join(ocr_texts)
-
+                plan = plan_pdf(content)
+                texts = plan["texts"]
+                ocr_pages = plan["ocr_pages"]
+                failed = 0
+                # PDF_BATCH_SIZE pages at a time, so only one batch of rendered pages is in memory
+                for start in range(0, len(ocr_pages), config.PDF_BATCH_SIZE):
+                    batch = ocr_pages[start:start + config.PDF_BATCH_SIZE]
+                    for index, text in zip(batch, ocr_pdf_pages(content, batch)):
+                        texts[index] = text
+                        failed += text is None
+                message = f"Extracted text from {len(texts)} PDF pages ({len(ocr_pages) - failed} OCR'd)"
+                if failed:
+                    message += f", OCR failed on {failed} pages"
                 return {
                     "success": True,
-                    "message": f"Extracted text from {len(pdf_reader.pages)} PDF pages",
-                    "text": text
+                    "message": message,
+                    "text": join_pdf_pages(texts)
                 }
 
             except Exception as e:
@@ -499,7 +962,7 @@ async def extract_text(file) -> Dict[str, Any]:
             }
 
     except Exception as e:
-        Log.log.error(f"Extraction error for {file.filename}: {str(e)}", exc_info=True)
+        Log.log.error(f"Extraction error for {filename}: {str(e)}", exc_info=True)
         return {
             "success": False,
             "message": f"Unexpected error: {str(e)}",
@@ -509,7 +972,8 @@ async def extract_text(file) -> Dict[str, Any]:
 
 def extract_text_sync(content: bytes, filename: str) -> str:
     """
-    Synchronous wrapper for extract_text function.
+    Synchronous version of extract_text for scripts. Runs in the calling
+    process (no worker pool, no cache).
 
     Args:
         content: File content as bytes
@@ -518,16 +982,7 @@ def extract_text_sync(content: bytes, filename: str) -> str:
     Returns:
         Extracted text string
     """
-    class DummyFile:
-        def __init__(self, content, filename):
-            self._content = content
-            self.filename = filename
-
-        async def read(self):
-            return self._content
-
-    dummy_file = DummyFile(content, filename)
-    result = asyncio.run(extract_text(dummy_file))
+    result = extract_from_bytes(content, filename)
     return result.get("text", "")
 
 
@@ -0,0 +1,334 @@
+"""
+Streaming, scene-change-aware video OCR.
+
+Frames are decoded in order, with one seek per range of VIDEO_CHUNK_SEC
+and none within it. Only every Nth frame is retrieved, with N set by
+VIDEO_FRAME_INTERVAL_SEC. A sampled frame becomes a keyframe only if it
+differs from the previous keyframe, by perceptual hash (dHash) distance or
+by the share of changed pixels. Keyframes are
+OCR'd on a thread pool while decoding continues. Their lines are
+deduplicated across the whole video and returned with the timestamp where
+they first appeared. Slide decks and screen recordings, where the picture
+rarely changes, therefore cost a handful of OCR calls instead of one per
+second.
+
+Ranges are separate jobs, so utils.extract_video() can run them in
+parallel and checkpoint each one as it finishes.
+"""
+
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from Levenshtein import ratio as lev_ratio
+
+import log as Log
+from config import config
+from image import tesseract_read_image
+
+HASH_SIZE = 16          # dHash grid (HASH_SIZE x HASH_SIZE bits)
+DIFF_WIDTH = 320        # frames are compared at this width (keeps a one-digit edit visible)
+PIXEL_CHANGE = 25       # grey-level change that counts a pixel as changed
+SIMILAR_LINE = 0.9      # Levenshtein ratio above which two lines are the same text
+SIMILAR_LENGTH = 0.1    # ...if their lengths differ by at most this share
+
+_SPACES = re.compile(r"\s+")
+_DIGIT = re.compile(r"\d")
+
+
+def sample_step(fps: float) -> int:
+    """Frames between two samples at VIDEO_FRAME_INTERVAL_SEC."""
+    return max(1, int(round(fps * config.VIDEO_FRAME_INTERVAL_SEC)))
+
+
+def iter_sampled_frames(path: str, first_frame: int = 0,
+                        last_frame: Optional[int] = None) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Decode a video sequentially and yield one frame per sample_step().
+
+    Args:
+        path: Video file path
+        first_frame: Frame to start at (a multiple of sample_step() keeps
+            samples aligned across ranges)
+        last_frame: Frame to stop before, or None for the end of the video
+
+    Yields:
+        Tuples of (timestamp in seconds, BGR frame)
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        step = sample_step(fps)
+        if first_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)  # one seek per range, then sequential
+        index = first_frame
+        # grab() only demuxes/decodes; retrieve() (colour conversion) runs for sampled frames only
+        while (last_frame is None or index < last_frame) and cap.grab():
+            if index % step == 0:
+                ok, frame = cap.retrieve()
+                if not ok:
+                    break
+                yield index / fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def frame_signature(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cheap description of a frame for change detection.
+
+    Args:
+        frame: BGR frame
+
+    Returns:
+        Tuple of (dHash bits, small grayscale copy)
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    small = cv2.resize(gray, (DIFF_WIDTH, max(1, DIFF_WIDTH * h // w)), interpolation=cv2.INTER_AREA)
+    grid = cv2.resize(small, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return grid[:, 1:] > grid[:, :-1], small
+
+
+def is_new_scene(previous: Tuple[np.ndarray, np.ndarray], current: Tuple[np.ndarray, np.ndarray]) -> bool:
+    """
+    Whether a frame differs enough from the last keyframe to be OCR'd.
+
+    Args:
+        previous: frame_signature() of the last keyframe
+        current: frame_signature() of the candidate frame
+
+    Returns:
+        True if the hash distance or the share of changed pixels is above threshold
+    """
+    distance = int(np.count_nonzero(previous[0] != current[0]))
+    if distance > config.VIDEO_HASH_THRESHOLD:
+        return True
+    # Small edits (a new bullet point, a scrolled line) barely move the hash
+    changed = np.count_nonzero(cv2.absdiff(previous[1], current[1]) > PIXEL_CHANGE)
+    return changed / current[1].size > config.VIDEO_CHANGE_FRACTION
+
+
+def preprocess_frame(frame: np.ndarray) -> np.ndarray:
+    """
+    Light preprocessing for video frames: grayscale, upscale small frames,
+    global threshold, dark text on white.
+
+    Args:
+        frame: BGR frame
+
+    Returns:
+        Binary image
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if gray.shape[0] < 720:
+        gray = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) < binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def _ocr_frame(frame: np.ndarray) -> str:
+    return tesseract_read_image(preprocess_frame(frame))
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _misread(line: str, other: str) -> bool:
+    """
+    Whether line is probably other read differently by OCR. Lines with
+    digits never match ("Page 3 of 10" -> "Page 4 of 10" is a real change),
+    nor do lines whose lengths differ by more than SIMILAR_LENGTH.
+    """
+    if _DIGIT.search(line) or _DIGIT.search(other):
+        return False
+    if abs(len(line) - len(other)) > SIMILAR_LENGTH * max(len(line), len(other)):
+        return False
+    return lev_ratio(line, other) >= SIMILAR_LINE
+
+
+def dedupe_lines(frames: List[Tuple[float, str]]) -> List[Dict[str, Any]]:
+    """
+    Keep each line once, at the first timestamp where it appeared.
+
+    Args:
+        frames: (timestamp, OCR text) per keyframe, in time order
+
+    Returns:
+        [{"time": seconds, "lines": [new lines]}] for keyframes that added text
+    """
+    seen = set()
+    previous_lines: List[str] = []
+    segments = []
+    for timestamp, text in frames:
+        new_lines, current = [], []
+        for line in text.splitlines():
+            line = _SPACES.sub(" ", line).strip()
+            if not line:
+                continue
+            current.append(line)
+            key = line.lower()
+            if key in seen:
+                continue
+            # The same line read slightly differently on the previous keyframe
+            if any(_misread(key, other.lower()) for other in previous_lines):
+                continue
+            seen.add(key)
+            new_lines.append(line)
+        previous_lines = current
+        if new_lines:
+            segments.append({"time": round(timestamp, 2), "lines": new_lines})
+    return segments
+
+
+def probe_video(path: str) -> Dict[str, Any]:
+    """
+    Frame rate and frame count of a video, split into ranges of about
+    VIDEO_CHUNK_SEC for ocr_video_range().
+
+    Args:
+        path: Video file path
+
+    Returns:
+        Dictionary with fps, frames and ranges ([first_frame, last_frame or None])
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("Could not open video")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+
+    step = sample_step(fps)
+    chunk = max(1, int(round(config.VIDEO_CHUNK_SEC * fps / step))) * step
+    ranges = [[first, first + chunk] for first in range(0, max(frames, 1), chunk)]
+    # The frame count is only an estimate for some containers; the last range runs to the end
+    ranges[-1][1] = None
+    return {"fps": fps, "frames": frames, "ranges": ranges}
+
+
+def ocr_video_range(path: str, first_frame: int = 0, last_frame: Optional[int] = None) -> Dict[str, Any]:
+    """
+    OCR the keyframes of part of a video. CPU-bound; runs in an OCR worker
+    process when called through utils.extract_video().
+
+    Args:
+        path: Video file path
+        first_frame: First frame of the range
+        last_frame: Frame to stop before, or None for the end of the video
+
+    Returns:
+        Dictionary with frames ([timestamp, text] per keyframe, in time
+        order) and sampled (number of frames sampled)
+    """
+    sampled = 0
+    done = 0
+    keyframes = []  # (timestamp, future)
+    last_signature = None
+    with ThreadPoolExecutor(max_workers=config.TESSERACT_THREADS, thread_name_prefix="video-ocr") as pool:
+        for timestamp, frame in iter_sampled_frames(path, first_frame, last_frame):
+            sampled += 1
+            signature = frame_signature(frame)
+            if last_signature is not None and not is_new_scene(last_signature, signature):
+                continue
+            last_signature = signature
+            keyframes.append((timestamp, pool.submit(_ocr_frame, frame)))
+            # Keep decoding ahead of OCR, but not with an unbounded backlog of frames
+            while len(keyframes) - done > 2 * config.TESSERACT_THREADS:
+                keyframes[done][1].result()
+                done += 1
+
+        frames = [[timestamp, future.result()] for timestamp, future in keyframes]
+    return {"frames": frames, "sampled": sampled}
+
+
+def build_video_result(frames: List[Tuple[float, str]], sampled: int) -> Dict[str, Any]:
+    """
+    Deduplicate keyframe texts into the extraction result.
+
+    Args:
+        frames: (timestamp, OCR text) per keyframe, in time order
+        sampled: Number of frames sampled
+
+    Returns:
+        Dictionary with keys:
+            - success (bool): Always True
+            - message (str): Status message
+            - text (str): Deduplicated lines, grouped under [HH:MM:SS] timestamps
+            - segments (list): [{"time", "lines"}] in time order
+    """
+    segments = dedupe_lines(frames)
+    text = "\n\n".join(
+        f"[{format_timestamp(segment['time'])}]\n" + "\n".join(segment["lines"]) for segment in segments
+    )
+    return {
+        "success": True,
+        "message": f"Extracted text from {len(frames)} video keyframes ({sampled} frames sampled)",
+        "text": text,
+        "segments": segments
+    }
+
+
+def write_temp_video(content: bytes, ext: str) -> str:
+    """
+    Write an upload to a temporary file; OpenCV can only open videos from a
+    path. The caller removes it.
+
+    Args:
+        content: Video file content as bytes
+        ext: File extension (OpenCV picks the demuxer from it)
+
+    Returns:
+        Temporary file path
+    """
+    fd, path = tempfile.mkstemp(suffix=f".{ext}")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+def extract_video_text(content: bytes, ext: str) -> Dict[str, Any]:
+    """
+    OCR a whole video upload in the calling process.
+
+    Args:
+        content: Video file content as bytes
+        ext: File extension
+
+    Returns:
+        Dictionary with keys success, message, text and segments
+        (see build_video_result)
+    """
+    started = time.perf_counter()
+    path = write_temp_video(content, ext)
+    try:
+        result = ocr_video_range(path)
+    except Exception as e:
+        Log.log.error(f"Video OCR failed: {e}")
+        return {
+            "success": False,
+            "message": f"Video processing error: {str(e)}",
+            "text": "",
+            "segments": []
+        }
+    finally:
+        os.remove(path)
+
+    video = build_video_result(result["frames"], result["sampled"])
+    Log.log.info(
+        f"Video OCR: {result['sampled']} sampled frames, {len(result['frames'])} keyframes OCR'd, "
+        f"{len(video['segments'])} with new text, {time.perf_counter() - started:.1f}s"
+    )
+    return video
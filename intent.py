@@ -0,0 +1,246 @@
+"""
+Local intent router for /chat.
+
+Decides between answering from the merged documents, querying [BIdata],
+summarizing, or serving a download using lexical overlap between the
+question and (a) the merged-document vocabulary and (b) the [BIdata]
+column/value vocabulary, plus the existing keyword heuristics. Only when
+the two scores are too close does /chat fall back to the LLM relevance
+check.
+
+Every decision is appended to INTENT_LOG_PATH. With INTENT_AUDIT_RATE > 0
+a sample of confident decisions is also checked by the LLM so agreement
+can be measured:
+    python intent.py report
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime
+
+import fileread
+
+INTENT_LOG_PATH = os.environ.get("INTENT_LOG_PATH", os.path.join(fileread.MERGE_DIR, "intent_log.jsonl"))
+INTENT_CONFIDENCE_THRESHOLD = float(os.environ.get("INTENT_CONFIDENCE_THRESHOLD", "0.5"))
+INTENT_AUDIT_RATE = float(os.environ.get("INTENT_AUDIT_RATE", "0"))
+SQL_VOCAB_TTL_SECONDS = 3600
+SQL_VOCAB_RETRY_SECONDS = 60    # wait after a failed load before trying again
+
+SUMMARY_KEYWORDS = ["summarize", "summary", "brief", "overview", "main points"]
+
+BIDATA_COLUMNS = [
+    "Docket No", "CallType", "Status", "Created Date", "Calldate", "Billable", "Warranty",
+    "CloseDate", "Substatus", "created by", "Call Accept Status", "Scheduledate", "Pincode",
+    "Contact Person", "Source", "state", "City", "site", "Product", "Category", "Region",
+    "Engineer", "Account", "Location", "Service Code", "subcalltype", "SerialNo",
+]
+# Low-cardinality columns whose values are worth matching against questions
+BIDATA_VALUE_COLUMNS = [
+    "CallType", "Status", "Substatus", "Source", "state", "City", "Product",
+    "Category", "Region", "Engineer", "Account", "subcalltype", "Billable", "Warranty",
+]
+SQL_HINT_WORDS = {
+    "count", "number", "total", "calls", "call", "tickets", "ticket", "dockets", "docket",
+    "month", "monthly", "year", "yearly", "week", "daily", "trend", "forecast", "predict",
+    "average", "highest", "lowest", "top", "open", "closed", "pending", "created", "breakdown",
+    "wise", "per", "each", "group", "compare", "between", "last", "latest", "2019", "2020",
+    "2021", "2022", "2023", "2024", "2025",
+}
+STOP_WORDS = {
+    "the", "and", "for", "are", "was", "were", "what", "which", "who", "whom", "how", "many",
+    "much", "with", "from", "this", "that", "these", "those", "there", "their", "about",
+    "into", "does", "did", "can", "could", "would", "should", "will", "show", "tell", "give",
+    "list", "please", "any", "all", "has", "have", "had", "its", "our", "your", "you",
+    "get", "find", "want", "need", "know", "based", "using", "data", "information", "details",
+    "file", "document", "documents", "question",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_doc_vocab_cache = {}           # merged text hash -> token set
+# refreshing holds the pid of the process loading it; a thread started before a fork
+# does not exist in the children, so they must not wait for it
+_sql_vocab = {"tokens": None, "loaded_at": 0.0, "next_attempt": 0.0, "refreshing": None}
+_sql_vocab_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 2 and t not in STOP_WORDS]
+
+
+def document_vocabulary(merged_text):
+    key = hashlib.md5(merged_text.encode("utf-8")).hexdigest()
+    vocab = _doc_vocab_cache.get(key)
+    if vocab is None:
+        vocab = set(tokenize(merged_text))
+        if len(_doc_vocab_cache) > 32:
+            _doc_vocab_cache.clear()
+        _doc_vocab_cache[key] = vocab
+    return vocab
+
+
+def _base_sql_vocabulary():
+    tokens = set(SQL_HINT_WORDS)
+    for column in BIDATA_COLUMNS:
+        tokens.update(tokenize(column))
+    return tokens
+
+
+def refresh_sql_vocabulary(query):
+    """
+    Load column names plus distinct values of the categorical [BIdata]
+    columns (blocking). query(sql) must return (columns, rows). If the
+    database is unreachable the previous vocabulary is kept and the load is
+    retried after SQL_VOCAB_RETRY_SECONDS.
+    """
+    tokens = _base_sql_vocabulary()
+    loaded = False
+    try:
+        for column in BIDATA_VALUE_COLUMNS:
+            try:
+                _, rows = query(f"SELECT DISTINCT TOP 500 [{column}] FROM [BIdata]")
+            except Exception as e:
+                # Usually the database is down; keep what we had
+                print(f"⚠️ Could not load [BIdata] values for {column}: {e}")
+                loaded = False
+                break
+            loaded = True
+            for (value,) in rows:
+                if value is not None:
+                    tokens.update(tokenize(str(value)))
+    finally:
+        now = time.time()
+        with _sql_vocab_lock:
+            if loaded:
+                _sql_vocab.update(tokens=tokens, loaded_at=now)
+            else:
+                _sql_vocab["next_attempt"] = now + SQL_VOCAB_RETRY_SECONDS
+                if _sql_vocab["tokens"] is None:
+                    _sql_vocab["tokens"] = tokens
+            _sql_vocab["refreshing"] = None
+    return _sql_vocab["tokens"]
+
+
+def load_sql_vocabulary(query=None):
+    """
+    The [BIdata] vocabulary, without waiting for the database. When it is
+    older than SQL_VOCAB_TTL_SECONDS (or was never loaded) a background
+    thread reloads it with refresh_sql_vocabulary(query); until that
+    finishes the stale vocabulary, or just the column names and hint words,
+    is returned.
+    """
+    now = time.time()
+    with _sql_vocab_lock:
+        tokens = _sql_vocab["tokens"]
+        if tokens is None:
+            tokens = _sql_vocab["tokens"] = _base_sql_vocabulary()
+        stale = now - _sql_vocab["loaded_at"] >= SQL_VOCAB_TTL_SECONDS
+        refreshing = _sql_vocab["refreshing"] == os.getpid()
+        if query is None or not stale or refreshing or now < _sql_vocab["next_attempt"]:
+            return tokens
+        _sql_vocab["refreshing"] = os.getpid()
+    threading.Thread(target=refresh_sql_vocabulary, args=(query,), name="sql-vocabulary", daemon=True).start()
+    return tokens
+
+
+def route(question, merged_text="", sql_vocabulary=None):
+    """
+    Returns a decision dict: route ("download", "summary", "doc", "sql" or
+    "ambiguous"), confidence in [0, 1], the two overlap scores and a reason.
+    """
+    decision = {"route": "sql", "confidence": 1.0, "doc_score": 0.0, "sql_score": 0.0, "reason": ""}
+
+    if fileread.is_download_request(question):
+        decision.update(route="download", reason="download keywords")
+        return decision
+
+    terms = set(tokenize(question))
+    sql_vocabulary = sql_vocabulary or set(SQL_HINT_WORDS)
+    if terms:
+        doc_vocab = document_vocabulary(merged_text) if merged_text else set()
+        # Words the documents share with [BIdata] say little about which source to use
+        doc_only = doc_vocab - sql_vocabulary
+        decision["doc_score"] = round(
+            (len(terms & doc_only) + 0.5 * len(terms & doc_vocab & sql_vocabulary)) / len(terms), 3)
+        decision["sql_score"] = round(len(terms & sql_vocabulary) / len(terms), 3)
+
+    if not merged_text:
+        decision["reason"] = "no merged documents"
+        return decision
+
+    lower = question.lower()
+    wants_summary = any(k in lower for k in SUMMARY_KEYWORDS) and not fileread.is_file_creation_request(question)
+    if wants_summary and decision["doc_score"] >= decision["sql_score"]:
+        decision.update(route="summary", confidence=0.9, reason="summary keywords")
+        return decision
+
+    margin = decision["doc_score"] - decision["sql_score"]
+    decision["confidence"] = round(min(1.0, abs(margin) * 2), 3)
+    if decision["confidence"] < INTENT_CONFIDENCE_THRESHOLD:
+        decision.update(route="ambiguous", reason="scores too close")
+    elif margin > 0:
+        decision.update(route="doc", reason="question overlaps document vocabulary")
+    else:
+        decision.update(route="sql", reason="question overlaps [BIdata] vocabulary")
+    return decision
+
+
+def should_audit(decision):
+    """Sample confident doc/sql decisions for an LLM cross-check."""
+    return decision["route"] in ("doc", "sql") and random.random() < INTENT_AUDIT_RATE
+
+
+def log_decision(question, decision, llm_route=None):
+    """Append a decision (and the LLM's verdict, if one was asked) to the log."""
+    record = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "question": question,
+        **decision,
+        "llm_route": llm_route,
+    }
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(INTENT_LOG_PATH) or ".", exist_ok=True)
+            with open(INTENT_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not write intent log: {e}")
+
+
+def report(path=INTENT_LOG_PATH):
+    """Print route counts and agreement with the LLM where both were recorded."""
+    routes = Counter()
+    agree = disagree = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            routes[record["route"]] += 1
+            if record.get("llm_route") and record["route"] in ("doc", "sql"):
+                if record["llm_route"] == record["route"]:
+                    agree += 1
+                else:
+                    disagree += 1
+
+    total = sum(routes.values())
+    print(f"{total} decisions")
+    for name, count in routes.most_common():
+        print(f"  {name:<10} {count:>6}  ({count / total:.0%})")
+    checked = agree + disagree
+    if checked:
+        print(f"LLM agreement on {checked} audited decisions: {agree / checked:.1%}")
+    llm_calls = routes["ambiguous"] + checked
+    print(f"LLM relevance calls avoided: {total - llm_calls} of {total}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["report"]:
+        report()
+    else:
+        print("usage: python intent.py report")
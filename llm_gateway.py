@@ -0,0 +1,313 @@
+"""
+Shared gateway for OpenAI chat completions.
+
+Used by the chat app (myapp.py, summarize.py) and by imageocr. Every call
+goes through:
+
+  - one long-lived OpenAI / AsyncOpenAI client per process on a pooled
+    httpx client (keep-alive connections are reused instead of reconnecting),
+  - token buckets for requests and tokens per minute (LLM_RPM / LLM_TPM),
+  - a concurrency cap (LLM_MAX_CONCURRENCY),
+  - a per-call deadline (LLM_DEADLINE_SECONDS, or deadline=... per call)
+    covering queueing, the request itself and any retries,
+  - retries on 429 / 5xx / timeouts / connection errors with full-jitter
+    exponential backoff, honouring Retry-After, limited by a retry budget
+    (at most LLM_RETRY_BUDGET retries per request over the last minute).
+
+When the rate limits, the concurrency cap or the retry budget cannot be met
+within the deadline, GatewayOverloaded is raised straight away rather than
+adding more requests to a provider that is already returning 429s.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+import httpx
+
+LLM_RPM = int(os.environ.get("LLM_RPM", "500"))
+LLM_TPM = int(os.environ.get("LLM_TPM", "200000"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+LLM_DEADLINE_SECONDS = float(os.environ.get("LLM_DEADLINE_SECONDS", "90"))
+LLM_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "3"))
+LLM_RETRY_BUDGET = float(os.environ.get("LLM_RETRY_BUDGET", "0.2"))
+LLM_RETRY_MIN_PER_MINUTE = 10      # retries always allowed, even at low traffic
+LLM_BACKOFF_BASE = 0.5
+LLM_BACKOFF_CAP = 8.0
+LLM_POOL_CONNECTIONS = int(os.environ.get("LLM_POOL_CONNECTIONS", "32"))
+LLM_CONNECT_TIMEOUT = 5.0
+DEFAULT_COMPLETION_TOKENS = 512     # token estimate when max_tokens is not given
+
+# The openai SDK is slow to import; it is loaded with the first client
+_RETRYABLE_ERROR_NAMES = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError")
+
+
+def _retryable_errors():
+    import openai
+    return tuple(getattr(openai, name) for name in _RETRYABLE_ERROR_NAMES)
+
+
+class GatewayOverloaded(Exception):
+    """The call could not be admitted or retried within its deadline."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Per-minute limit; reserve() returns how long the caller must wait."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, max_wait):
+        """Take amount now (possibly going into debt) unless the wait exceeds max_wait."""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (amount - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= amount
+            return wait
+
+    def refund(self, amount):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RetryBudget:
+    """Allow retries up to a fraction of recent requests (sliding one-minute window)."""
+
+    def __init__(self, ratio, minimum):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = deque()
+        self.retries = deque()
+        self.lock = threading.Lock()
+
+    def _trim(self, now):
+        for events in (self.requests, self.retries):
+            while events and now - events[0] > 60:
+                events.popleft()
+
+    def record_request(self):
+        with self.lock:
+            now = time.monotonic()
+            self._trim(now)
+            self.requests.append(now)
+
+    def try_spend(self):
+        with self.lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self.retries) >= self.minimum + self.ratio * len(self.requests):
+                return False
+            self.retries.append(now)
+            return True
+
+
+_request_bucket = TokenBucket(LLM_RPM)
+_token_bucket = TokenBucket(LLM_TPM)
+_retry_budget = RetryBudget(LLM_RETRY_BUDGET, LLM_RETRY_MIN_PER_MINUTE)
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_async_slots = None                 # asyncio.Semaphore, created on the event loop
+
+_stats = {"calls": 0, "retries": 0, "errors": 0, "overloaded": 0,
+          "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
+_stats_lock = threading.Lock()
+
+# Clients are per process: a worker forked after warm_up() must not reuse
+# the parent's pooled HTTP connections, so each client records its pid
+_client = None
+_client_pid = None
+_async_client = None
+_async_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_client():
+    """The process-wide sync OpenAI client (pooled, SDK retries disabled)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            # An inherited client is dropped, not closed: its sockets are the parent's
+            import openai
+            _client = openai.OpenAI(
+                api_key=os.environ.get("OPENAI_API_KEY"),
+                max_retries=0,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_connections=LLM_POOL_CONNECTIONS,
+                                        max_keepalive_connections=LLM_POOL_CONNECTIONS),
+                    timeout=httpx.Timeout(LLM_DEADLINE_SECONDS, connect=LLM_CONNECT_TIMEOUT),
+                ),
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def get_async_client():
+    """The process-wide AsyncOpenAI client (pooled, SDK retries disabled)."""
+    global _async_client, _async_client_pid
+    with _client_lock:
+        if _async_client is None or _async_client_pid != os.getpid():
+            import openai
+            _async_client = openai.AsyncOpenAI(
+                api_key=os.environ.get("OPENAI_API_KEY"),
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=LLM_POOL_CONNECTIONS,
+                                        max_keepalive_connections=LLM_POOL_CONNECTIONS),
+                    timeout=httpx.Timeout(LLM_DEADLINE_SECONDS, connect=LLM_CONNECT_TIMEOUT),
+                ),
+            )
+            _async_client_pid = os.getpid()
+        return _async_client
+
+
+def estimate_tokens(kwargs):
+    chars = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+    completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // 4 + completion
+
+
+def _admit(estimate, deadline):
+    """Reserve rate-limit capacity; returns the wait before sending."""
+    remaining = deadline - time.monotonic()
+    wait = _request_bucket.reserve(1, remaining)
+    if wait is None:
+        _count(overloaded=1)
+        raise GatewayOverloaded("LLM request rate limit reached", retry_after=60.0 / LLM_RPM)
+    token_wait = _token_bucket.reserve(estimate, remaining)
+    if token_wait is None:
+        _request_bucket.refund(1)
+        _count(overloaded=1)
+        raise GatewayOverloaded("LLM token rate limit reached", retry_after=estimate * 60.0 / LLM_TPM)
+    return max(wait, token_wait)
+
+
+def _settle(response, estimate):
+    """Correct the token bucket with the usage the provider reported."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    prompt_tokens = usage.prompt_tokens or 0
+    completion_tokens = usage.completion_tokens or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+    _token_bucket.refund(estimate - prompt_tokens - completion_tokens)
+    _count(prompt_tokens=prompt_tokens, cached_prompt_tokens=cached_tokens,
+           completion_tokens=completion_tokens)
+
+
+def _backoff(attempt, error, deadline):
+    """Seconds to sleep before the next attempt, or None to give up."""
+    if attempt >= LLM_MAX_RETRIES or not isinstance(error, _retryable_errors()):
+        return None
+    delay = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt))
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except (TypeError, ValueError):
+            pass
+    if time.monotonic() + delay >= deadline or not _retry_budget.try_spend():
+        return None
+    _count(retries=1)
+    return delay
+
+
+def _give_up(error, attempt):
+    """Raise the error that ends a call: GatewayOverloaded after repeated 429s, else error as is."""
+    import openai
+    _count(errors=1)
+    if isinstance(error, openai.RateLimitError) and attempt > 0:
+        raise GatewayOverloaded(f"LLM provider still rate limiting after {attempt + 1} attempts") from error
+    raise error
+
+
+def chat(deadline=None, **kwargs):
+    """client.chat.completions.create(**kwargs) through the gateway."""
+    deadline = time.monotonic() + (deadline or LLM_DEADLINE_SECONDS)
+    estimate = estimate_tokens(kwargs)
+    _count(calls=1)
+    _retry_budget.record_request()
+    attempt = 0
+    while True:
+        time.sleep(_admit(estimate, deadline))
+        if not _slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            _count(overloaded=1)
+            raise GatewayOverloaded("Too many LLM calls in flight")
+        try:
+            response = get_client().chat.completions.create(
+                timeout=max(1.0, deadline - time.monotonic()), **kwargs)
+        except Exception as e:
+            error = e
+        else:
+            _settle(response, estimate)
+            return response
+        finally:
+            _slots.release()
+
+        delay = _backoff(attempt, error, deadline)
+        if delay is None:
+            _give_up(error, attempt)
+        time.sleep(delay)
+        attempt += 1
+
+
+async def achat(deadline=None, **kwargs):
+    """Async version of chat() for FastAPI handlers."""
+    global _async_slots
+    if _async_slots is None:
+        _async_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    deadline = time.monotonic() + (deadline or LLM_DEADLINE_SECONDS)
+    estimate = estimate_tokens(kwargs)
+    _count(calls=1)
+    _retry_budget.record_request()
+    attempt = 0
+    while True:
+        await asyncio.sleep(_admit(estimate, deadline))
+        try:
+            await asyncio.wait_for(_async_slots.acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            _count(overloaded=1)
+            raise GatewayOverloaded("Too many LLM calls in flight")
+        try:
+            response = await get_async_client().chat.completions.create(
+                timeout=max(1.0, deadline - time.monotonic()), **kwargs)
+        except Exception as e:
+            error = e
+        else:
+            _settle(response, estimate)
+            return response
+        finally:
+            _async_slots.release()
+
+        delay = _backoff(attempt, error, deadline)
+        if delay is None:
+            _give_up(error, attempt)
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,275 @@
+"""
+Segmented merge store.
+
+Each extracted document is written once as a content-addressed segment
+(MERGE_DIR/segments/<sha256>.txt) and every merge name keeps a manifest
+(MERGE_DIR/<name>.manifest.json) listing its segments in upload order.
+Uploading a document whose text is already in the merge is a no-op.
+
+Segments never change once written, so reads are cached in memory.
+
+Convert old append-only merge files with:
+    python mergestore.py compact [default_merged.txt ...]
+"""
+import os
+import re
+import json
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+import fileread
+
+SEGMENT_DIR_NAME = "segments"
+MANIFEST_SUFFIX = ".manifest.json"
+MIN_MENTION_CHARS = 5           # shorter file stems ("a", "1", "data") are too common to select by
+SEGMENT_CACHE_SIZE = 256
+
+START_MARKER = "### Start of Document: {} ###"
+END_MARKER = "### End of Document: {} ###"
+_DOCUMENT_RE = re.compile(
+    r"### Start of Document: (.+?) ###\n(.*?)\n### End of Document: \1 ###",
+    re.DOTALL,
+)
+
+_manifest_lock = threading.Lock()
+
+
+def _segment_dir():
+    path = os.path.join(fileread.MERGE_DIR, SEGMENT_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def segment_path(digest):
+    return os.path.join(_segment_dir(), f"{digest}.txt")
+
+
+def manifest_path(name):
+    return os.path.join(fileread.MERGE_DIR, os.path.basename(name) + MANIFEST_SUFFIX)
+
+
+def has_manifest(name):
+    return os.path.exists(manifest_path(name))
+
+
+def load_manifest(name):
+    try:
+        with open(manifest_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"name": name, "segments": []}
+
+
+def _save_manifest(name, manifest):
+    path = manifest_path(name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _write_segment(text):
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    path = segment_path(digest)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    return digest
+
+
+@lru_cache(maxsize=SEGMENT_CACHE_SIZE)
+def read_segment(digest):
+    with open(segment_path(digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def parse_documents(text):
+    """
+    Split merged text into (filename, text) pairs at the document markers.
+    Returns (documents, covered), where covered is False if there is
+    non-blank text outside the markers.
+    """
+    documents = []
+    outside = []
+    position = 0
+    for match in _DOCUMENT_RE.finditer(text):
+        outside.append(text[position:match.start()])
+        documents.append((match.group(1), match.group(2)))
+        position = match.end()
+    outside.append(text[position:])
+    return documents, not "".join(outside).strip()
+
+
+def _legacy_path(name):
+    return os.path.join(fileread.MERGE_DIR, os.path.basename(name))
+
+
+def _legacy_documents(name):
+    """Documents of an append-only merge file that has no manifest yet."""
+    path = _legacy_path(name)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        legacy_text = f.read()
+    documents, covered = parse_documents(legacy_text)
+    if covered:
+        return documents
+    # Text outside the markers would be lost; keep the whole file as one document
+    print(f"⚠️ {name} has text outside document markers; importing it as a single document")
+    return [(os.path.basename(name), legacy_text)] if legacy_text.strip() else []
+
+
+def _append_segments(manifest, documents):
+    known = {seg["hash"] for seg in manifest["segments"]}
+    added = 0
+    for filename, text in documents:
+        text = text.strip()
+        if not text:
+            continue
+        digest = _write_segment(text)
+        if digest in known:
+            print(f"♻️ Skipping duplicate document: {filename}")
+            continue
+        manifest["segments"].append({
+            "hash": digest,
+            "filename": filename,
+            "chars": len(text),
+            "added": datetime.now().isoformat(timespec="seconds"),
+        })
+        known.add(digest)
+        added += 1
+    return added
+
+
+def add_documents(name, documents):
+    """
+    Add (filename, text) pairs to a merge, skipping documents whose text is
+    already in it. A merge that still only exists as an append-only file is
+    imported into the manifest first, so its documents are kept. Returns the
+    number of the given documents actually added.
+    """
+    with _manifest_lock:
+        manifest = load_manifest(name)
+        migrated = 0
+        if not has_manifest(name):
+            migrated = _append_segments(manifest, _legacy_documents(name))
+            if migrated:
+                print(f"📦 Imported {migrated} document(s) from the existing merge file {name}")
+        added = _append_segments(manifest, documents)
+        if added or migrated:
+            _save_manifest(name, manifest)
+    return added
+
+
+def _mentions(question, name):
+    return re.search(r"(?<!\w)" + re.escape(name) + r"(?!\w)", question) is not None
+
+
+def _is_mentioned(filename, question):
+    """Whether the question names the file, in full or by a stem of MIN_MENTION_CHARS or more."""
+    filename = filename.lower()
+    stem = os.path.splitext(filename)[0]
+    return _mentions(question, filename) or (len(stem) >= MIN_MENTION_CHARS and _mentions(question, stem))
+
+
+def select_segments(manifest, question=None):
+    """Segments whose filename is mentioned in the question, or all of them."""
+    segments = manifest["segments"]
+    if not question:
+        return segments
+    question = question.lower()
+    mentioned = [seg for seg in segments if _is_mentioned(seg["filename"], question)]
+    return mentioned or segments
+
+
+def format_document(filename, text):
+    return f"\n\n{START_MARKER.format(filename)}\n{text}\n{END_MARKER.format(filename)}\n"
+
+
+def load_merged_text(name, question=None):
+    """
+    Build the merged text for a merge name from its segments. Falls back to
+    reading a legacy append-only file if the merge has not been compacted.
+    """
+    if not has_manifest(name):
+        legacy_path = _legacy_path(name)
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                return f.read()
+        return ""
+
+    segments = select_segments(load_manifest(name), question)
+    return "".join(format_document(seg["filename"], read_segment(seg["hash"])) for seg in segments)
+
+
+def render(name):
+    """Write the deduplicated merge out as a plain text file (for downloads)."""
+    path = os.path.join(fileread.MERGE_DIR, os.path.basename(name))
+    text = load_merged_text(name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def compact(name, keep_backup=True):
+    """
+    Convert an append-only merge file into segments + manifest. Repeated
+    documents are stored once; the file itself is rewritten deduplicated.
+    Files without document markers, or with text outside them, are left
+    untouched. Returns (documents found, segments added).
+    """
+    path = _legacy_path(name)
+    with open(path, "r", encoding="utf-8") as f:
+        legacy_text = f.read()
+
+    documents, covered = parse_documents(legacy_text)
+    if not documents:
+        print(f"⚠️ {name}: no documents found, leaving it unchanged")
+        return 0, 0
+    if not covered:
+        print(f"⚠️ {name}: text outside document markers would be lost, leaving it unchanged")
+        return len(documents), 0
+
+    with _manifest_lock:
+        manifest = load_manifest(name)
+        added = _append_segments(manifest, documents)
+        if added or not has_manifest(name):
+            _save_manifest(name, manifest)
+
+    if keep_backup:
+        # Never overwrite an earlier backup: it may be the only copy of the original text
+        backup_path = path + ".bak"
+        if os.path.exists(backup_path):
+            backup_path = f"{path}.{datetime.now():%Y%m%d-%H%M%S}.bak"
+        os.replace(path, backup_path)
+    render(name)
+    return len(documents), added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_parser = sub.add_parser("compact", help="convert append-only merge files")
+    compact_parser.add_argument("names", nargs="*", help="merge file names (default: all)")
+    compact_parser.add_argument("--no-backup", action="store_true", help="do not keep a .bak copy")
+    args = parser.parse_args()
+
+    names = args.names or sorted(
+        entry for entry in os.listdir(fileread.MERGE_DIR)
+        if entry.endswith(".txt") and entry != "last_used.txt"
+        and os.path.isfile(os.path.join(fileread.MERGE_DIR, entry))
+    )
+    for name in names:
+        found, added = compact(name, keep_backup=not args.no_backup)
+        print(f"{name}: {found} documents, {added} unique segments added")
+
+
+if __name__ == "__main__":
+    main()
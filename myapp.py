@@ -1,11 +1,22 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask, request, jsonify, render_template, session
 import os
-import openai
-import pyodbc
+import db
+import startup
 import fileread
+import mergestore
+import resultstore
+import intent
+import singleflight
+import llm_gateway
+import prompts
 import json
 from filedownload import download_uploaded_file
 import export
+import forecast
+import charts
 from new import (detectpattern,is_sql_safe)
 import logging
 from datetime import datetime
@@ -19,24 +30,17 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "supersecret123!@#")
+# Let a fronting web server (Apache/nginx) send download bodies itself
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "False").lower() == "true"
+
+# OpenAI calls go through the shared gateway (pooling, rate limits, retries).
+# SQL Server is connected lazily by db.py; nothing here touches the network,
+# so a worker starts (and recycles) even while the database is down.
+
 
-# Initialize OpenAI client with correct model
-client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
-# Connect to SQL Server using SQL Server Authentication with environment variables
-try:
-    conn = pyodbc.connect(
-        f"DRIVER={{SQL Server}};"
-        f"SERVER={os.environ.get('SQL_SERVER', 'x.x.x.x')};"
-        f"DATABASE={os.environ.get('SQL_DATABASE', '1234567')};"
-        f"UID={os.environ.get('SQL_UID', 'user')};"
-        f"PWD={os.environ.get('SQL_PWD', '123')};"
-    )
-    cursor = conn.cursor()
-    logger.info("Database connection established successfully")
-except Exception as e:
-    logger.error(f"Failed to connect to database: {str(e)}")
-    cursor = None
+def run_query(sql_query):
+    """Execute a SELECT; identical concurrent queries share one execution."""
+    return singleflight.sql.do(sql_query, db.query, sql_query)
 
 # Chat history storage (in-memory, replace with database for production)
 chat_histories = {}
@@ -121,20 +125,63 @@ def delete_chat(chat_id):
 def download_file(filename):
     return download_uploaded_file(filename)
 
-@app.route('/export/csv', methods=['POST'])
+def _export(exporter):
+    """Export a stored result (?result=<id>) or the posted JSON payload."""
+    result_id = request.args.get('result')
+    if result_id:
+        entry = resultstore.get(result_id)
+        if entry is None:
+            return jsonify({'error': 'Result expired or not found'}), 404
+        return exporter(None, columns=entry['columns'], rows=resultstore.iter_dicts(entry))
+    return exporter(request.json)
+
+@app.route('/export/csv', methods=['GET', 'POST'])
 def export_csv():
-    content = request.json
-    return export.export_csv(content)
+    return _export(export.export_csv)
 
-@app.route('/export/excel', methods=['POST'])
+@app.route('/export/excel', methods=['GET', 'POST'])
 def export_excel():
-    content = request.json
-    return export.export_excel(content)
+    return _export(export.export_excel)
 
-@app.route('/export/pdf', methods=['POST'])
+@app.route('/export/pdf', methods=['GET', 'POST'])
 def export_pdf():
-    content = request.json
-    return export.export_pdf(content)
+    return _export(export.export_pdf)
+
+@app.route('/result/<result_id>', methods=['GET'])
+def get_result(result_id):
+    """Page through a stored SQL result"""
+    entry = resultstore.get(result_id)
+    if entry is None:
+        return jsonify({'error': 'Result expired or not found'}), 404
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', resultstore.INLINE_ROWS, type=int)
+    return jsonify(resultstore.page(entry, offset, limit))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'singleflight': singleflight.metrics(),
+        'llm_gateway': llm_gateway.stats(),
+        'prompt_cache': prompts.usage_stats()
+    })
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: the database answers (warm-up only makes the first requests faster)"""
+    db_ready = db.ping()
+    ready = db_ready
+    return jsonify({
+        'ready': ready,
+        'database': {'ok': db_ready, **db.status()},
+        'warmed_up': startup.state['warmed_up'],
+        'warm_up_ms': startup.state['warm_up_ms'],
+        'import_ms': startup.import_timings
+    }), 200 if ready else 503
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -180,7 +227,8 @@ def chat():
                 elif export_format == "csv":
                     path = export.export_csv(export_content, save_as=filename)
                 elif export_format == "txt":
-                    path = os.path.join("uploads/exports", filename)
+                    os.makedirs(export.EXPORT_DIR, exist_ok=True)
+                    path = os.path.join(export.EXPORT_DIR, filename)
                     with open(path, "w", encoding="utf-8") as f:
                         f.write(merged_text.strip())
                 else:
@@ -196,39 +244,44 @@ def chat():
             user_lower = user_input.lower()
             if any(k in user_lower for k in summary_keywords) and not fileread.is_file_creation_request(user_input):
 
-                    from summarize import summarize_document
-                    summary = summarize_document(merged_text)
-                    return jsonify({'summary': summary})
+                    from summarize import summarize_document, new_stats
+                    cache_stats = new_stats()
+                    summary = summarize_document(merged_text, stats=cache_stats)
+                    logger.info(f"Summary cache: {cache_stats}")
+                    return jsonify({'summary': summary, 'summary_cache': cache_stats})
 
             else:        # Else: treat as question about file
-                context_prompt = f"""
-    You are a helpful assistant. The user uploaded the following document(s):
-
-    --- Begin Content ---
-    {merged_text}
-    --- End Content ---
-
-    Now answer this question about the document(s):
-    {user_input}
-    """
-
-                response = client.chat.completions.create(
-                        model="gpt-4.1-mini",
-                        messages=[
-                            {"role": "system", "content": "You answer user questions based on document content."},
-                            {"role": "user", "content": context_prompt}
-                        ]
-                    )
+                response = prompts.chat(
+                    "document_qa", prompts.DOCUMENT_QA_SYSTEM,
+                    question=f"Now answer this question about the document(s):\n{user_input}",
+                    document=merged_text
+                )
                 answer = response.choices[0].message.content.strip()
 
                 if "Sorry, I couldn't understand" not in answer and len(answer) > 20:
                         return jsonify({'summary': answer})
 
         if user_input:
-            if fileread.is_download_request(user_input):
+            merged_text = ""
+            if os.path.exists(fileread.last_file_path):
+                with open(fileread.last_file_path, "r", encoding="utf-8") as f:
+                    last_used_file = f.read().strip()
+                merged_text = mergestore.load_merged_text(last_used_file, question=user_input)
+                if merged_text:
+                    print(f"📄 Using last used merged file: {last_used_file}")
+
+            # Step 1: Route locally (doc / SQL / summary / download)
+            decision = intent.route(user_input, merged_text, intent.load_sql_vocabulary(db.query))
+            print(f"🧭 Route: {decision['route']} (confidence {decision['confidence']}, "
+                  f"doc {decision['doc_score']}, sql {decision['sql_score']})")
+
+            if decision["route"] == "download":
+                intent.log_decision(user_input, decision)
                 filename = fileread.extract_filename_from_request(user_input)
                 if filename:
                     file_path = os.path.join(fileread.MERGE_DIR, filename)
+                    if mergestore.has_manifest(filename):
+                        mergestore.render(filename)
                     if os.path.exists(file_path):
                         download_url = f"/download-file/{filename}"
                         return jsonify({
@@ -239,162 +292,49 @@ def chat():
                         return jsonify({"reply": f"❌ File '{filename}' not found in uploads."})
                 else:
                     return jsonify({"reply": "❌ Could not detect which file you want to download. Please specify the name."})
+            if decision["route"] == "summary":
+                intent.log_decision(user_input, decision)
+                from summarize import summarize_document, new_stats
+                cache_stats = new_stats()
+                summary = summarize_document(merged_text, stats=cache_stats)
+                logger.info(f"Summary cache: {cache_stats}")
+                return jsonify({'summary': summary, 'summary_cache': cache_stats})
+
             if len(user_input.strip().split()) <= 5 and not user_input.strip().endswith('?'):
-                expansion_prompt = f"Convert this into a clear and complete question: {user_input.strip()}"
-                expansion_response = client.chat.completions.create(
-                    model="gpt-4.1-mini",
-                    messages=[
-                        {"role": "system", "content": "You are an assistant that turns vague phrases into full, clear questions."},
-                        {"role": "user", "content": expansion_prompt}
-                    ]
-                )
+                expansion_response = prompts.chat("expansion", prompts.EXPANSION_SYSTEM, question=user_input.strip())
                 user_input = expansion_response.choices[0].message.content.strip()
                 print("🪄 Expanded User Question:", user_input)
-            merged_text = ""
-            if os.path.exists(fileread.last_file_path):
-                with open(fileread.last_file_path, "r", encoding="utf-8") as f:
-                    last_used_file = f.read().strip()
-                file_path = os.path.join(fileread.MERGE_DIR, last_used_file)
-                if os.path.exists(file_path):
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        merged_text = f.read()
-                        print(f"📄 Using last used merged file: {last_used_file}")
-
-            used_document = False  # Track if document is used
-
-            # Step 2: Ask GPT if document is relevant
-            if merged_text:
-                relevance_check_prompt = f"""
-        Does the following document contain enough information to answer this question? Answer with only "yes" or "no".
-
-        --- Document Content ---
-        {merged_text}
-        --- Question ---
-        {user_input}
-        """
-                relevance_response = client.chat.completions.create(
-                    model="gpt-4.1-mini",
-                    messages=[
-                        {"role": "system", "content": "You are a strict validator that responds with only 'yes' or 'no'."},
-                        {"role": "user", "content": relevance_check_prompt}
-                    ]
+
+            used_document = decision["route"] == "doc"  # Track if document is used
+            llm_route = None
+
+            # Step 2: Ask GPT if document is relevant, only when the router is unsure (or auditing it)
+            if decision["route"] == "ambiguous" or intent.should_audit(decision):
+                relevance_response = prompts.chat(
+                    "relevance", prompts.RELEVANCE_SYSTEM,
+                    question=f"Question: {user_input}",
+                    document=merged_text, document_label="Document Content"
                 )
                 can_answer = relevance_response.choices[0].message.content.strip().lower()
                 print(f"🧠 Can answer from document? {can_answer}")
+                llm_route = "doc" if can_answer.startswith("yes") else "sql"
+                if decision["route"] == "ambiguous":
+                    used_document = llm_route == "doc"
+            intent.log_decision(user_input, decision, llm_route)
+
+            if used_document:
+                response = prompts.chat(
+                    "document_reference", prompts.DOCUMENT_REFERENCE_SYSTEM,
+                    question=f"Now answer this question:\n{user_input}",
+                    document=merged_text
+                )
+                answer = response.choices[0].message.content.strip()
 
-                if can_answer.startswith("yes"):
-                    used_document = True
-                    system_message = """
-                    You are  "Document Reference GPT” and your primary role is to provide accurate and contextual information from a combined text file that contains multiple documents. Your task is to ensure that any information retrieved is correctly associated with its respective document content, even though the file does not use JSON or YAML format but is structured in a plain text format.
-
-                    Core Responsibilities:
-
-                    1. Document Content Retrieval:
-                    • Recognize and distinguish between documents: The text file is organized with clear markers that indicate the start and end of each document. Your role is to accurately retrieve information from the correct sections of the text, ensuring that the response is relevant to the user’s query.
-                    • Content Segmentation: Each document in the text file is separated by distinct markers such as “### Start of Document:” and “### End of Document:”. Use these markers to identify and retrieve content specific to each document.
-
-                    2. Contextual Understanding:
-                    • Synthesizing Information Across Documents: Some questions may require drawing on information from multiple documents within the text file. Be prepared to synthesize information from different sections of the file to provide a comprehensive and accurate response.
-                    • Topic-Based Responses: While responding, focus on the topics mentioned in the user’s query, ensuring that the answer is derived from the appropriate sections of the text file.
-
-                    3. Maintaining Accuracy:
-                    • Avoiding Confusion: Ensure that the content retrieved and provided to the user does not mix up information from different documents unless the query explicitly requires it.
-                    • No Hallucination: Base your responses strictly on the content available in the text file. Avoid generating information that is not supported by the provided text.
-
-                    4. Response Format:
-                    • Clear and Concise: Provide clear, concise, and directly relevant responses to the user’s query.
-                    • Contextual Accuracy: Use contextual clues within the text to ensure that the information you provide is accurate and relevant to the specific document’s content.
-
-                    5. Structured Text Handling:
-                    • Text File Format: The knowledge base is provided in a plain text file. It is structured with document markers.
-                    • Markers for Navigation: Use “### Start of Document:” and “### End of Document:” to extract content.
-
-                    Final Note:
-                    Your role is to interpret the structure and respond clearly, using only what’s in the file. Never make up answers or mix document sources unless required.
-                    """
-
-                    user_prompt = f"""
-                    The user uploaded the following merged document content:
-
-                    --- Begin Content ---
-                    {merged_text}
-                    --- End Content ---
-
-                    Now answer this question:
-                    {user_input}
-                    """
-
-                    response = client.chat.completions.create(
-                        model="gpt-4.1-mini",
-                        messages=[
-                            {"role": "system", "content": system_message},
-                            {"role": "user", "content": user_prompt}
-                        ]
-                    )
-                    answer = response.choices[0].message.content.strip()
-
-                    if "Sorry, I couldn't understand" not in answer and len(answer) > 20:
-                            return jsonify({'summary': answer})
+                if "Sorry, I couldn't understand" not in answer and len(answer) > 20:
+                        return jsonify({'summary': answer})
             print("📉 Document not sufficient, switching to SQL...")
-    # System prompt for SQL generation
-            system_prompt = """
-You are a SQL assistant connected to a SQL Server database. The only available table is [BIdata].
-
-Available columns in [BIdata]:
-- [Docket No], [CallType], [Status], [Created Date], [Calldate], [Billable], [Warranty], [CloseDate], [Substatus], [created by], [Call Accept Status], [Scheduledate], [Pincode], [Contact Person], [Source], [state], [City], [site], [Product], [Category], [Region], [Engineer], [Account], [Location], [Service Code], [subcalltype], [SerialNo]
-
-RULES:
--If the user question does not require SQL, or is vague or conversational, respond with: "Sorry, I couldn't understand that question clearly. Could you rephrase it or be more specific about what you're asking?" Do not attempt to generate SQL for unrelated or unclear questions.
-- Only generate **T-SQL SELECT** queries. No INSERT, UPDATE, DELETE, DROP, or schema modifications.
-- Do NOT use backticks or comments. Do NOT generate explanations.
-- Always wrap **all column names** in square brackets: e.g., [Created Date], [CallType].
-- Use **'YYYY-MM-DD 00:00:00'** format for fixed dates.
-- Use **GETDATE()** to get the current date when required.
-- Use only the **[BIdata]** table. Never use other tables like [MonthlyCounts].
-- If no year is specified in a query, assume **2025**.
-- Validate against SQL injection. If detected, respond with: **"Sql Injection"**.
-- If the prompt looks like an attempt to modify the database or is unclear and you are unsure whether to generate SQL, respond with: **"Sorry, I couldn't understand that question clearly. Could you rephrase it or be more specific about what you're asking?"**
-
-
-CROSS APPLY RULES:
-- When detecting the latest date, use:
-  CROSS APPLY (SELECT MAX([Created Date]) AS MAX_DATE) AS sub
-- This clause must go **immediately after FROM [BIdata]**.
-- Use **sub.MAX_DATE** only in the **WHERE clause** to filter data.
-- **Never include sub.MAX_DATE in SELECT**.
-- **Never reference outer query columns inside the APPLY**.
-- Do not reference outer query columns inside the CROSS APPLY subquery.
-- The subquery must be self-contained like:
-    CROSS APPLY (SELECT MAX([Created Date]) AS MAX_DATE FROM [BIdata]) AS sub
-
-FORECASTING RULES:
-- For **monthly forecasts**, group by month over the last 12 full months.
-- For **yearly**, group by year over the last 5 years.
-- For **decade-level**, group by decade over the last 50 years.
-- Do not include data from the year 2018 in any query. Always filter YEAR([Created Date]) >= 2019 to exclude 2018.
-- When forecasting, do NOT use GETDATE(). Instead, detect the **latest date** in the data using CROSS APPLY.
-- Return only raw grouped data (e.g., month, count). Forecasting is done externally.
-- If the result is long (>75 words), it will be converted into a chart or table.
-- Always generate SELECT-only SQL against [BIdata].
-
-OUTPUT:
-- Simplify results for visualization.
-- Always group or filter based on the user's intent.
-- Do not invent columns or tables not listed above.
-"""
-
-    
-        
         # Step 1: Generate SQL query
-            response = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ]
-            )
-        
-
+            response = prompts.chat("sql", prompts.SQL_SYSTEM, question=user_input)
 
             sql_query = response.choices[0].message.content.strip().replace("`", "")
             print(f"Generated SQL: {sql_query}") 
@@ -409,26 +349,23 @@ OUTPUT:
 
             print(f"Generated SQL: {sql_query}")
 
-            cursor.execute(sql_query)
-            columns = [col[0] for col in cursor.description]
-            rows = cursor.fetchall()
+            columns, rows = run_query(sql_query)
             data = [dict(zip(columns, row)) for row in rows]
+            result_id = resultstore.put(columns, rows)
 
+            # Forecast questions: project the grouped counts locally, no summary call
+            if forecast.is_forecast_request(user_input):
+                projection = forecast.forecast_result(columns, rows, user_input)
+                if projection:
+                    chart, chart_meta = charts.bound(projection['chart'])
+                    return jsonify({**projection, 'chart': chart, 'chart_meta': chart_meta, 'result_id': result_id})
 
 
             # Step 3: Ask GPT to summarize results into a sentence
-            result_prompt = f"""
-    Convert the following result into a natural language summary.
-    User question: {user_input}
-    SQL result: {data}
-    """
-
-            summary_response = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": "You are an assistant that summarizes SQL results as natural language."},
-                    {"role": "user", "content": result_prompt}
-                ]
+            summary_response = prompts.chat(
+                "sql_result", prompts.SQL_RESULT_SYSTEM,
+                question=f"User question: {user_input}",
+                document=str(data), document_label="SQL Result"
             )
 
             summary = summary_response.choices[0].message.content.strip()
@@ -441,15 +378,41 @@ OUTPUT:
             word_count = len(summary.split())
 
             if chart_data and isinstance(chart_data, list) and all('label' in item and 'value' in item for item in chart_data):
-                return jsonify({'chart': chart_data})
+                # Chart the exact rows when the result is (label, value); bound the payload either way
+                chart, chart_meta = charts.bound(charts.chart_from_result(columns, rows) or chart_data)
+                return jsonify({'chart': chart, 'chart_meta': chart_meta, 'result_id': result_id})
             elif word_count <= 75:
-                return jsonify({'summary': summary})
+                return jsonify({'summary': summary, 'result_id': result_id})
             else:
-                return jsonify({'table': data})
+                first_page = resultstore.page(resultstore.get(result_id))
+                return jsonify({
+                    'table': first_page['rows'],
+                    'result_id': result_id,
+                    'total_rows': first_page['total_rows']
+                })
 
+    except db.DatabaseUnavailable as e:
+        logger.warning(f"Database unavailable: {e}")
+        response = jsonify({'reply': "The database is temporarily unavailable. Please try again in a moment."})
+        response.headers['Retry-After'] = str(max(1, round(db.status()['retry_in'])))
+        return response, 503
+    except llm_gateway.GatewayOverloaded as e:
+        logger.warning(f"LLM gateway overloaded: {e}")
+        response = jsonify({'reply': "The assistant is busy right now. Please try again in a moment."})
+        response.headers['Retry-After'] = str(max(1, round(e.retry_after)))
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)})
 
+startup.record("myapp", _import_started)
+
+
+def warm_up():
+    """Hook for pre-forking servers: import heavy modules before traffic."""
+    return startup.warm_up()
+
+
 if __name__ == '__main__':
+    warm_up()
     app.run(host="0.0.0.0", port=5000)
 
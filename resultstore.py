@@ -0,0 +1,145 @@
+"""
+Server-side store for SQL result sets.
+
+/chat keeps the full result here and ships only the first page to the
+browser with a result id; the table pages and exports read the rows back
+by id instead of the browser posting them again. Results live in a SQLite
+file under MERGE_DIR, so every server process (mod_wsgi daemon processes,
+gunicorn workers) can read a result another process stored. Rows are kept
+in chunks of RESULT_CHUNK_ROWS, so a page only loads the chunks it covers.
+Entries expire after RESULT_TTL_SECONDS without access, and the least
+recently used entries are evicted once RESULT_MAX_ENTRIES is reached.
+"""
+import os
+import json
+import time
+import uuid
+import pickle
+import sqlite3
+import threading
+from itertools import islice
+
+import fileread
+
+RESULT_TTL_SECONDS = int(os.environ.get("RESULT_TTL_SECONDS", "1800"))
+RESULT_MAX_ENTRIES = int(os.environ.get("RESULT_MAX_ENTRIES", "200"))
+RESULT_DB = os.environ.get("RESULT_DB", os.path.join(fileread.MERGE_DIR, "results.sqlite3"))
+RESULT_CHUNK_ROWS = 500     # rows per stored chunk
+RESULT_TOUCH_SECONDS = 60   # an entry's TTL is refreshed at most this often
+INLINE_ROWS = 100           # rows shipped with the /chat response
+MAX_PAGE_ROWS = 1000        # largest page /result/<id> will return
+
+_local = threading.local()  # one connection per thread
+
+
+def _db():
+    db = getattr(_local, "db", None)
+    key = (os.getpid(), RESULT_DB)
+    if db is None or getattr(_local, "key", None) != key:
+        os.makedirs(os.path.dirname(RESULT_DB) or ".", exist_ok=True)
+        db = sqlite3.connect(RESULT_DB, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS result_sets ("
+            " id TEXT PRIMARY KEY, columns TEXT NOT NULL, total_rows INTEGER NOT NULL, expires REAL NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS result_chunks ("
+            " id TEXT NOT NULL, chunk_no INTEGER NOT NULL, rows BLOB NOT NULL, PRIMARY KEY (id, chunk_no))"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS result_sets_expires ON result_sets (expires)")
+        db.commit()
+        _local.db, _local.key = db, key
+    return db
+
+
+def _evict(db, now):
+    db.execute("DELETE FROM result_sets WHERE expires <= ?", (now,))
+    # expires moves forward on access, so the lowest values are the least recently used
+    db.execute(
+        "DELETE FROM result_sets WHERE id NOT IN (SELECT id FROM result_sets ORDER BY expires DESC LIMIT ?)",
+        (RESULT_MAX_ENTRIES,),
+    )
+    db.execute("DELETE FROM result_chunks WHERE id NOT IN (SELECT id FROM result_sets)")
+
+
+def put(columns, rows):
+    """Store a result set (rows as sequences in column order) and return its id."""
+    result_id = uuid.uuid4().hex
+    now = time.time()
+    rows = iter(rows)
+    db = _db()
+    with db:
+        total = 0
+        chunk_no = 0
+        while True:
+            chunk = [tuple(row) for row in islice(rows, RESULT_CHUNK_ROWS)]
+            if not chunk:
+                break
+            # pickle keeps Decimal/datetime values intact for the exporters
+            db.execute(
+                "INSERT INTO result_chunks VALUES (?, ?, ?)",
+                (result_id, chunk_no, pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+            total += len(chunk)
+            chunk_no += 1
+        db.execute(
+            "INSERT INTO result_sets VALUES (?, ?, ?, ?)",
+            (result_id, json.dumps(list(columns)), total, now + RESULT_TTL_SECONDS),
+        )
+        _evict(db, now)
+    return result_id
+
+
+def get(result_id):
+    """
+    Return the entry (id, columns, total_rows) for result_id, or None if gone.
+    Rows are read with iter_dicts()/page(). The TTL is refreshed at most once
+    per RESULT_TOUCH_SECONDS, so most reads do not write.
+    """
+    now = time.time()
+    db = _db()
+    row = db.execute(
+        "SELECT columns, total_rows, expires FROM result_sets WHERE id = ? AND expires > ?", (result_id, now)
+    ).fetchone()
+    if row is None:
+        return None
+    columns, total_rows, expires = row
+    if now + RESULT_TTL_SECONDS - expires > RESULT_TOUCH_SECONDS:
+        with db:
+            db.execute("UPDATE result_sets SET expires = ? WHERE id = ?", (now + RESULT_TTL_SECONDS, result_id))
+    return {"id": result_id, "columns": json.loads(columns), "total_rows": total_rows}
+
+
+def iter_rows(entry, offset=0, limit=None):
+    """Yield the rows offset..offset+limit, loading only the chunks that hold them."""
+    stop = entry["total_rows"] if limit is None else min(entry["total_rows"], offset + limit)
+    if offset >= stop:
+        return
+    # One query per chunk: exports stream this generator, so no cursor stays open
+    for chunk_no in range(offset // RESULT_CHUNK_ROWS, (stop - 1) // RESULT_CHUNK_ROWS + 1):
+        row = _db().execute(
+            "SELECT rows FROM result_chunks WHERE id = ? AND chunk_no = ?", (entry["id"], chunk_no)
+        ).fetchone()
+        if row is None:     # evicted while being read
+            return
+        start = chunk_no * RESULT_CHUNK_ROWS
+        yield from pickle.loads(row[0])[max(0, offset - start):stop - start]
+
+
+def iter_dicts(entry, offset=0, limit=None):
+    columns = entry["columns"]
+    for row in iter_rows(entry, offset, limit):
+        yield dict(zip(columns, row))
+
+
+def page(entry, offset=0, limit=INLINE_ROWS):
+    offset = max(0, offset)
+    limit = max(1, min(limit, MAX_PAGE_ROWS))
+    return {
+        "columns": entry["columns"],
+        "rows": list(iter_dicts(entry, offset, limit)),
+        "offset": offset,
+        "limit": limit,
+        "total_rows": entry["total_rows"],
+    }
@@ -0,0 +1,83 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When several requests make the same call at the same time (same SQL
+generation prompt, same query, same summary), only the first one, the
+leader, runs it. The others, the followers, wait on the leader's Future
+and get its result, or its exception. Once the call finishes, the key is
+released and the next call runs again. Results are not cached.
+
+Counters for every group are returned by metrics() and served on /metrics.
+"""
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+
+import llm_gateway
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}            # key -> Future of the in-flight leader
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "followers": 0, "errors": 0, "in_flight": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key across concurrent callers."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.stats["leaders"] += 1
+                self.stats["in_flight"] += 1
+                leader = True
+            else:
+                self.stats["followers"] += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._release(key, error=True)
+            future.set_exception(e)
+            raise
+        self._release(key)
+        future.set_result(result)
+        return result
+
+    def _release(self, key, error=False):
+        # Drop the key before waking followers so a later call starts afresh
+        with self._lock:
+            self._calls.pop(key, None)
+            self.stats["in_flight"] -= 1
+            if error:
+                self.stats["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+def make_key(*parts):
+    """Stable key for JSON-serializable call arguments."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+llm = SingleFlight("llm")
+sql = SingleFlight("sql")
+
+
+def chat_completion(**kwargs):
+    """llm_gateway.chat(**kwargs), shared by identical concurrent calls."""
+    return llm.do(make_key(kwargs), llm_gateway.chat, **kwargs)
+
+
+def metrics():
+    return {group.name: group.snapshot() for group in (llm, sql)}
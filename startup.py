@@ -0,0 +1,120 @@
+"""
+Startup model for the chat app.
+
+Importing myapp only loads Flask, NumPy (for the forecast and chart
+modules) and the app's own light modules; nothing connects to SQL Server
+or OpenAI. Other heavy libraries are imported inside the functions that
+use them. For pre-forking servers (mod_wsgi daemon
+processes, gunicorn --preload), call warm_up() once after importing the
+app so those imports are paid before the first request. Connections are
+still opened lazily, per process; warm_up() opens the first one in a
+background thread to load the intent router's [BIdata] vocabulary. A
+worker forked after warm_up() drops the database connections and LLM
+client it inherited and opens its own.
+
+Every import done by warm_up() is timed. The timings are logged and
+served on /readyz. For a full per-module breakdown of a cold import:
+    python startup.py importtime
+"""
+import os
+import sys
+import time
+import logging
+import importlib
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily on hot paths; warm_up() loads them ahead of traffic
+HEAVY_MODULES = [
+    "openai",
+    "pandas",
+    "openpyxl",
+    "reportlab.pdfgen.canvas",
+    "fitz",
+    "pytesseract",
+    "PIL.Image",
+    "tiktoken",
+    "tabular",
+    "summarize",
+]
+
+import_timings = {}         # module -> milliseconds
+state = {"warmed_up": False, "warm_up_ms": None, "started_at": time.time()}
+
+
+def timed_import(name):
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+    except Exception as e:
+        # One broken optional module must not take the whole process down
+        logger.warning(f"Warm-up could not import {name}: {e}")
+        return None
+    import_timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return module
+
+
+def record(name, started):
+    """Record the import time of a module that started loading at perf_counter() == started."""
+    import_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def warm_up(modules=HEAVY_MODULES):
+    """
+    Import heavy modules and build the shared LLM client. The only network
+    I/O is the intent router's vocabulary load, which runs in a background
+    thread.
+    """
+    if state["warmed_up"]:
+        return import_timings
+    start = time.perf_counter()
+    for name in modules:
+        timed_import(name)
+
+    import llm_gateway
+    llm_gateway.get_client()
+
+    # Starts loading the [BIdata] vocabulary for the intent router in the background
+    import db
+    import intent
+    intent.load_sql_vocabulary(db.query)
+
+    state["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    state["warmed_up"] = True
+    slowest = sorted(import_timings.items(), key=lambda item: item[1], reverse=True)[:5]
+    logger.info(f"Warm-up finished in {state['warm_up_ms']} ms; slowest imports: {slowest}")
+    return import_timings
+
+
+def importtime_report(target="myapp", top=20):
+    """Run `python -X importtime -c "import <target>"` and print its slowest direct imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        # Nested imports are indented two spaces per level; keep the target's direct imports
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name))
+
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else f"import {target} failed")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for cumulative, own, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative:>14.1f}  {own:>8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["importtime"]:
+        importtime_report(*sys.argv[2:3])
+    else:
+        print("usage: python startup.py importtime [module]")
@@ -495,8 +495,13 @@ function sendMessage(message) {
         appendMessage('bot', `📝 ${data.preview}`);
       } else if (data.chart) {
         appendChart(data.chart);
+        if (data.forecast) appendMessage('bot', data.forecast.message);
+        if (data.chart_meta && data.chart_meta.reduced) {
+          const how = data.chart_meta.reduced === 'top_n' ? 'largest values, the rest grouped as "Other"' : 'downsampled points';
+          appendMessage('bot', `Showing ${data.chart_meta.shown_points} of ${data.chart_meta.total_points} (${how}). Export the result for the full series.`);
+        }
       } else if (data.table) {
-        appendTable(data.table);
+        appendTable(data.table, data.result_id, data.total_rows);
       } else if (data.summary || data.reply) {
         appendMessage('bot', data.summary || data.reply);
       } else if (data.download_link) {
@@ -530,6 +535,12 @@ function appendChart(data) {
   const labels = data.map(item => item.label);
   const values = data.map(item => item.value);
 
+  if (data.some(item => item.projected)) {
+    appendForecastChart(canvas, data, labels);
+    chatWindow.scrollTop = chatWindow.scrollHeight;
+    return;
+  }
+
   new Chart(canvas, {
     type: 'bar',
     data: {
@@ -557,7 +568,83 @@ function appendChart(data) {
   chatWindow.scrollTop = chatWindow.scrollHeight;
 }
 
-function appendTable(data) {
+// History as a solid line, projected points dashed, with the band shaded
+function appendForecastChart(canvas, data, labels) {
+  const lastActual = data.findIndex(item => item.projected) - 1;
+  const actual = data.map(item => (item.projected ? null : item.value));
+  // Start the projected line at the last actual point so the two connect
+  const projected = data.map((item, i) => (item.projected || i === lastActual ? item.value : null));
+  const lower = data.map((item, i) => (item.projected ? item.lower : i === lastActual ? item.value : null));
+  const upper = data.map((item, i) => (item.projected ? item.upper : i === lastActual ? item.value : null));
+
+  new Chart(canvas, {
+    type: 'line',
+    data: {
+      labels: labels,
+      datasets: [
+        {
+          label: 'Actual',
+          data: actual,
+          borderColor: '#4f46e5',
+          backgroundColor: '#4f46e5',
+          borderWidth: 2,
+          tension: 0.2
+        },
+        {
+          label: 'Forecast',
+          data: projected,
+          borderColor: '#f59e0b',
+          backgroundColor: '#f59e0b',
+          borderDash: [6, 4],
+          borderWidth: 2,
+          tension: 0.2
+        },
+        {
+          label: 'Lower',
+          data: lower,
+          borderColor: 'transparent',
+          pointRadius: 0,
+          fill: false
+        },
+        {
+          label: 'Upper',
+          data: upper,
+          borderColor: 'transparent',
+          backgroundColor: '#f59e0b33',
+          pointRadius: 0,
+          fill: '-1'
+        }
+      ]
+    },
+    options: {
+      responsive: true,
+      plugins: {
+        legend: {
+          display: true,
+          labels: { filter: item => item.text === 'Actual' || item.text === 'Forecast' }
+        },
+        tooltip: { enabled: true }
+      },
+      scales: {
+        y: { beginAtZero: true }
+      }
+    }
+  });
+}
+
+function appendTableRows(tbody, columns, rows) {
+  rows.forEach(row => {
+    const tr = document.createElement('tr');
+    columns.forEach(col => {
+      const td = document.createElement('td');
+      td.textContent = row[col] ?? '';
+      tr.appendChild(td);
+    });
+    tbody.appendChild(tr);
+  });
+}
+
+function appendTable(data, resultId = null, totalRows = null) {
   if (!data.length) {
     appendMessage('bot', 'No data to display.');
     return;
@@ -565,11 +652,12 @@ function appendTable(data) {
 
   const table = document.createElement('table');
   table.className = 'data-table';
+  const columns = Object.keys(data[0]);
 
   // Header
   const thead = document.createElement('thead');
   const headerRow = document.createElement('tr');
-  Object.keys(data[0]).forEach(col => {
+  columns.forEach(col => {
     const th = document.createElement('th');
     th.textContent = col;
     headerRow.appendChild(th);
@@ -579,18 +667,43 @@ function appendTable(data) {
 
   // Body
   const tbody = document.createElement('tbody');
-  data.forEach(row => {
-    const tr = document.createElement('tr');
-    Object.values(row).forEach(val => {
-      const td = document.createElement('td');
-      td.textContent = val;
-      tr.appendChild(td);
-    });
-    tbody.appendChild(tr);
-  });
+  appendTableRows(tbody, columns, data);
   table.appendChild(tbody);
 
   chatWindow.appendChild(table);
+
+  // Remaining rows stay on the server; fetch them a page at a time
+  if (resultId && totalRows > data.length) {
+    let loaded = data.length;
+    const moreBtn = document.createElement('button');
+    moreBtn.className = 'load-more-btn';
+    moreBtn.textContent = `Load more (${loaded} of ${totalRows})`;
+    moreBtn.addEventListener('click', () => {
+      moreBtn.disabled = true;
+      fetch(`/result/${resultId}?offset=${loaded}&limit=100`)
+        .then(res => {
+          if (!res.ok) throw new Error('Result expired');
+          return res.json();
+        })
+        .then(page => {
+          appendTableRows(tbody, columns, page.rows);
+          loaded += page.rows.length;
+          if (loaded >= page.total_rows) {
+            moreBtn.remove();
+          } else {
+            moreBtn.textContent = `Load more (${loaded} of ${page.total_rows})`;
+            moreBtn.disabled = false;
+          }
+        })
+        .catch(err => {
+          console.error('Failed to load rows:', err);
+          showToast('This result has expired, please ask again', 'error');
+          moreBtn.remove();
+        });
+    });
+    chatWindow.appendChild(moreBtn);
+  }
+
   chatWindow.scrollTop = chatWindow.scrollHeight;
 }
 
@@ -681,6 +794,20 @@ function triggerExport(format) {
     return;
   }
 
+  // Stored table results are exported server-side; the browser just follows the link.
+  // Chart and summary replies also carry a result_id but export what was shown.
+  if (lastBotResponse.table && lastBotResponse.result_id) {
+    const a = document.createElement('a');
+    a.href = `/export/${format}?result=${lastBotResponse.result_id}`;
+    a.download = `export.${format === 'excel' ? 'xlsx' : format}`;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+    exportDropdown.classList.remove('show');
+    showToast(`Exporting as ${format.toUpperCase()}`, 'success');
+    return;
+  }
+
   let payload = {};
   if (lastBotResponse.table) payload.table_data = lastBotResponse.table;
   else if (lastBotResponse.chart) payload.chart_data = lastBotResponse.chart;
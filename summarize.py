@@ -1,33 +1,218 @@
-import openai
 import os
-client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fileread
+import llm_gateway
+import prompts
+import singleflight
+
+MODEL = "gpt-4.1-mini"
+CHUNK_TOKENS = 1000             # map step input size (~700 words)
+REDUCE_BUDGET_TOKENS = 6000     # partial summaries above this are reduced in groups
+MAX_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "8"))
+
+# Chunk and reduce-node summaries keyed by content hash, so re-summarizing an
+# append-only merge only sends new chunks to the LLM. Bump the version when
+# prompts change to invalidate old entries.
+# The directory is created on the first cache write.
+SUMMARY_CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", os.path.join(fileread.MERGE_DIR, "summary_cache"))
+SUMMARY_CACHE_VERSION = "2"
+
+# Caps in-flight summary calls across all requests in this process
+_llm_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_stats_lock = threading.Lock()
+
+_DOCUMENT_START_RE = re.compile(r"(?=^### Start of Document: )", re.MULTILINE)
+_PIECE_END_RE = re.compile(r"(?<=[.!?\n])")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text):
+        return len(_encoding.encode(text, disallowed_special=()))
+except Exception:
+    def count_tokens(text):
+        # Roughly 4 characters per token for English text
+        return len(text) // 4 + 1
+
+
+def _split_oversized(piece, max_tokens):
+    """Split a single sentence/line that is larger than a chunk on word boundaries."""
+    words = piece.split()
+    step = max(1, int(len(words) * max_tokens / max(count_tokens(piece), 1)))
+    return [" ".join(words[i:i + step]) + " " for i in range(0, len(words), step)]
+
+
+def _pack(pieces, max_tokens):
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
 
 # Chunk The Text for Summarize
-def chunk_text(text, max_words=700):
-    words = text.split()
-    return [' '.join(words[i:i+max_words]) for i in range(0, len(words), max_words)]
-
-def summarize_with_gpt(text):
-    prompt = f"Summarize the following document content in clear and concise language:\n\n{text}\n\nSummary:"
-
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that summarizes documents."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    answer = response.choices[0].message.content.strip()
-    return answer
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """
+    Token-aware chunking. Whole documents (split on the merge markers) are
+    packed together while they fit; larger documents are split on sentence
+    and line boundaries, never mid-sentence unless a sentence alone is too big.
+    """
+    chunks = []
+    pending = []
+    pending_tokens = 0
+    for document in _DOCUMENT_START_RE.split(text):
+        if not document.strip():
+            continue
+        tokens = count_tokens(document)
+        if pending and pending_tokens + tokens > max_tokens:
+            chunks.append("".join(pending))
+            pending, pending_tokens = [], 0
+        if tokens <= max_tokens:
+            pending.append(document)
+            pending_tokens += tokens
+            continue
+
+        pieces = []
+        for piece in _PIECE_END_RE.split(document):
+            if count_tokens(piece) > max_tokens:
+                pieces.extend(_split_oversized(piece, max_tokens))
+            elif piece:
+                pieces.append(piece)
+        chunks.extend(_pack(pieces, max_tokens))
+
+    if pending:
+        chunks.append("".join(pending))
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _create(**kwargs):
+    with _llm_slots:
+        return llm_gateway.chat(**kwargs)
+
+
+def _complete(kind, system, document):
+    request = {"model": MODEL, "messages": prompts.build(system, document=document)}
+    # Identical chunks summarized concurrently (by this or other requests) share one call
+    response = singleflight.llm.do(singleflight.make_key(request), _create, **request)
+    prompts.record(kind, response)
+    return response.choices[0].message.content.strip()
+
+
+def _cache_path(kind, text):
+    key = hashlib.sha256(f"{SUMMARY_CACHE_VERSION}:{MODEL}:{kind}:{text}".encode("utf-8")).hexdigest()
+    return os.path.join(SUMMARY_CACHE_DIR, f"{key}.txt")
+
+
+def _cached(kind, text, fn, stats):
+    """Return fn(text) from the summary cache, calling the LLM only on a miss."""
+    path = _cache_path(kind, text)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = f.read()
+        _record(stats, kind, hit=True, tokens=count_tokens(text))
+        return summary
+    except FileNotFoundError:
+        pass
+
+    summary = fn(text)
+    os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(summary)
+    os.replace(tmp_path, path)
+    _record(stats, kind, hit=False, tokens=count_tokens(text))
+    return summary
+
+
+def new_stats():
+    return {
+        "chunks": 0, "chunk_hits": 0,
+        "reduce_nodes": 0, "reduce_hits": 0,
+        "llm_calls": 0, "tokens_sent": 0, "tokens_saved": 0,
+    }
+
+
+def _record(stats, kind, hit, tokens):
+    if stats is None:
+        return
+    with _stats_lock:
+        stats["chunks" if kind == "chunk" else "reduce_nodes"] += 1
+        if hit:
+            stats["chunk_hits" if kind == "chunk" else "reduce_hits"] += 1
+            stats["tokens_saved"] += tokens
+        else:
+            stats["llm_calls"] += 1
+            stats["tokens_sent"] += tokens
+
+
+def _summarize_chunk(text):
+    return _complete("summary_chunk", prompts.SUMMARY_SYSTEM, text)
+
+
+def _combine(joined):
+    return _complete("summary_reduce", prompts.COMBINE_SYSTEM, joined)
+
+
+def summarize_with_gpt(text, stats=None):
+    return _cached("chunk", text, _summarize_chunk, stats)
+
+
+def combine_summaries(summaries, stats=None):
+    return _cached("reduce", "\n\n".join(summaries), _combine, stats)
+
+
+def _map_concurrent(fn, items):
+    if len(items) == 1:
+        return [fn(items[0])]
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+def _group_by_budget(summaries, budget):
+    """Consecutive groups of at least two summaries that fit the token budget."""
+    groups, current, current_tokens = [], [], 0
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if len(current) >= 2 and current_tokens + tokens > budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(summary)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def reduce_summaries(summaries, budget=REDUCE_BUDGET_TOKENS, stats=None):
+    """Tree reduce: combine groups level by level until one call can take them all."""
+    combine = lambda group: combine_summaries(group, stats)
+    while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > budget:
+        summaries = _map_concurrent(combine, _group_by_budget(summaries, budget))
+    if len(summaries) > 1:
+        return combine(summaries)
+    return summaries[0]
+
+
 # Summarize the Content in Document
-def summarize_document(full_text):
+def summarize_document(full_text, stats=None):
+    """
+    Map-reduce summary of full_text. Pass a dict from new_stats() as stats to
+    collect cache hits and the tokens they saved for this request.
+    """
     chunks = chunk_text(full_text)
-    partial_summaries = [summarize_with_gpt(chunk) for chunk in chunks]
-
-    if len(partial_summaries) > 1:
-        # Summarize the summaries
-        return summarize_with_gpt(" ".join(partial_summaries))
-    elif partial_summaries:
-        return partial_summaries[0]
-    else:
+    if not chunks:
         return "No content to summarize."
+
+    partial_summaries = _map_concurrent(lambda chunk: summarize_with_gpt(chunk, stats), chunks)
+    return reduce_summaries(partial_summaries, stats=stats)
@@ -0,0 +1,239 @@
+"""
+Compact text encoding for spreadsheet/CSV uploads.
+
+The output goes straight into LLM prompts, so instead of one JSON object per
+row it writes the header once and pipe-delimited rows below it:
+
+    ## Sheet: Calls | 3 rows x 3 cols
+    @types Docket No:int; Status:cat; Created Date:date
+    @dict Status: A=Closed; B=Pending
+    Docket No|Status|Created Date
+    1001|A|2025-01-03
+    1002|A|2025-01-04
+    1003|B|^
+
+Repeated categorical values are replaced by dictionary codes, a value equal
+to the one directly above it is written as "^" (unless it is a single
+character, like most codes), and empty cells are nulls.
+Tables above MAX_FULL_ROWS are replaced by a per-column digest plus an
+evenly spaced row sample.
+"""
+import numpy as np
+import pandas as pd
+
+DELIM = "|"
+DITTO = "^"
+MAX_FULL_ROWS = 1000        # larger tables get a digest + sample
+SAMPLE_ROWS = 50
+DICT_MAX_CODES = 64         # max distinct values for dictionary encoding
+DICT_MIN_REPEAT = 2.0       # rows per distinct value before a column is categorical
+TOP_VALUES = 5
+# Date formats tried on CSV text columns (each also with " %H:%M" and " %H:%M:%S")
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%m-%d-%Y", "%d/%m/%y", "%m/%d/%y")
+
+LEGEND = (
+    f"Format: header row then '{DELIM}'-delimited rows; '{DITTO}' = same as the row above; "
+    "empty = null; @dict codes map to the listed values."
+)
+
+
+def _dict_code(i):
+    """A, B, ..., Z, AA, AB, ... (spreadsheet-style column letters)."""
+    code = ""
+    i += 1
+    while i:
+        i, rem = divmod(i - 1, 26)
+        code = chr(65 + rem) + code
+    return code
+
+
+def _format_number(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def _clean_cell(value):
+    text = str(value).replace("\r", " ").replace("\n", " ").replace(DELIM, "/").strip()
+    return "\\" + text if text == DITTO else text
+
+
+def _unique_names(names):
+    """Suffix repeated column names (a, a_2, a_3, ...); cleaning can make "a|b" and "a/b" equal."""
+    seen = set(names)
+    counts = {}
+    unique = []
+    for name in names:
+        if name in counts:
+            n = counts[name] + 1
+            while f"{name}_{n}" in seen:
+                n += 1
+            counts[name] = n
+            name = f"{name}_{n}"
+            seen.add(name)
+        else:
+            counts[name] = 1
+        unique.append(name)
+    return unique
+
+
+def _column_kind(series):
+    values = series.dropna()
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        times = values.dt.hour * 3600 + values.dt.minute * 60 + values.dt.second
+        return "date" if not times.any() else "datetime"
+    if pd.api.types.is_numeric_dtype(series):
+        if pd.api.types.is_integer_dtype(series) or (values % 1 == 0).all():
+            return "int"
+        return "num"
+    distinct = values.astype(str).nunique()
+    if len(values) and distinct <= DICT_MAX_CODES and len(values) >= distinct * DICT_MIN_REPEAT:
+        return "cat"
+    return "str"
+
+
+def _encode_column(series, kind):
+    """Return (encoded cell strings, dictionary legend or None)."""
+    mask = series.isna().to_numpy()
+    if kind == "date":
+        cells = series.dt.strftime("%Y-%m-%d")
+    elif kind == "datetime":
+        cells = series.dt.strftime("%Y-%m-%d %H:%M")
+    elif kind in ("int", "num"):
+        cells = series.map(lambda v: "" if pd.isna(v) else _format_number(v))
+    elif kind == "bool":
+        cells = series.map(lambda v: "" if pd.isna(v) else ("true" if v else "false"))
+    else:
+        cells = series.map(lambda v: "" if pd.isna(v) else _clean_cell(v))
+
+    cells = np.where(mask, "", cells.astype(str).to_numpy()).astype(object)
+
+    legend = None
+    if kind == "cat":
+        # Most frequent values get the shortest codes
+        counts = pd.Series(cells[~mask]).value_counts()
+        if np.mean([len(value) for value in counts.index]) > 2:
+            codes = {value: _dict_code(i) for i, value in enumerate(counts.index)}
+            cells = np.array([codes.get(c, c) if c else "" for c in cells], dtype=object)
+            legend = "; ".join(f"{code}={value}" for value, code in codes.items())
+
+    return cells, legend
+
+
+def _apply_ditto(cells):
+    """Replace a cell equal to the one above it with DITTO where that saves characters."""
+    out = cells.copy()
+    if len(cells) > 1:
+        same = (cells[1:] == cells[:-1]) & (np.vectorize(len, otypes=[int])(cells[1:]) > len(DITTO))
+        out[1:][same] = DITTO
+    return out
+
+
+def _digest(df, kinds):
+    lines = ["@digest"]
+    for col, kind in kinds.items():
+        series = df[col]
+        values = series.dropna()
+        nulls = len(series) - len(values)
+        head = f"- {col} ({kind}, nulls={nulls})"
+        if values.empty:
+            lines.append(head)
+        elif kind in ("int", "num"):
+            lines.append(
+                f"{head}: min={_format_number(values.min())} max={_format_number(values.max())} "
+                f"mean={_format_number(values.mean())} sum={_format_number(values.sum())}"
+            )
+        elif kind in ("date", "datetime"):
+            fmt = "%Y-%m-%d" if kind == "date" else "%Y-%m-%d %H:%M"
+            lines.append(f"{head}: from {values.min().strftime(fmt)} to {values.max().strftime(fmt)}")
+        else:
+            top = values.astype(str).value_counts()
+            shown = ", ".join(f"{_clean_cell(v)} ({n})" for v, n in top.head(TOP_VALUES).items())
+            lines.append(f"{head}: distinct={len(top)} top: {shown}")
+    return lines
+
+
+def dataframe_to_text(df, name=None):
+    """Encode one DataFrame as a compact table block."""
+    df = df.dropna(how="all").dropna(axis=1, how="all")
+    df.columns = _unique_names([_clean_cell(c) for c in df.columns])
+    n_rows, n_cols = df.shape
+
+    title = f"## Sheet: {name} | " if name else "## Table | "
+    lines = [f"{title}{n_rows} rows x {n_cols} cols"]
+    if not n_rows or not n_cols:
+        return lines[0]
+
+    kinds = {col: _column_kind(df[col]) for col in df.columns}
+    lines.append("@types " + "; ".join(f"{col}:{kind}" for col, kind in kinds.items()))
+
+    if n_rows > MAX_FULL_ROWS:
+        lines.extend(_digest(df, kinds))
+        positions = np.unique(np.linspace(0, n_rows - 1, SAMPLE_ROWS).astype(int))
+        df = df.iloc[positions]
+        lines.append(f"@sample {len(df)} of {n_rows} rows, evenly spaced")
+
+    columns = []
+    for col, kind in kinds.items():
+        cells, legend = _encode_column(df[col], kind)
+        if legend:
+            lines.append(f"@dict {col}: {legend}")
+        columns.append(_apply_ditto(cells))
+
+    lines.append(DELIM.join(df.columns))
+    lines.extend(DELIM.join(row) for row in zip(*columns))
+    return "\n".join(lines)
+
+
+def sheets_to_text(sheets):
+    """Encode a {sheet name: DataFrame} mapping, skipping empty sheets."""
+    blocks = [
+        dataframe_to_text(df, name)
+        for name, df in sheets.items()
+        if not df.dropna(how="all").empty
+    ]
+    if not blocks:
+        return ""
+    return LEGEND + "\n\n" + "\n\n".join(blocks)
+
+
+def excel_to_text(source, engine=None):
+    """Encode every sheet of an Excel workbook."""
+    sheets = pd.read_excel(source, sheet_name=None, engine=engine)
+    return sheets_to_text(sheets)
+
+
+def _parse_dates(series):
+    """
+    Parse a text column of dates with the one format that reads every value,
+    or return None. A column that reads fully as both day-first and
+    month-first (every day <= 12) with different results stays text rather
+    than risk swapping day and month.
+    """
+    values = series.astype("string").str.strip()
+    candidates = []
+    for date_format in DATE_FORMATS:
+        # The time part may differ from value to value ("03/01/2025", "04/01/2025 10:30")
+        parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+        for time_format in ("", " %H:%M", " %H:%M:%S"):
+            parsed = parsed.fillna(pd.to_datetime(values, format=date_format + time_format, errors="coerce"))
+        if parsed.notna().sum() == series.notna().sum():
+            candidates.append(parsed)
+    distinct = {tuple(parsed.dropna()) for parsed in candidates}
+    return candidates[0] if len(distinct) == 1 else None
+
+
+def csv_to_text(source):
+    """Encode a CSV file, parsing date-like text columns as dates."""
+    df = pd.read_csv(source)
+    for col in df.columns:
+        if not pd.api.types.is_string_dtype(df[col]):
+            continue
+        sample = df[col].dropna().astype(str).head(20)
+        if len(sample) and sample.str.match(r"^\d{4}-\d{2}-\d{2}|^\d{1,2}[/-]\d{1,2}[/-]\d{2,4}").all():
+            parsed = _parse_dates(df[col])
+            if parsed is not None:
+                df[col] = parsed
+    return sheets_to_text({"csv": df})
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import charts  # noqa: E402
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    values = np.sin(np.linspace(0, 20, 1000)) * 100
+
+    keep = charts.lttb_indices(values, 50)
+
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    values = np.zeros(500)
+    values[333] = 1000
+
+    assert 333 in charts.lttb_indices(values, 20)
+
+
+def test_lttb_short_series_unchanged():
+    assert list(charts.lttb_indices([1, 2, 3], 10)) == [0, 1, 2]
+
+
+def test_top_n_folds_the_rest_into_other():
+    chart = [{"label": f"site {i}", "value": float(i)} for i in range(30)]
+
+    reduced = charts.top_n(chart, n=5)
+
+    assert [item["label"] for item in reduced[:4]] == ["site 29", "site 28", "site 27", "site 26"]
+    assert reduced[-1] == {"label": "Other (26)", "value": float(sum(range(26)))}
+    assert sum(item["value"] for item in reduced) == sum(item["value"] for item in chart)
+    assert charts.top_n(chart[:5], n=5) == chart[:5]
+
+
+def test_four_digit_codes_are_categories():
+    chart = [{"label": str(code), "value": float(code % 7)} for code in range(5001, 5301)]
+
+    reduced, meta = charts.bound(chart)
+
+    assert meta["reduced"] == "top_n"
+    assert reduced[-1]["label"].startswith(charts.OTHER_LABEL)
+
+
+def test_period_labels():
+    assert charts.period_key("2025") == (2025, 0, 0, "")
+    assert charts.period_key("2025-03-14 10:00") == (2025, 3, 14, "10:00")
+    for label in ("1001", "2025-13", "2025-00", "Pune", "2025-03-40"):
+        assert charts.period_key(label) is None
+
+
+def test_time_series_is_downsampled_in_time_order():
+    months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(300)]
+    chart = [{"label": label, "value": float(i)} for i, label in enumerate(months)]
+    by_count = sorted(chart, key=lambda item: item["value"], reverse=True)
+
+    reduced, meta = charts.bound(by_count)
+
+    assert meta["reduced"] == "lttb" and len(reduced) == charts.MAX_POINTS
+    labels = [item["label"] for item in reduced]
+    assert labels == sorted(labels)
+    assert labels[0] == months[0] and labels[-1] == months[-1]
@@ -0,0 +1,97 @@
+import os
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import forecast  # noqa: E402
+
+
+def _check_bands(result, horizon):
+    for key in ("forecast", "lower", "upper"):
+        assert result[key].shape == (horizon,)
+    assert (result["lower"] <= result["forecast"] + 1e-9).all()
+    assert (result["forecast"] <= result["upper"] + 1e-9).all()
+
+
+def test_flat_series():
+    result = forecast.forecast([50.0] * 12, 3, 12)
+
+    _check_bands(result, 3)
+    assert np.allclose(result["forecast"], 50.0)
+    assert result["holdout_mae"] == 0
+
+
+def test_linear_trend():
+    y = 10 + 2 * np.arange(20, dtype=float)
+
+    result = forecast.forecast(y, 4)
+
+    _check_bands(result, 4)
+    assert result["model"] == "linear_trend"
+    assert np.allclose(result["forecast"], 10 + 2 * np.arange(20, 24))
+    assert np.allclose(result["lower"], result["upper"])    # no residuals, no spread
+
+
+def test_monthly_seasonal_series():
+    season = np.array([100, 120, 150, 170, 160, 140, 110, 90, 80, 85, 95, 105], dtype=float)
+    y = np.tile(season, 2)
+
+    result = forecast.forecast(y, 6, 12)
+
+    _check_bands(result, 6)
+    assert result["model"] in ("seasonal_naive", "holt_winters")
+    assert np.allclose(result["forecast"], season[:6], atol=1.0)
+
+
+def test_series_fills_year_gaps():
+    labels, values, freq = forecast.series_from_result(
+        ["Year", "Total"], [(2019, 5), (2020, 6), (2022, Decimal("8")), (2023, 9)])
+
+    assert freq == "year"
+    assert labels == ["2019", "2020", "2021", "2022", "2023"]
+    assert values == [5.0, 6.0, 0.0, 8.0, 9.0]
+
+
+def test_series_keeps_a_regular_year_step():
+    labels, values, _ = forecast.series_from_result(["Year", "Total"], [(2019, 5), (2021, 7), (2023, 9)])
+
+    assert labels == ["2019", "2021", "2023"]
+    assert values == [5.0, 7.0, 9.0]
+
+
+def test_series_year_and_month_columns():
+    rows = [(2024, "Nov", 10), (2024, "Dec", 20), (2025, 2, 40)]
+
+    labels, values, freq = forecast.series_from_result(["year", "month", "calls"], rows)
+
+    assert freq == "month"
+    assert labels == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    assert values == [10.0, 20.0, 0.0, 40.0]
+
+
+def test_series_year_month_labels_out_of_order():
+    rows = [("2025-03", 3), ("2025-01", 1), ("2025-02", 2)]
+
+    labels, values, freq = forecast.series_from_result(["period", "count"], rows)
+
+    assert (labels, values, freq) == (["2025-01", "2025-02", "2025-03"], [1.0, 2.0, 3.0], "month")
+
+
+def test_non_time_series_is_rejected():
+    rows = [("Pune", 10), ("Mumbai", 20), ("Delhi", 30)]
+
+    assert forecast.series_from_result(["city", "count"], rows) is None
+
+
+def test_forecast_result_marks_projected_points():
+    rows = [(f"2024-{m:02d}", 100 + m) for m in range(1, 13)]
+
+    result = forecast.forecast_result(["month", "count"], rows, "forecast the next 3 months")
+
+    projected = [point for point in result["chart"] if point.get("projected")]
+    assert [point["label"] for point in projected] == ["2025-01", "2025-02", "2025-03"]
+    assert all(point["lower"] <= point["value"] <= point["upper"] for point in projected)
+    assert result["forecast"]["horizon"] == 3
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fileread  # noqa: E402
+import mergestore  # noqa: E402
+
+
+def _write_legacy(tmp_path, name, documents, extra=""):
+    text = extra + "".join(mergestore.format_document(filename, body) for filename, body in documents)
+    (tmp_path / name).write_text(text, encoding="utf-8")
+
+
+def test_add_documents_keeps_existing_append_only_merge(tmp_path, monkeypatch):
+    monkeypatch.setattr(fileread, "MERGE_DIR", str(tmp_path))
+    _write_legacy(tmp_path, "old.txt", [("a.pdf", "alpha text"), ("b.pdf", "beta text")])
+
+    added = mergestore.add_documents("old.txt", [("c.pdf", "gamma text"), ("a.pdf", "alpha text")])
+
+    assert added == 1
+    merged = mergestore.load_merged_text("old.txt")
+    for body in ("alpha text", "beta text", "gamma text"):
+        assert body in merged
+    assert [seg["filename"] for seg in mergestore.load_manifest("old.txt")["segments"]] == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_add_documents_keeps_text_outside_markers(tmp_path, monkeypatch):
+    monkeypatch.setattr(fileread, "MERGE_DIR", str(tmp_path))
+    _write_legacy(tmp_path, "notes.txt", [("a.pdf", "alpha text")], extra="loose notes\n")
+
+    mergestore.add_documents("notes.txt", [("c.pdf", "gamma text")])
+
+    merged = mergestore.load_merged_text("notes.txt")
+    assert "loose notes" in merged and "alpha text" in merged and "gamma text" in merged
+
+
+def test_compact_leaves_unparseable_files_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(fileread, "MERGE_DIR", str(tmp_path))
+    (tmp_path / "plain.txt").write_text("no markers here", encoding="utf-8")
+    _write_legacy(tmp_path, "mixed.txt", [("a.pdf", "alpha text")], extra="loose notes\n")
+
+    assert mergestore.compact("plain.txt") == (0, 0)
+    assert mergestore.compact("mixed.txt") == (1, 0)
+
+    assert (tmp_path / "plain.txt").read_text(encoding="utf-8") == "no markers here"
+    assert "loose notes" in (tmp_path / "mixed.txt").read_text(encoding="utf-8")
+    assert not (tmp_path / "plain.txt.bak").exists()
+    assert not mergestore.has_manifest("mixed.txt")
+
+
+def test_select_segments_matches_whole_file_names_only():
+    manifest = {"segments": [{"filename": name, "hash": name} for name in
+                             ("a.pdf", "1.docx", "data.csv", "budget_2024.xlsx", "minutes.pdf")]}
+
+    def selected(question):
+        return [seg["filename"] for seg in mergestore.select_segments(manifest, question)]
+
+    everything = [seg["filename"] for seg in manifest["segments"]]
+    assert selected("What is a total of 1 item in the data?") == everything
+    assert selected("Summarize budget_2024") == ["budget_2024.xlsx"]
+    assert selected("compare data.csv with the MINUTES") == ["data.csv", "minutes.pdf"]
+    assert selected("what did the minutesheet say") == everything
+
+
+def test_compact_keeps_earlier_backups(tmp_path, monkeypatch):
+    monkeypatch.setattr(fileread, "MERGE_DIR", str(tmp_path))
+    _write_legacy(tmp_path, "old.txt", [("a.pdf", "alpha text")])
+    (tmp_path / "old.txt.bak").write_text("original merge", encoding="utf-8")
+
+    mergestore.compact("old.txt")
+
+    assert (tmp_path / "old.txt.bak").read_text(encoding="utf-8") == "original merge"
+    assert len(list(tmp_path.glob("old.txt.*.bak"))) == 1
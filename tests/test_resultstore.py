@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resultstore  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(resultstore, "RESULT_DB", str(tmp_path / "results.sqlite3"))
+    monkeypatch.setattr(resultstore, "RESULT_CHUNK_ROWS", 10)
+
+
+def _rows(n):
+    return [(i, f"row {i}") for i in range(n)]
+
+
+def test_page_reads_only_requested_rows():
+    result_id = resultstore.put(["n", "label"], _rows(35))
+    entry = resultstore.get(result_id)
+
+    page = resultstore.page(entry, offset=8, limit=15)
+    assert [row["n"] for row in page["rows"]] == list(range(8, 23))
+    assert page["total_rows"] == 35 and page["columns"] == ["n", "label"]
+    assert [row["n"] for row in resultstore.iter_dicts(entry)] == list(range(35))
+
+
+def test_page_bounds():
+    entry = resultstore.get(resultstore.put(["n", "label"], _rows(35)))
+
+    assert [row["n"] for row in resultstore.page(entry, offset=30, limit=100)["rows"]] == list(range(30, 35))
+    assert resultstore.page(entry, offset=35)["rows"] == []
+    assert resultstore.page(entry, offset=-5, limit=3)["offset"] == 0
+    assert resultstore.page(entry, limit=0)["limit"] == 1
+    assert resultstore.page(entry, limit=10 ** 6)["limit"] == resultstore.MAX_PAGE_ROWS
+    empty = resultstore.get(resultstore.put(["n"], []))
+    assert resultstore.page(empty)["rows"] == [] and empty["total_rows"] == 0
+
+
+def test_expired_results_are_gone(monkeypatch):
+    result_id = resultstore.put(["n"], [(1,)])
+    now = time.time()
+    monkeypatch.setattr(resultstore.time, "time", lambda: now + resultstore.RESULT_TTL_SECONDS + 1)
+
+    assert resultstore.get(result_id) is None
+
+
+def test_least_recently_used_results_are_evicted(monkeypatch):
+    monkeypatch.setattr(resultstore, "RESULT_MAX_ENTRIES", 2)
+    clock = [time.time()]
+    monkeypatch.setattr(resultstore.time, "time", lambda: clock[0])
+    first = resultstore.put(["n"], [(1,)])
+    clock[0] += 1
+    second = resultstore.put(["n"], [(2,)])
+    clock[0] += resultstore.RESULT_TOUCH_SECONDS + 1
+    assert resultstore.get(first) is not None      # first is now the most recently used
+    clock[0] += 1
+    third = resultstore.put(["n"], [(3,)])
+
+    assert resultstore.get(second) is None
+    assert resultstore.get(first) is not None and resultstore.get(third) is not None
+    remaining = resultstore._db().execute("SELECT COUNT(DISTINCT id) FROM result_chunks").fetchone()[0]
+    assert remaining == 2
@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tabular  # noqa: E402
+
+
+def _decode(block):
+    """Rebuild the rows of a dataframe_to_text() block: undo dictionary codes and dittos."""
+    lines = block.splitlines()
+    dicts = {}
+    for line in lines:
+        if line.startswith("@dict "):
+            col, legend = line[len("@dict "):].split(": ", 1)
+            dicts[col] = dict(pair.split("=", 1) for pair in legend.split("; "))
+    header_at = next(i for i, line in enumerate(lines) if not line.startswith(("#", "@")))
+    columns = lines[header_at].split(tabular.DELIM)
+    rows, previous = [], None
+    for line in lines[header_at + 1:]:
+        cells = line.split(tabular.DELIM)
+        if previous is not None:
+            cells = [prev if cell == tabular.DITTO else cell for cell, prev in zip(cells, previous)]
+        previous = cells
+        rows.append([dicts.get(col, {}).get(cell, cell) for col, cell in zip(columns, cells)])
+    return columns, rows
+
+
+def test_encoding_round_trip():
+    df = pd.DataFrame({
+        "Docket No": [1001, 1002, 1003, 1004, 1005, 1006],
+        "Status": ["Closed", "Closed", "Pending", "Closed", "Pending", "Pending"],
+        "Note": ["a|b", "^", "x", "x", None, "line\nbreak"],
+        "Amount": [1.5, 1.5, 2.25, None, 3.0, 3.0],
+    })
+
+    block = tabular.dataframe_to_text(df, "Calls")
+
+    assert "@dict Status: A=Closed; B=Pending" in block
+    columns, rows = _decode(block)
+    assert columns == ["Docket No", "Status", "Note", "Amount"]
+    assert [row[1] for row in rows] == list(df["Status"])
+    assert [row[2] for row in rows] == ["a/b", "\\^", "x", "x", "", "line break"]
+    assert [row[3] for row in rows] == ["1.5", "1.5", "2.25", "", "3", "3"]
+    assert block.count(tabular.DITTO) > 1    # repeated values above were dittoed
+
+
+def test_duplicate_column_names_after_cleaning():
+    df = pd.DataFrame([[1, "x"], [2, "y"]], columns=["a|b", "a/b"])
+
+    columns, rows = _decode(tabular.dataframe_to_text(df))
+
+    assert columns == ["a/b", "a/b_2"]
+    assert rows == [["1", "x"], ["2", "y"]]
+
+
+def _csv_dates(text):
+    lines = tabular.csv_to_text(io.StringIO(text)).splitlines()
+    types = next(line for line in lines if line.startswith("@types"))
+    return types, lines[lines.index("d") + 1:]
+
+
+def test_csv_day_first_dates():
+    assert _csv_dates("d\n03/01/2025\n25/01/2025\n") == ("@types d:date", ["2025-01-03", "2025-01-25"])
+
+
+def test_csv_month_first_dates():
+    assert _csv_dates("d\n01/25/2025\n02/03/2025\n") == ("@types d:date", ["2025-01-25", "2025-02-03"])
+
+
+def test_csv_ambiguous_dates_stay_text():
+    assert _csv_dates("d\n03/01/2025\n04/02/2025\n") == ("@types d:str", ["03/01/2025", "04/02/2025"])
+
+
+def test_csv_iso_dates_with_times():
+    assert _csv_dates("d\n2025-01-03\n2025-02-04 10:30\n") == (
+        "@types d:datetime", ["2025-01-03 00:00", "2025-02-04 10:30"])